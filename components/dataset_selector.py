@@ -1,8 +1,11 @@
 import streamlit as st
-import pandas as pd
+from utils.profiler import timed
 
+@timed()
 def render_dataset_selector():
     """Render the dataset selector component"""
+    import pandas as pd
+
     st.subheader("Select Dataset")
     
     # Mock GCP projects and datasets
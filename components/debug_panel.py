@@ -0,0 +1,132 @@
+import streamlit as st
+import utils.profiler as profiler
+import utils.session_memory as session_memory
+
+def render_debug_panel():
+    """Render the opt-in debug panel with per-rerun timings and session memory"""
+    with st.expander("🛠️ Debug"):
+        render_memory_section()
+        st.divider()
+        render_profiling_section()
+
+def render_memory_section():
+    """Render the session memory accounting"""
+    st.markdown("**Session Memory**")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        measure = st.button("Measure", key="debug_measure_memory", use_container_width=True)
+    with col2:
+        evict = st.button("Evict Caches", key="debug_evict_memory", use_container_width=True)
+
+    if evict:
+        freed = session_memory.evict_derivable_data()
+        st.caption("Freed: " + ("; ".join(freed) if freed else "nothing"))
+    if measure or evict:
+        session_memory.enforce_budget(force=True)
+
+    import utils.assistant_pool as assistant_pool
+    import utils.generation_scheduler as generation_scheduler
+    import utils.prompt_context as prompt_context
+    import utils.table_samples as table_samples
+
+    pool = assistant_pool.get_stats()
+    st.caption(
+        f"Assistant pool: {pool['warm']} warm, {pool['loading']} loading, "
+        f"{pool['bytes'] / 1024 / 1024:.1f} of {pool['cap_bytes'] / 1024 / 1024:.0f} MB, "
+        f"{pool['hits']} hits / {pool['waits']} waits / {pool['misses']} misses"
+    )
+    samples = table_samples.get_stats()
+    st.caption(
+        f"Table samples: {samples['tables']} tables cached, "
+        f"{samples['hits']} hits / {samples['fetches']} fetches"
+    )
+    contexts = prompt_context.get_stats()
+    st.caption(
+        f"Prompt contexts: {contexts['contexts']} cached, "
+        f"{contexts['hits']} hits / {contexts['misses']} misses"
+    )
+    generation = generation_scheduler.get_stats()
+    st.caption(
+        f"Generation: {generation['in_flight']} calls in flight, "
+        f"{generation['batches']} batches of {generation['mean_batch_size']:.1f} on average; "
+        + "; ".join(
+            f"{priority} {generation[priority]['queued']} queued, "
+            f"p95 wait {generation[priority]['p95_wait_ms']:.0f} ms"
+            for priority in generation_scheduler.PRIORITIES
+        )
+    )
+
+    report = session_memory.get_memory_report()
+    if not report:
+        st.caption("No measurement yet.")
+        return
+
+    total_mb = report['total_bytes'] / 1024 / 1024
+    budget_mb = report['budget_bytes'] / 1024 / 1024
+    st.write(f"{total_mb:.2f} MB of {budget_mb:.0f} MB budget ({report['measured_at']})")
+    st.progress(min(report['total_bytes'] / report['budget_bytes'], 1.0) if report['budget_bytes'] else 0.0)
+
+    st.dataframe(
+        [
+            {"Entity": name, "Count": info['count'], "Size (KB)": round(info['bytes'] / 1024, 1)}
+            for name, info in report['by_entity'].items()
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+    st.dataframe(
+        [
+            {"Key": key, "Size (KB)": round(size / 1024, 1)}
+            for key, size in list(report['by_key'].items())[:10]
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+
+def render_profiling_section():
+    """Render the per-rerun timings and cProfile capture"""
+    st.checkbox(
+        "Enable profiling",
+        key="profiling_enabled",
+        help="Collect section timings for every rerun of this session"
+    )
+
+    if not profiler.is_enabled():
+        st.caption("Profiling is off.")
+        return
+
+    history = profiler.get_rerun_history()
+    if not history:
+        st.caption("Timings will appear after the next rerun.")
+    else:
+        last = history[-1]
+        ended = ", cut short" if last.get('cut_short') else ""
+        st.write(f"Last rerun: **{last['page']}** ({last['total_ms']:.1f} ms{ended})")
+
+        rows = [
+            {
+                "Section": ("  " * item['depth']) + item['name'],
+                "Start (ms)": item['start_ms'],
+                "Duration (ms)": item['duration_ms']
+            }
+            for item in last['spans']
+        ]
+        if rows:
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+
+        st.download_button(
+            "Export Timings (JSONL)",
+            data=profiler.export_jsonl(),
+            file_name="bda_studio_timings.jsonl",
+            mime="application/jsonl",
+            use_container_width=True
+        )
+
+    if st.button("Profile Next Rerun", use_container_width=True):
+        profiler.request_profile()
+        st.rerun()
+
+    report = profiler.get_profile_report()
+    if report:
+        st.code(report, language="text")
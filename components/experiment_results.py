@@ -1,39 +1,47 @@
 import streamlit as st
-import pandas as pd
-import difflib
-import html
+from utils.sql_diff import get_rendered_diff
+from components.sql_diff_viewer import render_structural_diff
+from utils.error_taxonomy import CATEGORY_LABELS, get_analysis
+from utils.experiment_summary import get_summary
+from utils.profiler import timed
 
+@timed()
 def render_experiment_results(experiment):
     """Render the experiment results component"""
     if not experiment:
         st.warning("No experiment selected")
         return
     
+    import pandas as pd
+
     st.subheader("Experiment Results")
     
-    # Display experiment metadata
+    # Display experiment metadata, summarized once when the experiment finished
+    summary = get_summary(experiment)
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric(
             "Accuracy", 
-            f"{experiment['results']['accuracy'] * 100:.1f}%",
+            f"{summary['accuracy'] * 100:.1f}%",
             help="Percentage of test queries correctly translated to SQL"
         )
     with col2:
-        correct_count = sum(1 for r in experiment['results']['test_results'] if r['is_correct'])
-        total_count = len(experiment['results']['test_results'])
         st.metric(
             "Correct Queries", 
-            f"{correct_count}/{total_count}",
+            f"{summary['correct']}/{summary['total']}",
             help="Number of correctly translated queries out of total test queries"
         )
     with col3:
         st.metric(
             "Test Set Size", 
-            len(experiment['results']['test_results']),
+            summary['total'],
             help="Total number of test queries"
         )
     
+    # Failure taxonomy computed once when the experiment finished
+    st.markdown("### Failure Analysis")
+    render_failure_summary(experiment)
+    
     # Display test results table
     st.markdown("### Test Query Results")
     
@@ -84,27 +92,54 @@ def render_experiment_results(experiment):
         if not selected_result['is_correct']:
             st.markdown("### Differences")
             
-            # Generate HTML diff
-            diff = difflib.ndiff(
-                selected_result['expected_sql'].splitlines(), 
-                selected_result['generated_sql'].splitlines()
+            # Clause-level differences first, they pinpoint the changed predicate
+            render_structural_diff(
+                selected_result['expected_sql'],
+                selected_result['generated_sql']
             )
             
-            # Format diff output for display
-            diff_lines = []
-            for line in diff:
-                if line.startswith('+ '):
-                    diff_lines.append(f"<span style='color:green'>**{html.escape(line)}**</span>")
-                elif line.startswith('- '):
-                    diff_lines.append(f"<span style='color:red'>**{html.escape(line)}**</span>")
-                elif line.startswith('? '):
-                    # Skip the "?" lines that indicate where changes are
-                    continue
-                else:
-                    diff_lines.append(html.escape(line))
-            
-            # Display diff
-            st.markdown("<pre>" + "<br>".join(diff_lines) + "</pre>", unsafe_allow_html=True)
+            # Display the memoized line diff
+            st.markdown(get_rendered_diff(
+                selected_result['expected_sql'],
+                selected_result['generated_sql']
+            )["line_html"], unsafe_allow_html=True)
             
             # Provide a hint
-            st.info("Hint: Look for differences in the query structure, particularly added or removed terms.")
\ No newline at end of file
+            st.info("Hint: Look for differences in the query structure, particularly added or removed terms.")
+
+@timed()
+def render_failure_summary(experiment):
+    """Render the precomputed error taxonomy and failure clusters of an experiment"""
+    analysis = get_analysis(experiment)
+    
+    if not analysis['failed_count']:
+        st.success("No failed test queries.")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Failures by Category**")
+        st.dataframe(
+            [
+                {"Category": CATEGORY_LABELS[name], "Count": count}
+                for name, count in analysis['category_counts'].items()
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    with col2:
+        st.markdown(f"**Failure Clusters** ({len(analysis['clusters'])} clusters, {analysis['failed_count']} failures)")
+        test_results = experiment['results']['test_results']
+        st.dataframe(
+            [
+                {
+                    "Categories": ", ".join(CATEGORY_LABELS[name] for name in cluster['categories']),
+                    "Count": cluster['count'],
+                    "Example": test_results[cluster['example_indices'][0]]['nl']
+                }
+                for cluster in analysis['clusters']
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
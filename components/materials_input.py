@@ -1,8 +1,11 @@
 import streamlit as st
-import pandas as pd
+from utils.profiler import timed
 
+@timed()
 def render_materials_input():
     """Render the materials input component"""
+    import pandas as pd
+
     st.subheader("Input Materials")
     
     # Training set
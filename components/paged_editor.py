@@ -0,0 +1,229 @@
+import streamlit as st
+from utils.profiler import timed
+
+# Rows sent to the frontend per page
+PAGE_SIZE = 50
+
+PAIR_COLUMN_CONFIG = {
+    "natural_language": st.column_config.TextColumn("Natural Language Query", width="large", required=True),
+    "sql": st.column_config.TextColumn("SQL Query", width="large", required=True)
+}
+
+def _patch_key(key):
+    return f"{key}_patch"
+
+def empty_patch():
+    """Return a patch with no edits"""
+    return {"edits": {}, "deleted": set(), "added": {}}
+
+def get_patch(key):
+    """Return the sparse patch of an editor, creating it if needed"""
+    if _patch_key(key) not in st.session_state:
+        st.session_state[_patch_key(key)] = empty_patch()
+    return st.session_state[_patch_key(key)]
+
+def reset_editor(key):
+    """Drop the pending edits of an editor"""
+    st.session_state[_patch_key(key)] = empty_patch()
+    st.session_state[f"{key}_editor_version"] = st.session_state.get(f"{key}_editor_version", 0) + 1
+
+def patch_size(patch):
+    """Number of rows touched by a patch"""
+    return len(patch["edits"]) + len(patch["deleted"]) + len(patch["added"])
+
+def apply_patch(base_df, patch):
+    """
+    Apply a sparse patch to the stored frame
+
+    Args:
+        base_df (pd.DataFrame): Stored frame with natural_language and sql columns
+        patch (dict): edits (label -> {column: value}), deleted labels and
+            added rows (label -> row dict)
+
+    Returns:
+        pd.DataFrame: Patched frame with a fresh RangeIndex
+    """
+    import pandas as pd
+
+    frame = base_df.reset_index(drop=True)
+    if patch["edits"]:
+        frame = frame.copy()
+        for label, values in patch["edits"].items():
+            for column, value in values.items():
+                frame.at[label, column] = value
+    if patch["deleted"]:
+        frame = frame.drop(index=list(patch["deleted"]))
+    if patch["added"]:
+        added = pd.DataFrame.from_records(list(patch["added"].values()), columns=list(base_df.columns))
+        frame = pd.concat([frame, added], ignore_index=True)
+    return frame.reset_index(drop=True)
+
+def _working_labels(base_df, patch):
+    """Return the row labels of the patched frame, added rows last"""
+    labels = [label for label in range(len(base_df)) if label not in patch["deleted"]]
+    return labels + list(patch["added"])
+
+def _row(base_df, patch, label):
+    """Return one patched row as a dict"""
+    if label in patch["added"]:
+        return dict(patch["added"][label])
+    row = {column: base_df.iat[label, position] for position, column in enumerate(base_df.columns)}
+    row.update(patch["edits"].get(label, {}))
+    return row
+
+def search_labels(base_df, patch, query):
+    """
+    Return the labels of patched rows whose NL or SQL contains query
+
+    The stored frame is searched in one vectorized pass; only rows touched
+    by the patch are checked individually.
+    """
+    if not query:
+        return _working_labels(base_df, patch)
+
+    needle = query.lower()
+    frame = base_df.reset_index(drop=True)
+    mask = frame["natural_language"].fillna("").astype(str).str.lower().str.contains(needle, regex=False)
+    mask |= frame["sql"].fillna("").astype(str).str.lower().str.contains(needle, regex=False)
+
+    def matches(row):
+        return any(needle in str(row.get(column) or "").lower() for column in ("natural_language", "sql"))
+
+    for label in patch["edits"]:
+        mask.iat[label] = matches(_row(base_df, patch, label))
+    labels = [label for label in mask.index[mask.to_numpy()] if label not in patch["deleted"]]
+    return labels + [label for label, row in patch["added"].items() if matches(row)]
+
+def _fold_edits(key, editor_key, page_labels):
+    """Merge the data_editor deltas of the current page into the patch"""
+    state = st.session_state.get(editor_key)
+    if not state:
+        return
+    base_size = st.session_state[f"{key}_base_size"]
+    patch = get_patch(key)
+
+    for position, values in state.get("edited_rows", {}).items():
+        label = page_labels[int(position)]
+        if label in patch["added"]:
+            patch["added"][label].update(values)
+        else:
+            patch["edits"].setdefault(label, {}).update(values)
+
+    for position in state.get("deleted_rows", []):
+        label = page_labels[int(position)]
+        if label in patch["added"]:
+            del patch["added"][label]
+        else:
+            patch["edits"].pop(label, None)
+            patch["deleted"].add(label)
+
+    next_label = max([base_size - 1] + list(patch["added"])) + 1
+    for values in state.get("added_rows", []):
+        patch["added"][next_label] = {"natural_language": "", "sql": "", **values}
+        next_label += 1
+
+    # A fresh widget key makes the editor start from the patched page
+    st.session_state[f"{key}_editor_version"] = st.session_state.get(f"{key}_editor_version", 0) + 1
+
+def _page_controls(key, total_rows, page_size):
+    """Render search and page inputs, returning (query, first row, last row)"""
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        query = st.text_input("Search NL and SQL", key=f"{key}_search")
+    # Go back to the first page when the search changes
+    if st.session_state.get(f"{key}_last_search") != query:
+        st.session_state[f"{key}_last_search"] = query
+        st.session_state[f"{key}_page"] = 1
+
+    pages = max((total_rows + page_size - 1) // page_size, 1)
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    with col2:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    start = (page - 1) * page_size
+    return query, start, min(start + page_size, total_rows)
+
+@timed()
+def render_paged_editor(key, base_df, page_size=PAGE_SIZE, column_config=None):
+    """
+    Render an editor that only sends one page of rows to the frontend
+
+    Edits are kept as a sparse patch against base_df in session state; use
+    get_patch and apply_patch to build the edited frame on save.
+
+    Args:
+        key (str): Unique editor key
+        base_df (pd.DataFrame): Stored frame with natural_language and sql columns
+        page_size (int): Rows per page
+        column_config (dict): Column configuration for st.data_editor
+
+    Returns:
+        dict: The current patch
+    """
+    import pandas as pd
+
+    patch = get_patch(key)
+    st.session_state[f"{key}_base_size"] = len(base_df)
+
+    total = len(base_df) - len(patch["deleted"]) + len(patch["added"])
+    query = st.session_state.get(f"{key}_search", "")
+    labels = search_labels(base_df, patch, query)
+    query, start, end = _page_controls(key, len(labels), page_size)
+    page_labels = labels[start:end]
+
+    page_df = pd.DataFrame.from_records(
+        [_row(base_df, patch, label) for label in page_labels],
+        columns=list(base_df.columns)
+    )
+    editor_key = f"{key}_editor_{st.session_state.get(f'{key}_editor_version', 0)}"
+    st.data_editor(
+        page_df,
+        column_config=column_config or PAIR_COLUMN_CONFIG,
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        key=editor_key,
+        on_change=_fold_edits,
+        args=(key, editor_key, page_labels)
+    )
+
+    shown = f"{len(labels):,} matching rows" if query else f"{total:,} rows"
+    st.caption(f"{shown}, showing {start + 1 if page_labels else 0}-{start + len(page_labels)}. "
+               f"Pending changes: {patch_size(patch):,} rows")
+    return patch
+
+@timed()
+def render_paged_view(key, data, page_size=PAGE_SIZE):
+    """
+    Render a read-only, searchable page of pairs
+
+    Args:
+        key (str): Unique view key
+        data: DataFrame with natural_language and sql columns, or stored
+            {"nl", "sql"} records
+        page_size (int): Rows per page
+    """
+    import pandas as pd
+
+    if isinstance(data, pd.DataFrame):
+        frame = data.reset_index(drop=True)
+        query = st.session_state.get(f"{key}_search", "")
+        if query:
+            needle = query.lower()
+            mask = frame["natural_language"].astype(str).str.lower().str.contains(needle, regex=False)
+            mask |= frame["sql"].astype(str).str.lower().str.contains(needle, regex=False)
+            frame = frame[mask]
+        query, start, end = _page_controls(key, len(frame), page_size)
+        page_df = frame.iloc[start:end]
+    else:
+        records = data
+        query = st.session_state.get(f"{key}_search", "")
+        if query:
+            needle = query.lower()
+            records = [r for r in records if needle in r["nl"].lower() or needle in r["sql"].lower()]
+        query, start, end = _page_controls(key, len(records), page_size)
+        page_df = pd.DataFrame.from_records(records[start:end], columns=["nl", "sql"]).rename(
+            columns={"nl": "natural_language"}
+        )
+
+    st.dataframe(page_df, use_container_width=True, hide_index=True)
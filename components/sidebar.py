@@ -1,6 +1,10 @@
 import streamlit as st
 import uuid
+from components.debug_panel import render_debug_panel
+from utils.profiler import timed
+import utils.workspace_counters as workspace_counters
 
+@timed()
 def render_sidebar():
     with st.sidebar:
         st.title("BDA Studio")
@@ -26,6 +30,7 @@ def render_sidebar():
                         "created_by": st.session_state.user["email"]
                     }
                     st.session_state.workspaces.append(new_workspace)
+                    workspace_counters.record_workspace(new_workspace)
                     st.session_state.current_workspace = new_workspace
                     st.success(f"Workspace '{workspace_name}' created!")
                     st.rerun()
@@ -100,4 +105,7 @@ def render_sidebar():
             
         if st.button("🚪 Logout", use_container_width=True):
             # This would normally clear session and redirect to login
-            st.info("Logout functionality would go here")
\ No newline at end of file
+            st.info("Logout functionality would go here")
+
+        # Opt-in profiling panel
+        render_debug_panel()
\ No newline at end of file
@@ -1,30 +1,12 @@
 import streamlit as st
 from components.sidebar import render_sidebar
-import utils.session_state as ss
+import utils.profiler as profiler
+from utils.page_setup import setup_page
+import utils.workspace_counters as workspace_counters
 
 
-# Page configuration
-st.set_page_config(
-    page_title="BDA Studio",
-    page_icon="🔎",
-    layout="wide",
-    initial_sidebar_state="expanded",
-)
-
-# 네비게이션 메뉴 숨기기
-hide_streamlit_style = """
-<style>
-#MainMenu {visibility: hidden;}
-div[data-testid="stSidebarNav"] {display: none;}
-</style>
-"""
-st.markdown(hide_streamlit_style, unsafe_allow_html=True)
-
-
-ss.initialize_session_state()
-
-# Add some demo data for testing
-ss.add_demo_data()
+# Initialize page
+setup_page("BDA Studio", "🔎", "home")
 
 # Main app
 def main():
@@ -68,18 +50,13 @@ def main():
         # Workspace dashboard
         col1, col2, col3 = st.columns(3)
         
-        # Count experiments in this workspace
-        workspace_experiments = [e for e in st.session_state.experiments 
-                              if e['workspace_id'] == st.session_state.current_workspace['id']]
-        
-        # Count assistants in this workspace
-        workspace_assistants = [a for a in st.session_state.assistants 
-                             if a['workspace_id'] == st.session_state.current_workspace['id']]
+        # Counters are kept up to date on every create and delete
+        counts = workspace_counters.get_counts(st.session_state.current_workspace['id'])
         
         with col1:
-            st.metric(label="Experiments", value=len(workspace_experiments))
+            st.metric(label="Experiments", value=counts['experiments'])
         with col2:
-            st.metric(label="Assistants", value=len(workspace_assistants))
+            st.metric(label="Assistants", value=counts['assistants'])
         with col3:
             # Just a placeholder metric
             st.metric(label="Success Rate", value="85%")
@@ -95,4 +72,5 @@ def main():
                 st.switch_page("pages/03_assistant.py")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    profiler.end_rerun()
\ No newline at end of file
@@ -1,26 +1,13 @@
 import streamlit as st
-import pandas as pd
 import uuid
 import datetime
 from components.sidebar import render_sidebar
+import utils.profiler as profiler
+from utils.page_setup import setup_page
+import utils.workspace_counters as workspace_counters
 
-#Initialize page
-st.set_page_config(
-    page_title="BDA Studio - Workspaces",
-    page_icon="🏢",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-
-# 네비게이션 메뉴 숨기기
-hide_streamlit_style = """
-<style>
-#MainMenu {visibility: hidden;}
-div[data-testid="stSidebarNav"] {display: none;}
-</style>
-"""
-st.markdown(hide_streamlit_style, unsafe_allow_html=True)
+# Initialize page
+setup_page("BDA Studio - Workspaces", "🏢", "workspace")
 
 # Render sidebar
 render_sidebar()
@@ -53,15 +40,16 @@ with tab_list:
                 st.write(f"Created: {workspace.get('created_at', 'N/A')}")
                 st.write(workspace.get("description", "No description"))
                 
-                # Count items in this workspace
-                experiments_count = len([e for e in st.session_state.get('experiments', []) 
-                                    if e['workspace_id'] == workspace['id']])
-                assistants_count = len([a for a in st.session_state.get('assistants', []) 
-                                if a['workspace_id'] == workspace['id']])
+                # Counters are kept up to date on every create and delete
+                counts = workspace_counters.get_counts(workspace['id'])
                 
-                col1, col2 = st.columns(2)
-                col1.metric("Experiments", experiments_count)
-                col2.metric("Assistants", assistants_count)
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Experiments", counts['experiments'])
+                col2.metric("Assistants", counts['assistants'])
+                col3.metric("Materials", counts['materials'])
+                col4.metric("Datasets", counts['datasets'])
+                if counts['last_activity']:
+                    st.caption(f"Last activity: {counts['last_activity']}")
                 
                 # Action buttons
                 if st.button("Select Workspace", key=f"select_{workspace['id']}"):
@@ -79,6 +67,7 @@ with tab_list:
                                 # Remove workspace from session state
                                 st.session_state.workspaces = [w for w in st.session_state.workspaces 
                                                         if w['id'] != workspace['id']]
+                                workspace_counters.forget_workspace(workspace['id'])
                                 
                                 # If this was the current workspace, reset current_workspace
                                 if (st.session_state.get('current_workspace') and 
@@ -124,6 +113,7 @@ with tab_create:
             
             # Add to session state
             st.session_state.workspaces.append(new_workspace)
+            workspace_counters.record_workspace(new_workspace)
             
             # Set as current workspace
             st.session_state.current_workspace = new_workspace
@@ -151,4 +141,6 @@ if st.session_state.get('current_workspace'):
         st.sidebar.markdown("### Team Members")
         for member in st.session_state.current_workspace['team_members']:
             if member:  # Only show non-empty members
-                st.sidebar.write(f"- {member}")
\ No newline at end of file
+                st.sidebar.write(f"- {member}")
+
+profiler.end_rerun()
\ No newline at end of file
@@ -1,31 +1,25 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import uuid
+import time
 import datetime
-import json
 from components.sidebar import render_sidebar
-from components.materials_input import render_materials_input
-from components.dataset_selector import render_dataset_selector
-from components.experiment_results import render_experiment_results
+import utils.profiler as profiler
+from utils.page_setup import setup_page
 from utils.sql_validator import validate_sql
+from components.sql_diff_viewer import render_structural_diff
+from components.experiment_results import render_failure_summary
+from utils.error_taxonomy import CATEGORY_LABELS, analyze_experiment
+import utils.experiment_summary as experiment_summary
+import utils.workspace_counters as workspace_counters
+import utils.assistant_pool as assistant_pool
+from utils.material_versions import ensure_version
+from utils.sql_generator import generate_test_results
+from utils.assistant_artifacts import compile_artifact
+from utils.assistant_registry import register
 
 # Initialize page
-st.set_page_config(
-    page_title="BDA Studio - Experiments",
-    page_icon="🧪",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# 네비게이션 메뉴 숨기기
-hide_streamlit_style = """
-<style>
-#MainMenu {visibility: hidden;}
-div[data-testid="stSidebarNav"] {display: none;}
-</style>
-"""
-st.markdown(hide_streamlit_style, unsafe_allow_html=True) 
+setup_page("BDA Studio - Experiments", "🧪", "experiment")
 
 # Render sidebar
 render_sidebar()
@@ -33,7 +27,7 @@ render_sidebar()
 # Check if user has selected a workspace
 if not st.session_state.current_workspace:
     st.warning("Please select or create a workspace first")
-    st.stop()
+    profiler.stop()
 
 # Initialize session state for this page
 if 'experiment_tab' not in st.session_state:
@@ -169,8 +163,8 @@ with tab_create:
         
         # Advanced settings (could be expanded)
         with st.expander("Advanced Settings"):
-            st.slider("Temperature", min_value=0.0, max_value=1.0, value=0.7, step=0.1)
-            st.number_input("Max Tokens", min_value=100, max_value=4000, value=1000, step=100)
+            temperature = st.slider("Temperature", min_value=0.0, max_value=1.0, value=0.7, step=0.1)
+            max_tokens = st.number_input("Max Tokens", min_value=100, max_value=4000, value=1000, step=100)
         
         # Create experiment button
         if st.button("Create and Run Experiment"):
@@ -184,37 +178,33 @@ with tab_create:
                 "dataset": st.session_state.selected_dataset,
                 "material_id": st.session_state.selected_material['id'],
                 "material": st.session_state.selected_material,
+                "material_version": ensure_version(st.session_state.selected_material),
                 "status": "completed",  # For demo purposes, we'll set it as completed
                 "results": {
-                    "accuracy": 0.85,  # Mock results
+                    "accuracy": 0.0,  # Set from the test results when the experiment finishes
                     "test_results": []
                 },
                 "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
             
-            # Generate mock test results
-            for test_item in st.session_state.selected_material['test_set']:
-                # For demo purposes, randomly mark some as correct and some as wrong
-                is_correct = hash(test_item['nl']) % 4 != 0  # 75% correct rate
-                
-                generated_sql = test_item['sql']
-                if not is_correct:
-                    # Slightly modify the SQL to simulate an error
-                    if "WHERE" in generated_sql:
-                        generated_sql = generated_sql.replace("WHERE", "WHERE LOWER(")
-                        if "=" in generated_sql:
-                            parts = generated_sql.split("=", 1)
-                            generated_sql = f"{parts[0]}) ={parts[1]}"
-                
-                new_experiment['results']['test_results'].append({
-                    "nl": test_item['nl'],
-                    "expected_sql": test_item['sql'],
-                    "generated_sql": generated_sql,
-                    "is_correct": is_correct
-                })
+            # Generate SQL for every test item through the shared generator
+            started = time.perf_counter()
+            new_experiment['results']['test_results'] = generate_test_results(
+                st.session_state.selected_material['test_set'],
+                workspace_id=st.session_state.current_workspace['id'],
+                # The artifact a deployment of this experiment would serve, for chat's pruned contexts
+                artifact=assistant_pool.acquire({"dataset": new_experiment['dataset'], "material": new_experiment['material']}),
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            
+            # Classify and cluster failures and summarize the metrics once, when the experiment finishes
+            analyze_experiment(new_experiment)
+            experiment_summary.summarize_experiment(new_experiment, time.perf_counter() - started)
             
             # Add to session state
             st.session_state.experiments.append(new_experiment)
+            workspace_counters.record_created("experiments", new_experiment)
             st.session_state.current_experiment = new_experiment
             
             # Navigate to list tab to see results
@@ -230,59 +220,37 @@ def navigate_to_assistant_page():
 with tab_list:
     st.header("Experiment List")
     
-    # 필터링을 위한 test set 목록 생성
-    all_test_sets = ["All Test Sets"]
-    test_set_dict = {}
-    
-    # 워크스페이스 실험 목록
-    workspace_experiments = [e for e in st.session_state.experiments 
-                          if e['workspace_id'] == st.session_state.current_workspace['id']]
-    
-    # Test Set 목록 생성
-    for e in workspace_experiments:
-        if 'material' in e and 'test_set_name' in e['material']:
-            test_set_name = e['material'].get('test_set_name', 'Unknown')
-            if test_set_name not in all_test_sets:
-                all_test_sets.append(test_set_name)
-                test_set_dict[test_set_name] = []
-            
-            # 해당 Test Set에 실험 추가
-            if test_set_name in test_set_dict:
-                test_set_dict[test_set_name].append(e)
+    workspace_id = st.session_state.current_workspace['id']
     
     # Test set 선택 필터 추가
+    all_test_sets = ["All Test Sets"] + experiment_summary.test_set_names(workspace_id)
     selected_test_set = st.selectbox("Filter by Test Set", all_test_sets)
     
-    # 선택된 test set에 따라 필터링
-    if selected_test_set != "All Test Sets":
-        filtered_experiments = [e for e in workspace_experiments 
-                             if e.get('material', {}).get('test_set_name', '') == selected_test_set]
-    else:
-        filtered_experiments = workspace_experiments
+    # 선택된 test set에 따라 필터링 (precomputed summary rows, no per-experiment work)
+    summary_df = experiment_summary.workspace_summaries(
+        workspace_id,
+        None if selected_test_set == "All Test Sets" else selected_test_set
+    )
     
-    if not filtered_experiments:
+    if summary_df.empty:
         st.info("No experiments created yet in this workspace. Create one in the 'Create' tab.")
     else:
         # Create a dataframe for experiments
-        exp_data = []
-        for exp in filtered_experiments:
-            # material 정보에 train_set_name과 test_set_name 포함
-            train_set_name = exp['material'].get('train_set_name', 'Unknown')
-            test_set_name = exp['material'].get('test_set_name', 'Unknown')
-            
-            exp_data.append({
-                "ID": exp['id'],
-                "Name": exp['name'],
-                "Dataset": f"{exp['dataset']['project']}.{exp['dataset']['dataset']}",
-                "Material": exp['material']['name'],
-                "Train Set": train_set_name,  # 새로 추가
-                "Test Set": test_set_name,    # 새로 추가
-                "Accuracy": f"{exp['results']['accuracy'] * 100:.1f}%",
-                "Created": exp['created_at'],
-                "Status": exp['status']
+        with profiler.span("experiment_list_dataframe"):
+            exp_df = pd.DataFrame({
+                "ID": summary_df["id"],
+                "Name": summary_df["name"],
+                "Dataset": summary_df["dataset"],
+                "Material": summary_df["material"],
+                "Train Set": summary_df["train_set"],  # 새로 추가
+                "Test Set": summary_df["test_set"].replace("", "Unknown"),  # 새로 추가
+                "Accuracy": summary_df["accuracy"] * 100,
+                "Correct": summary_df["correct"].astype(int).astype(str) + "/" + summary_df["total"].astype(int).astype(str),
+                "Duration (s)": summary_df["duration_s"].round(2),
+                "Tokens": summary_df["tokens"].astype(int),
+                "Created": summary_df["created_at"],
+                "Status": summary_df["status"]
             })
-        
-        exp_df = pd.DataFrame(exp_data)
         st.dataframe(
             exp_df,
             column_config={
@@ -299,7 +267,11 @@ with tab_list:
                     "Accuracy",
                     min_value=0,
                     max_value=100,
-                    format="%f%%",
+                    format="%.1f%%",
+                ),
+                "Tokens": st.column_config.NumberColumn(
+                    "Tokens",
+                    help="Estimated prompt and completion tokens of the run"
                 ),
             },
             use_container_width=True,
@@ -307,52 +279,43 @@ with tab_list:
         )
         
         # 동일 Test Set에 대한 정확도 비교 그래프
-        if filtered_experiments and selected_test_set != "All Test Sets":
+        if selected_test_set != "All Test Sets":
             st.subheader(f"Accuracy Comparison for Test Set: {selected_test_set}")
             
-            # 그래프 데이터 준비
-            chart_data = []
-            for exp in filtered_experiments:
-                # 날짜 파싱
-                created_at = datetime.datetime.strptime(exp['created_at'], "%Y-%m-%d %H:%M:%S")
-                
-                chart_data.append({
-                    "experiment": exp['name'],
-                    "accuracy": exp['results']['accuracy'] * 100,  # 백분율로 변환
-                    "date": created_at
-                })
-            
-            # 날짜순으로 정렬
-            chart_data = sorted(chart_data, key=lambda x: x['date'])
-            
-            # 데이터프레임 생성
-            chart_df = pd.DataFrame(chart_data)
+            # 날짜순으로 정렬 (created_ts was parsed once when each experiment finished)
+            chart_df = pd.DataFrame({
+                "experiment": summary_df["name"],
+                "accuracy": summary_df["accuracy"] * 100,  # 백분율로 변환
+                "date": summary_df["created_ts"]
+            }).sort_values("date", kind="stable")
             
             # line plot 생성
             if not chart_df.empty:
-                fig = px.line(
-                    chart_df, 
-                    x="experiment", 
-                    y="accuracy", 
-                    markers=True,
-                    title=f"Accuracy Trend for Test Set: {selected_test_set}",
-                    labels={"experiment": "Experiment", "accuracy": "Accuracy (%)"}
-                )
-                fig.update_layout(yaxis_range=[0, 100])
-                st.plotly_chart(fig, use_container_width=True)
+                with profiler.span("accuracy_chart"):
+                    # plotly is only loaded when a chart is actually drawn
+                    import plotly.express as px
+
+                    fig = px.line(
+                        chart_df, 
+                        x="experiment", 
+                        y="accuracy", 
+                        markers=True,
+                        title=f"Accuracy Trend for Test Set: {selected_test_set}",
+                        labels={"experiment": "Experiment", "accuracy": "Accuracy (%)"}
+                    )
+                    fig.update_layout(yaxis_range=[0, 100])
+                    st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("Not enough data to generate the chart.")
         
         # View details of selected experiment
         selected_exp_name = st.selectbox("Select experiment for details", 
-                                      ["Select an experiment"] + [exp["name"] for exp in filtered_experiments])
+                                      ["Select an experiment"] + summary_df["name"].tolist())
         
         if selected_exp_name != "Select an experiment":
             # Find the selected experiment
-            for exp in filtered_experiments:
-                if exp["name"] == selected_exp_name:
-                    selected_exp = exp
-                    break
+            selected_id = summary_df["id"][summary_df["name"] == selected_exp_name].iloc[0]
+            selected_exp = next(e for e in st.session_state.experiments if e['id'] == selected_id)
             
             # Display experiment details
             st.subheader(f"Experiment: {selected_exp['name']}")
@@ -366,6 +329,8 @@ with tab_list:
                 st.markdown(f"**Material:** {selected_exp['material']['name']}")
                 train_set_name = selected_exp['material'].get('train_set_name', 'Unknown')
                 st.markdown(f"**Train Set:** {train_set_name}")
+                if selected_exp.get('material_version'):
+                    st.markdown(f"**Material Version:** `{selected_exp['material_version'][:12]}`")
             with col3:
                 st.markdown(f"**Status:** {selected_exp['status']}")
                 test_set_name = selected_exp['material'].get('test_set_name', 'Unknown')
@@ -378,34 +343,41 @@ with tab_list:
             
             # Experiment results summary
             st.subheader("Results Summary")
-            col1, col2, col3 = st.columns(3)
+            summary = experiment_summary.get_summary(selected_exp)
+            col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("Accuracy", f"{selected_exp['results']['accuracy'] * 100:.1f}%")
+                st.metric("Accuracy", f"{summary['accuracy'] * 100:.1f}%")
             
             with col2:
-                correct_count = sum(1 for r in selected_exp['results']['test_results'] if r['is_correct'])
-                total_count = len(selected_exp['results']['test_results'])
-                st.metric("Correct Queries", f"{correct_count}/{total_count}")
+                st.metric("Correct Queries", f"{summary['correct']}/{summary['total']}")
             
             with col3:
-                error_rate = (total_count - correct_count) / total_count * 100 if total_count > 0 else 0
-                st.metric("Error Rate", f"{error_rate:.1f}%")
+                st.metric("Error Rate", f"{summary['error_rate'] * 100:.1f}%")
+            
+            with col4:
+                st.metric("Duration", f"{summary['duration_s']:.2f}s", help=f"About {summary['tokens']} tokens")
+            
+            # Failure taxonomy and clusters
+            st.subheader("Failure Analysis")
+            render_failure_summary(selected_exp)
             
             # Test results tab
             st.subheader("Test Results")
             
             # Create dataframe for test results
-            test_results = []
-            for idx, res in enumerate(selected_exp['results']['test_results']):
-                test_results.append({
-                    "idx": idx,
-                    "Query": res['nl'],
-                    "Generated SQL": res['generated_sql'][:50] + "...",
-                    "Correct": "✅" if res['is_correct'] else "❌"
-                })
+            with profiler.span("test_results_dataframe"):
+                test_results = []
+                for idx, res in enumerate(selected_exp['results']['test_results']):
+                    test_results.append({
+                        "idx": idx,
+                        "Query": res['nl'],
+                        "Generated SQL": res['generated_sql'][:50] + "...",
+                        "Correct": "✅" if res['is_correct'] else "❌",
+                        "Error Category": ", ".join(CATEGORY_LABELS[c] for c in res.get('error_categories', []))
+                    })
             
-            test_df = pd.DataFrame(test_results)
+                test_df = pd.DataFrame(test_results)
             # Display test results table without selection feature
             st.dataframe(
                 test_df,
@@ -413,7 +385,8 @@ with tab_list:
                     "idx": None,  # Hide index column
                     "Query": st.column_config.TextColumn("Natural Language Query"),
                     "Generated SQL": st.column_config.TextColumn("Generated SQL"),
-                    "Correct": "Status"
+                    "Correct": "Status",
+                    "Error Category": st.column_config.TextColumn("Error Category")
                 },
                 use_container_width=True,
                 hide_index=True
@@ -440,26 +413,22 @@ with tab_list:
                 with col2:
                     st.markdown("**Generated SQL**")
                     st.code(result['generated_sql'], language="sql")
+                    if result.get('error'):
+                        st.caption(f"Generation failed: {result['error']}")
                 
                 # For demo, we'll just highlight some differences manually
-                if not result['is_correct']:
-                    st.error("Differences detected!")
+                with profiler.span("sql_differences"):
+                    if not result['is_correct']:
+                        st.error("Differences detected!")
                     
-                    # 차이점 강조 표시
-                    st.subheader("SQL Differences")
+                        # 차이점 강조 표시
+                        st.subheader("SQL Differences")
                     
-                    # 간단한 차이점 표시 - WHERE 절 변경을 찾아서 표시
-                    if "WHERE" in result['expected_sql'] and "WHERE" in result['generated_sql']:
-                        expected_where = result['expected_sql'].split("WHERE")[1].strip().split()[0]
-                        generated_where = result['generated_sql'].split("WHERE")[1].strip().split()[0]
+                        # 절(clause) 단위 구조 비교
+                        render_structural_diff(result['expected_sql'], result['generated_sql'])
                         
-                        if expected_where != generated_where:
-                            st.markdown(f"**WHERE clause modified:**")
-                            st.markdown(f"- Expected: `WHERE {expected_where}`")
-                            st.markdown(f"- Generated: `WHERE {generated_where}`")
-                    
-                    # 일반적인 힌트 제공
-                    st.info("Hint: Check the WHERE clause conditions, function calls, and column references.")
+                        # 일반적인 힌트 제공
+                        st.info("Hint: Check the clauses listed above, particularly predicates, function calls, and column references.")
             
             # Action buttons
             col1, col2 = st.columns(2)
@@ -474,17 +443,23 @@ with tab_list:
                         "experiment_id": selected_exp['id'],
                         "dataset": selected_exp['dataset'],
                         "material": selected_exp['material'],
-                        "version": 1,
                         "status": "active",
                         "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     }
                     
+                    # Redeploying the same experiment creates the next version of its lineage
+                    register(new_assistant)
+                    
+                    # Compile the prompt context and example index once, at deploy time
+                    compile_artifact(new_assistant)
+                    
                     # Add to session state
                     st.session_state.assistants.append(new_assistant)
+                    workspace_counters.record_created("assistants", new_assistant)
                     st.session_state.current_assistant = new_assistant
-                    st.session_state.current_assistant_version = 1
+                    st.session_state.current_assistant_version = new_assistant['version']
                     
-                    st.success(f"Assistant created from experiment '{selected_exp['name']}'!")
+                    st.success(f"Assistant v{new_assistant['version']} created from experiment '{selected_exp['name']}'!")
                     
                     # 버튼 클릭 핸들러 설정
                     if st.button("Go to Assistants Page", on_click=navigate_to_assistant_page):
@@ -502,4 +477,6 @@ with tab_list:
 # 페이지 전환 확인 (코드 끝부분에 추가)
 if st.session_state.navigate_to_assistant:
     st.session_state.navigate_to_assistant = False  # 상태 재설정
-    st.switch_page("pages/03_assistant.py")
\ No newline at end of file
+    st.switch_page("pages/03_assistant.py")
+
+profiler.end_rerun()
\ No newline at end of file
@@ -1,26 +1,13 @@
 import streamlit as st
-import pandas as pd
-import uuid
-import datetime
 from components.sidebar import render_sidebar
+import utils.profiler as profiler
+from utils.page_setup import setup_page
+import utils.assistant_pool as assistant_pool
+import utils.assistant_registry as assistant_registry
+import utils.assistant_router as assistant_router
 
 # Initialize page
-st.set_page_config(
-    page_title="BDA Studio - Assistants",
-    page_icon="🤖",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-
-# 네비게이션 메뉴 숨기기
-hide_streamlit_style = """
-<style>
-#MainMenu {visibility: hidden;}
-div[data-testid="stSidebarNav"] {display: none;}
-</style>
-"""
-st.markdown(hide_streamlit_style, unsafe_allow_html=True)
+setup_page("BDA Studio - Assistants", "🤖", "assistant")
 
 # Render sidebar
 render_sidebar()
@@ -28,7 +15,7 @@ render_sidebar()
 # Check if user has selected a workspace
 if not st.session_state.current_workspace:
     st.warning("Please select or create a workspace first")
-    st.stop()
+    profiler.stop()
 
 # Initialize session state for this page
 if 'assistant_tab' not in st.session_state:
@@ -38,72 +25,140 @@ if 'current_assistant' not in st.session_state:
 if 'current_assistant_version' not in st.session_state:
     st.session_state.current_assistant_version = None
 
+def render_traffic_split(lineage, versions):
+    """Render the routing controls and per-version metrics of a lineage"""
+    lineage_id = lineage['lineage_id']
+    route = assistant_router.get_route(lineage_id)
+    
+    with st.expander("Traffic Split" + (f" ({route['status']})" if route else "")):
+        if route:
+            split = ", ".join(f"v{v}: {w}%" for v, w in sorted(route['weights'].items()))
+            st.write(f"Baseline v{route['baseline']}, canary v{route['canary']} — {split}")
+            for event in reversed(route['events']):
+                st.caption(event)
+            if st.button("Stop Routing", key=f"stop_route_{lineage_id}"):
+                assistant_router.clear_route(lineage_id)
+                st.rerun()
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                baseline = st.selectbox("Baseline", versions, index=min(1, len(versions) - 1), key=f"route_baseline_{lineage_id}")
+            with col2:
+                canary = st.selectbox("Canary", versions, index=0, key=f"route_canary_{lineage_id}")
+            weight = st.slider("Canary traffic (%)", 0, 100, 10, step=5, key=f"route_weight_{lineage_id}")
+            auto = st.checkbox("Promote or roll back automatically", value=True, key=f"route_auto_{lineage_id}")
+            if st.button("Start Routing", key=f"start_route_{lineage_id}"):
+                try:
+                    assistant_router.set_route(
+                        lineage_id, int(baseline.replace('v', '')), int(canary.replace('v', '')), weight, auto
+                    )
+                    st.rerun()
+                except ValueError as e:
+                    st.error(str(e))
+        
+        # Metrics collected from chat traffic
+        rows = []
+        for label in versions:
+            summary = assistant_router.get_summary(lineage_id, int(label.replace('v', '')))
+            if summary:
+                rows.append({
+                    "Version": label,
+                    "Requests": summary['requests'],
+                    "p50 (ms)": round(summary['p50_ms'], 1),
+                    "p95 (ms)": round(summary['p95_ms'], 1),
+                    "Cache Hit Rate": f"{summary['cache_hit_rate']:.0%}",
+                    "Valid SQL": f"{summary['validity_rate']:.0%}"
+                })
+        if rows:
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+        else:
+            st.caption("No chat traffic recorded yet.")
+
 # Main assistants page
 st.title("Assistants")
 
-# Filter assistants for current workspace
-workspace_assistants = [a for a in st.session_state.assistants 
-                      if a['workspace_id'] == st.session_state.current_workspace['id']]
+# One page of lineages for the current workspace, straight from the registry index
+workspace_id = st.session_state.current_workspace['id']
+total_lineages = assistant_registry.count_lineages(workspace_id)
+pages = max((total_lineages + assistant_registry.CARDS_PER_PAGE - 1) // assistant_registry.CARDS_PER_PAGE, 1)
+if st.session_state.get('assistant_page', 1) > pages:
+    st.session_state.assistant_page = pages
+page = st.session_state.get('assistant_page', 1)
+lineages, _ = assistant_registry.list_lineages(workspace_id, (page - 1) * assistant_registry.CARDS_PER_PAGE)
 
-if not workspace_assistants:
+if not total_lineages:
     st.info("No assistants created yet in this workspace. Create an experiment and deploy it as an assistant.")
     
     # Quick link to create experiment
     if st.button("Create an Experiment"):
         st.switch_page("pages/02_experiment.py")
 else:
-    # Group assistants by name to track versions
-    assistant_groups = {}
-    for assist in workspace_assistants:
-        name = assist['name']
-        if name not in assistant_groups:
-            assistant_groups[name] = []
-        assistant_groups[name].append(assist)
-    
-    # Sort each group by version
-    for name, group in assistant_groups.items():
-        assistant_groups[name] = sorted(group, key=lambda x: x.get('version', 1))
+    # Start warming recently used assistants before the cards render
+    assistant_pool.preload(assistant_pool.get_recent())
     
-    # Create columns for assistant cards
+    if pages > 1:
+        st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key="assistant_page")
     
     # Display assistant cards
-    for idx, (name, assistants) in enumerate(assistant_groups.items()):
-        latest = assistants[-1]  # Get the latest version
+    for lineage in lineages:
+        latest = lineage['versions'][lineage['latest']]
+        active = assistant_registry.get_active(lineage['lineage_id'])
         
         with st.container(border=True):
-            st.subheader(name)
-            st.write(f"Version: {latest.get('version', 1)}")
+            st.subheader(lineage['name'])
+            pinned = " (pinned)" if lineage['active'] else ""
+            st.write(f"Latest version: {lineage['latest']} · Active version: {active['version']}{pinned}")
             st.write(f"Created: {latest['created_at']}")
             st.write(f"Dataset: {latest['dataset']['project']}.{latest['dataset']['dataset']}")
             
-            # Version selector for this assistant
-            versions = [f"v{a.get('version', 1)}" for a in assistants]
+            # Version selector for this assistant, defaulting to the active version
+            versions = [f"v{v}" for v in sorted(lineage['versions'], reverse=True)]
             selected_version = st.selectbox(
                 "Select version", 
                 versions, 
-                index=len(versions)-1,
-                key=f"version_select_{latest['id']}"
+                index=versions.index(f"v{active['version']}"),
+                key=f"version_select_{lineage['lineage_id']}"
             )
             
             # Extract the version number from the string
             selected_v_num = int(selected_version.replace('v', ''))
+            selected_assistant = assistant_registry.get_version(lineage['lineage_id'], selected_v_num)
             
-            # Find the assistant with this version
-            selected_assistant = next(a for a in assistants if a.get('version', 1) == selected_v_num)
+            # Visible assistants are preloaded so Chat opens a warm one
+            assistant_pool.preload([selected_assistant])
             
-            # Chat button
-            if st.button("Chat with Assistant", key=f"chat_{latest['id']}"):
-                st.session_state.current_assistant = selected_assistant
-                st.session_state.current_assistant_version = selected_v_num
-                st.switch_page("pages/04_chat.py")
+            col1, col2 = st.columns(2)
+            with col1:
+                # Chat button
+                if st.button("Chat with Assistant", key=f"chat_{lineage['lineage_id']}", use_container_width=True):
+                    st.session_state.current_assistant = selected_assistant
+                    st.session_state.current_assistant_version = selected_v_num
+                    assistant_pool.remember(selected_assistant)
+                    st.switch_page("pages/04_chat.py")
+            with col2:
+                if lineage['active'] == selected_v_num:
+                    if st.button("Unpin Version", key=f"unpin_{lineage['lineage_id']}", use_container_width=True):
+                        assistant_registry.pin_version(lineage['lineage_id'], None)
+                        st.rerun()
+                elif st.button(f"Pin v{selected_v_num} as Active", key=f"pin_{lineage['lineage_id']}", use_container_width=True):
+                    assistant_registry.pin_version(lineage['lineage_id'], selected_v_num)
+                    st.rerun()
+            
+            # Canary / A/B split between two versions of this lineage
+            if len(lineage['versions']) > 1:
+                render_traffic_split(lineage, versions)
             
             # Show details button
             with st.expander("Show Details"):
                 st.write(f"Description: {selected_assistant.get('description', 'No description')}")
                 st.write(f"Material: {selected_assistant['material']['name']}")
                 st.write(f"Training examples: {len(selected_assistant['material']['training_set'])}")
+                if selected_assistant.get('artifact_id'):
+                    st.write(f"Artifact: `{selected_assistant['artifact_id'][:12]}`")
                 
                 # Information about the dataset and tables
                 st.subheader("Dataset Information")
                 for table in selected_assistant['dataset']['tables']:
-                    st.write(f"- {table['name']}: {table['description']}")
\ No newline at end of file
+                    st.write(f"- {table['name']}: {table['description']}")
+
+profiler.end_rerun()
\ No newline at end of file
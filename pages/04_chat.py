@@ -1,27 +1,23 @@
 import streamlit as st
-import pandas as pd
-import uuid
-import datetime
 import random
+import time
 from components.sidebar import render_sidebar
+import utils.profiler as profiler
+from utils.page_setup import setup_page
+from utils.assistant_artifacts import retrieve_examples
+import utils.cost_guard as cost_guard
+import utils.prompt_context as prompt_context
+import utils.generation_scheduler as generation_scheduler
+import utils.assistant_pool as assistant_pool
+import utils.assistant_router as assistant_router
+import utils.assistant_registry as assistant_registry
+from utils.sql_validator import validate_sql
+
+# Minimum similarity for a training example to be reused as the answer
+EXAMPLE_MATCH_SCORE = 0.8
 
 # Initialize page
-st.set_page_config(
-    page_title="BDA Studio - Chat",
-    page_icon="💬",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-
-# 네비게이션 메뉴 숨기기
-hide_streamlit_style = """
-<style>
-#MainMenu {visibility: hidden;}
-div[data-testid="stSidebarNav"] {display: none;}
-</style>
-"""
-st.markdown(hide_streamlit_style, unsafe_allow_html=True)
+setup_page("BDA Studio - Chat", "💬", "chat")
 
 # Render sidebar
 render_sidebar()
@@ -29,48 +25,58 @@ render_sidebar()
 # Check if user has selected a workspace and an assistant
 if not st.session_state.current_workspace:
     st.warning("Please select or create a workspace first")
-    st.stop()
+    profiler.stop()
 
 if not st.session_state.current_assistant:
     st.warning("Please select an assistant to chat with")
-    st.stop()
+    profiler.stop()
 
 # Initialize chat history if not present
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
 
-# Function to generate mock SQL response
-def generate_sql_response(query):
-    """Mock function to generate SQL from natural language"""
-    assistant = st.session_state.current_assistant
-    dataset = assistant['dataset']
+# Function to generate SQL for a chat prompt
+@profiler.timed()
+def generate_sql_response(query, assistant):
+    """
+    Generate SQL from natural language through the shared generation scheduler
     
-    # Get random table from the dataset
-    if dataset['tables']:
-        table = random.choice(dataset['tables'])
-        table_name = table['name']
-    else:
-        table_name = "example_table"
+    Returns:
+        tuple: (sql or None, True if the SQL came from a matching training
+            example, error message or None)
+    """
+    dataset = assistant['dataset']
+    artifact = assistant_pool.acquire(assistant)
     
-    # Generate a simple SQL query based on the input
-    if "count" in query.lower() or "how many" in query.lower():
-        sql = f"SELECT COUNT(*) FROM `{dataset['project']}.{dataset['dataset']}.{table_name}`"
-        if "where" in query.lower() or "filter" in query.lower():
-            sql += " WHERE created_date > '2023-01-01'"
-    elif "average" in query.lower() or "mean" in query.lower():
-        sql = f"SELECT AVG(value) FROM `{dataset['project']}.{dataset['dataset']}.{table_name}`"
-    elif "group" in query.lower():
-        sql = f"SELECT category, COUNT(*) FROM `{dataset['project']}.{dataset['dataset']}.{table_name}` GROUP BY category"
-    elif "top" in query.lower():
-        sql = f"SELECT category, COUNT(*) as count FROM `{dataset['project']}.{dataset['dataset']}.{table_name}` GROUP BY category ORDER BY count DESC LIMIT 5"
-    else:
-        sql = f"SELECT * FROM `{dataset['project']}.{dataset['dataset']}.{table_name}` LIMIT 10"
+    # Reuse the SQL of a near-identical training example from the prebuilt index
+    examples = retrieve_examples(artifact, query, k=1)
+    if examples and examples[0][0] >= EXAMPLE_MATCH_SCORE:
+        return examples[0][1]['sql'], True, None
     
-    return sql
+    # Send only the tables and columns the pruned prompt context picked for this question
+    context = prompt_context.build_context(artifact, query)
+    tables = context['tables'] or sorted(set(artifact['table_lookup'].values()))
+    try:
+        result = generation_scheduler.generate(
+            {
+                "question": query,
+                "context": context['text'],
+                "tables": tables or [f"{dataset['project']}.{dataset['dataset']}.example_table"]
+            },
+            priority=generation_scheduler.INTERACTIVE,
+            workspace_id=assistant['workspace_id']
+        )
+    except Exception as e:
+        # A timed out or failed backend call becomes an error reply, not a crash
+        return None, False, str(e) or type(e).__name__
+    return result['sql'], False, result['error']
 
 # Function to generate mock query results
+@profiler.timed()
 def generate_query_results(sql):
     """Mock function to generate query results from SQL"""
+    import pandas as pd
+
     # Check the type of query to determine what kind of results to generate
     if "COUNT(*)" in sql:
         # Return a count result
@@ -103,6 +109,18 @@ def generate_query_results(sql):
 assistant = st.session_state.current_assistant
 version = st.session_state.current_assistant_version
 
+# Versions this lineage's traffic is split across, if any
+route = assistant_router.get_route(assistant.get('lineage_id'))
+
+# Usually already warm from the Assistants page; otherwise load it before the first message
+with profiler.span("load_artifact"):
+    assistant_pool.acquire(assistant)
+    if route:
+        assistant_pool.preload([
+            assistant_registry.get_version(assistant['lineage_id'], v) for v, w in route['weights'].items() if w
+        ])
+assistant_pool.remember(assistant)
+
 st.title(f"Chat with {assistant['name']} (v{version})")
 
 # Display assistant metadata
@@ -114,6 +132,31 @@ with col2:
 with col3:
     st.write(f"**Created:** {assistant['created_at']}")
 
+if route:
+    split = ", ".join(f"v{v}: {w}%" for v, w in sorted(route['weights'].items()))
+    st.caption(f"Traffic split ({route['status']}): {split}")
+
+workspace_id = st.session_state.current_workspace['id']
+budget = cost_guard.get_budget(workspace_id)
+st.caption(
+    f"Workspace scan budget: {cost_guard.format_bytes(budget['used_bytes'])} of "
+    f"{cost_guard.format_bytes(budget['limit_bytes'])} used by {budget['queries']} queries"
+)
+
+def render_cost_notes(message):
+    """Render the cost guard outcome of an assistant message"""
+    for note in message.get("rewrites", []):
+        st.caption(f"Rewritten: {note}")
+    if message.get("cost_status") in ("warn", "block"):
+        st.warning(message["cost_message"])
+    elif message.get("cost_message"):
+        st.caption(message["cost_message"])
+    suggestion = message.get("suggestion")
+    if suggestion:
+        st.caption(f"Suggestion: {suggestion['note']} to scan about "
+                   f"{cost_guard.format_bytes(suggestion['total_bytes'])} (returns different rows)")
+        st.code(suggestion['sql'], language="sql")
+
 # Chat container
 st.divider()
 chat_container = st.container()
@@ -128,8 +171,13 @@ with chat_container:
                 st.write(message["content"])
                 if "sql" in message:
                     st.code(message["sql"], language="sql")
+                    render_cost_notes(message)
+                if message.get("version") and message["version"] != version:
+                    st.caption(f"Answered by v{message['version']}")
                 if "results" in message:
                     st.dataframe(message["results"])
+                elif message.get("results_evicted"):
+                    st.caption("Results were cleared to save memory. Ask again to re-run the query.")
 
 # Chat input
 prompt = st.chat_input("Ask a question in natural language...")
@@ -141,30 +189,64 @@ if prompt:
     # Display user message
     st.chat_message("user").write(prompt)
     
-    # Generate SQL (in a real app, this would call your LLM)
-    sql = generate_sql_response(prompt)
+    # Pick the version that answers this turn, then time it for the router
+    answering = assistant_router.route(assistant, f"{prompt}\x00{len(st.session_state.chat_history)}")
     
-    # Generate query results (in a real app, this would query BigQuery)
-    results = generate_query_results(sql)
+    # Generate SQL (in a real app, this would call your LLM)
+    started = time.perf_counter()
+    sql, cache_hit, error = generate_sql_response(prompt, answering)
+    latency_ms = (time.perf_counter() - started) * 1000
+    decision = assistant_router.record(answering, latency_ms, cache_hit, sql is not None and validate_sql(sql))
     
-    # Create assistant response
-    response = f"I've translated your question into SQL and executed it."
+    message = {"role": "assistant", "version": answering.get('version')}
+    if error:
+        message["content"] = f"I couldn't translate your question: {error}"
+    else:
+        # Estimate the scan and narrow SELECT * previews before anything runs
+        plan = cost_guard.plan_query(
+            sql,
+            prompt,
+            answering['dataset'],
+            answering['material'].get('knowledge_data', ""),
+            assistant_pool.acquire(answering)['table_lookup'],
+            workspace_id
+        )
+        message.update({
+            "sql": plan['sql'],
+            "rewrites": plan['rewrites'],
+            "cost_status": plan['status'],
+            "cost_message": plan['message'],
+            "suggestion": plan['suggestion']
+        })
+        
+        if plan['status'] == "block":
+            message["content"] = "I've translated your question into SQL but did not run it."
+        else:
+            # Generate query results (in a real app, this would query BigQuery)
+            message["results"] = generate_query_results(message["sql"])
+            message["content"] = "I've translated your question into SQL and executed it."
+            cost_guard.charge(workspace_id, plan['estimate']['total_bytes'])
     
     # Add assistant message to chat history
-    st.session_state.chat_history.append({
-        "role": "assistant", 
-        "content": response,
-        "sql": sql,
-        "results": results
-    })
+    st.session_state.chat_history.append(message)
     
     # Display assistant message
     with st.chat_message("assistant"):
-        st.write(response)
-        st.code(sql, language="sql")
-        st.dataframe(results)
+        st.write(message["content"])
+        if "sql" in message:
+            st.code(message["sql"], language="sql")
+            render_cost_notes(message)
+        if answering.get('version') != version:
+            st.caption(f"Answered by v{answering.get('version')}")
+        if "results" in message:
+            st.dataframe(message["results"])
+    
+    if decision:
+        st.info(decision)
 
 # Clear chat button
 if st.button("Clear Chat"):
     st.session_state.chat_history = []
-    st.rerun()
\ No newline at end of file
+    st.rerun()
+
+profiler.end_rerun()
\ No newline at end of file
@@ -2,24 +2,15 @@ import streamlit as st
 import pandas as pd
 import uuid
 from components.sidebar import render_sidebar
+import utils.profiler as profiler
+from utils.page_setup import setup_page
 from components.dataset_selector import render_dataset_selector
+import utils.schema_catalog as schema_catalog
+import utils.table_samples as table_samples
+import utils.workspace_counters as workspace_counters
 
 # Initialize page
-st.set_page_config(
-    page_title="BDA Studio - Datasets",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# 네비게이션 메뉴 숨기기
-hide_streamlit_style = """
-<style>
-#MainMenu {visibility: hidden;}
-div[data-testid="stSidebarNav"] {display: none;}
-</style>
-"""
-st.markdown(hide_streamlit_style, unsafe_allow_html=True)
+setup_page("BDA Studio - Datasets", "📊", "datasets")
 
 
 # Render sidebar
@@ -28,7 +19,7 @@ render_sidebar()
 # Check if user has selected a workspace
 if not st.session_state.current_workspace:
     st.warning("Please select or create a workspace first")
-    st.stop()
+    profiler.stop()
 
 # Main datasets page
 st.title("Datasets Management")
@@ -93,15 +84,23 @@ if dataset in tables_data:
         }
         
         # Check if this dataset already exists in session state
-        dataset_exists = False
-        for i, ds in enumerate(st.session_state.datasets):
-            if ds["project"] == project and ds["dataset"] == dataset:
-                st.session_state.datasets[i] = selected_dataset
-                dataset_exists = True
-                break
-                
-        if not dataset_exists:
+        existing = next(
+            (i for i, ds in enumerate(st.session_state.datasets)
+             if ds["project"] == project and ds["dataset"] == dataset),
+            None
+        )
+        
+        # Keep fetched schemas so only tables with a newer last_updated are fetched again
+        if existing is not None:
+            schema_catalog.carry_over_schemas(selected_dataset["tables"], st.session_state.datasets[existing]["tables"])
+        schema_catalog.refresh_dataset_schema(selected_dataset)
+        
+        if existing is not None:
+            workspace_counters.record_deleted("datasets", st.session_state.datasets[existing])
+            st.session_state.datasets[existing] = selected_dataset
+        else:
             st.session_state.datasets.append(selected_dataset)
+        workspace_counters.record_created("datasets", selected_dataset)
         
         st.session_state.selected_dataset = selected_dataset
 else:
@@ -124,21 +123,43 @@ if workspace_datasets:
             if st.button("View Schema", key=f"schema_{ds['project']}_{ds['dataset']}"):
                 st.subheader(f"Schema for {ds['project']}.{ds['dataset']}")
                 
+                # Only tables whose last_updated moved since the last fetch are fetched again
+                refreshed = schema_catalog.refresh_dataset_schema(ds)
+                if refreshed:
+                    st.caption(f"Fetched schema of: {', '.join(refreshed)}")
+                
                 # Display schema for each table
                 for table in ds['tables']:
                     st.write(f"**{table['name']}**")
                     st.write(f"Description: {table['description']}")
                     st.write(f"Rows: {table['rows']}")
                     
-                    # Mock schema
+                    schema = table['schema']
+                    details = []
+                    if schema['partitioning']:
+                        details.append(f"Partitioned by {schema['partitioning']['field']} ({schema['partitioning']['type']})")
+                    if schema['clustering']:
+                        details.append(f"Clustered by {', '.join(schema['clustering'])}")
+                    if details:
+                        st.write(" · ".join(details))
+                    
+                    # Schema with column statistics from the sample cache
+                    profile = table_samples.get_table_profile(ds['project'], ds['dataset'], table)
+                    stats = {stat['name']: stat for stat in profile['stats']}
                     schema_df = pd.DataFrame([
-                        {"column": "id", "type": "INTEGER", "mode": "REQUIRED", "description": "Primary key"},
-                        {"column": "name", "type": "STRING", "mode": "REQUIRED", "description": "Item name"},
-                        {"column": "value", "type": "FLOAT", "mode": "NULLABLE", "description": "Item value"},
-                        {"column": "created_at", "type": "TIMESTAMP", "mode": "REQUIRED", "description": "Creation timestamp"}
+                        {
+                            **column,
+                            "null_rate": f"{stats[column['name']]['null_rate']:.1%}",
+                            "distinct": stats[column['name']]['distinct'],
+                            "min": stats[column['name']]['min'],
+                            "max": stats[column['name']]['max']
+                        }
+                        for column in schema['columns']
                     ])
                     
                     st.dataframe(schema_df, use_container_width=True, hide_index=True)
+                    st.caption(f"Sample of {len(profile['sample'])} rows, fetched {profile['fetched_at']} (last updated {profile['watermark']})")
+                    st.dataframe(profile['sample'], use_container_width=True, hide_index=True)
 else:
     st.info("No datasets saved in this workspace yet")
 
@@ -148,4 +169,6 @@ if st.session_state.selected_dataset:
     if st.button("Create Experiment with Selected Dataset", use_container_width=True):
         # 실험 페이지로 이동할 때 탭을 "create"로 설정
         st.session_state.experiment_tab = "create"
-        st.switch_page("pages/02_experiment.py")
\ No newline at end of file
+        st.switch_page("pages/02_experiment.py")
+
+profiler.end_rerun()
\ No newline at end of file
@@ -3,32 +3,40 @@ import pandas as pd
 import uuid
 import datetime
 from components.sidebar import render_sidebar
-from utils.sql_validator import validate_sql
-
-# Initialize page
-st.set_page_config(
-    page_title="BDA Studio - Materials",
-    page_icon="📝",
-    layout="wide",
-    initial_sidebar_state="expanded"
+import utils.profiler as profiler
+from utils.page_setup import setup_page
+from utils.material_pipeline import (
+    clean_pairs, empty_pairs_frame, from_records, prepare_pairs
+)
+from utils.material_import import SUPPORTED_EXTENSIONS, detect_format, import_pairs
+from utils.dedup import dedup_material_sets
+from components.paged_editor import (
+    apply_patch, get_patch, render_paged_editor, render_paged_view, reset_editor
 )
+from utils.material_versions import (
+    create_version, delete_versions, ensure_version, get_history, new_version
+)
+import utils.workspace_counters as workspace_counters
+
+# File types accepted by the bulk importer
+SUPPORTED_TYPES = [ext.lstrip('.') for ext in SUPPORTED_EXTENSIONS]
 
-# 네비게이션 메뉴 숨기기
-hide_streamlit_style = """
-<style>
-#MainMenu {visibility: hidden;}
-div[data-testid="stSidebarNav"] {display: none;}
-</style>
-"""
-st.markdown(hide_streamlit_style, unsafe_allow_html=True)
+# Initialize page
+setup_page("BDA Studio - Materials", "📝", "materials")
 
 # Render sidebar
 render_sidebar()
 
+def describe_dedup(report):
+    """Summarize a dedup report in one line"""
+    return (f"Removed {report['train_duplicates']:,} duplicate training pairs, "
+            f"{report['test_duplicates']:,} duplicate test pairs and "
+            f"{report['test_leaks']:,} training pairs overlapping the test set.")
+
 # Check if user has selected a workspace
 if not st.session_state.current_workspace:
     st.warning("Please select or create a workspace first")
-    st.stop()
+    profiler.stop()
 
 # Initialize session states for this page
 if 'show_train_editor' not in st.session_state:
@@ -39,10 +47,14 @@ if 'temp_train_data' not in st.session_state:
     st.session_state.temp_train_data = pd.DataFrame({"natural_language": [""], "sql": [""]})
 if 'temp_test_data' not in st.session_state:
     st.session_state.temp_test_data = pd.DataFrame({"natural_language": [""], "sql": [""]})
-if 'edited_train_data' not in st.session_state:
-    st.session_state.edited_train_data = pd.DataFrame({"natural_language": [""], "sql": [""]})
-if 'edited_test_data' not in st.session_state:
-    st.session_state.edited_test_data = pd.DataFrame({"natural_language": [""], "sql": [""]})
+if 'editing_material_id' not in st.session_state:
+    st.session_state.editing_material_id = None
+
+# Material loaded by the Edit button; saving creates a new version of it
+editing_material = next((m for m in st.session_state.materials
+                         if m['id'] == st.session_state.editing_material_id), None)
+if editing_material:
+    ensure_version(editing_material)
 
 # Function to toggle train editor
 def toggle_train_editor():
@@ -54,43 +66,38 @@ def toggle_test_editor():
 
 # Function to save train data
 def save_train_data():
-    # 빈 값 필터링
-    valid_rows = []
-    for _, row in st.session_state.edited_train_data.iterrows():
-        nl = row.get('natural_language')
-        sql = row.get('sql')
-        if pd.notna(nl) and pd.notna(sql) and str(nl).strip() != "" and str(sql).strip() != "":
-            valid_rows.append({"natural_language": str(nl), "sql": str(sql)})
+    # 편집 내용(patch)을 적용한 뒤 빈 값 필터링
+    clean = clean_pairs(apply_patch(st.session_state.temp_train_data, get_patch("train_pairs")))
     
     # 유효한 행이 있는 경우에만 저장
-    if valid_rows:
-        st.session_state.temp_train_data = pd.DataFrame(valid_rows)
-    else:
-        st.session_state.temp_train_data = pd.DataFrame({"natural_language": [""], "sql": [""]})
+    st.session_state.temp_train_data = clean if not clean.empty else empty_pairs_frame()
     
+    reset_editor("train_pairs")
     st.session_state.show_train_editor = False
-    # 강제 리렌더링을 위해 rerun 사용
-    st.rerun()
 
 # Function to save test data
 def save_test_data():
-    # 빈 값 필터링
-    valid_rows = []
-    for _, row in st.session_state.edited_test_data.iterrows():
-        nl = row.get('natural_language')
-        sql = row.get('sql')
-        if pd.notna(nl) and pd.notna(sql) and str(nl).strip() != "" and str(sql).strip() != "":
-            valid_rows.append({"natural_language": str(nl), "sql": str(sql)})
+    # 편집 내용(patch)을 적용한 뒤 빈 값 필터링
+    clean = clean_pairs(apply_patch(st.session_state.temp_test_data, get_patch("test_pairs")))
     
     # 유효한 행이 있는 경우에만 저장
-    if valid_rows:
-        st.session_state.temp_test_data = pd.DataFrame(valid_rows)
-    else:
-        st.session_state.temp_test_data = pd.DataFrame({"natural_language": [""], "sql": [""]})
+    st.session_state.temp_test_data = clean if not clean.empty else empty_pairs_frame()
     
+    reset_editor("test_pairs")
     st.session_state.show_test_editor = False
-    # 강제 리렌더링을 위해 rerun 사용
-    st.rerun()
+
+# Function to discard pending edits and close an editor
+def cancel_edit(key, toggle):
+    reset_editor(key)
+    toggle()
+
+# Function to load a material into the editors as the parent of a new version
+def load_material_for_edit(material):
+    st.session_state.temp_train_data = from_records(material['training_set'])
+    st.session_state.temp_test_data = from_records(material['test_set'])
+    reset_editor("train_pairs")
+    reset_editor("test_pairs")
+    st.session_state.editing_material_id = material['id']
 
 # Main materials page
 st.title("Materials Management")
@@ -98,14 +105,29 @@ st.write("Create and manage training and testing materials for your natural lang
 
 # Create new material section
 with st.expander("Create New Material", expanded=True):
-    material_name = st.text_input("Material Name")
+    if editing_material:
+        st.info(f"Editing '{editing_material['name']}' (version `{editing_material['version'][:12]}`). "
+                "Saving creates a new version that stores only the changed pairs.")
+        if st.button("Stop Editing"):
+            st.session_state.editing_material_id = None
+            st.session_state.temp_train_data = empty_pairs_frame()
+            st.session_state.temp_test_data = empty_pairs_frame()
+            reset_editor("train_pairs")
+            reset_editor("test_pairs")
+            st.rerun()
+    
+    material_name = st.text_input("Material Name", editing_material['name'] if editing_material else "")
 
     # Train set과 Test set 이름 입력 필드
     col1, col2 = st.columns(2)
     with col1:
-        train_set_name = st.text_input("Train Set Name", "Default Training Set")
+        train_set_name = st.text_input(
+            "Train Set Name", editing_material.get('train_set_name', "Default Training Set") if editing_material else "Default Training Set"
+        )
     with col2:
-        test_set_name = st.text_input("Test Set Name", "Default Test Set")
+        test_set_name = st.text_input(
+            "Test Set Name", editing_material.get('test_set_name', "Default Test Set") if editing_material else "Default Test Set"
+        )
 
     # Training set input section
     st.subheader("Training Set")
@@ -118,7 +140,7 @@ with st.expander("Create New Material", expanded=True):
         train_preview = st.container()
         with train_preview:
             st.write("Preview Training Data:")
-            st.dataframe(st.session_state.temp_train_data, use_container_width=True)
+            render_paged_view("train_preview", st.session_state.temp_train_data)
     
     # Button to open the editor
     st.button("Edit Training Data", on_click=toggle_train_editor)
@@ -128,38 +150,15 @@ with st.expander("Create New Material", expanded=True):
         st.subheader("Training Data Editor")
         st.write("Add your training examples below. Each row represents one query pair.")
         
-        # 세션 상태 확인 및 초기화
-        if 'edited_train_data' not in st.session_state or st.session_state.edited_train_data.empty:
-            if not st.session_state.temp_train_data.empty and st.session_state.temp_train_data.iloc[0]['natural_language'] != "":
-                st.session_state.edited_train_data = st.session_state.temp_train_data.copy()
-            else:
-                # 최소한 하나의 빈 행 제공
-                st.session_state.edited_train_data = pd.DataFrame({"natural_language": [""], "sql": [""]})
-        
-        # Data editor with Excel-like functionality
-        st.session_state.edited_train_data = st.data_editor(
-            st.session_state.edited_train_data,
-            column_config={
-                "natural_language": st.column_config.TextColumn("Natural Language Query", width="large", required=True),
-                "sql": st.column_config.TextColumn("SQL Query", width="large", required=True)
-            },
-            num_rows="dynamic",
-            use_container_width=True,
-            hide_index=True,
-            key="train_data_editor"
-        )
-        
-        # 디버깅 정보 표시 (선택사항)
-        st.write(f"Current editor data: {len(st.session_state.edited_train_data)} rows")
+        # 한 페이지만 프론트엔드로 전송하고, 편집 내용은 patch로 보관
+        render_paged_editor("train_pairs", st.session_state.temp_train_data)
         
         # Save and cancel buttons
         col1, col2 = st.columns(2)
         with col1:
             st.button("Save Training Data", on_click=save_train_data, type="primary")
         with col2:
-            if st.button("Cancel", on_click=toggle_train_editor):
-                if 'edited_train_data' in st.session_state:
-                    del st.session_state.edited_train_data
+            st.button("Cancel", on_click=cancel_edit, args=("train_pairs", toggle_train_editor))
     
     # Test set input section
     st.subheader("Test Set")
@@ -172,7 +171,7 @@ with st.expander("Create New Material", expanded=True):
         test_preview = st.container()
         with test_preview:
             st.write("Preview Test Data:")
-            st.dataframe(st.session_state.temp_test_data, use_container_width=True)
+            render_paged_view("test_preview", st.session_state.temp_test_data)
     
     # Button to open the editor
     st.button("Edit Test Data", on_click=toggle_test_editor)
@@ -182,38 +181,15 @@ with st.expander("Create New Material", expanded=True):
         st.subheader("Test Data Editor")
         st.write("Add your test examples below. Each row represents one query pair.")
         
-        # 세션 상태 확인 및 초기화
-        if 'edited_test_data' not in st.session_state or st.session_state.edited_test_data.empty:
-            if not st.session_state.temp_test_data.empty and st.session_state.temp_test_data.iloc[0]['natural_language'] != "":
-                st.session_state.edited_test_data = st.session_state.temp_test_data.copy()
-            else:
-                # 최소한 하나의 빈 행 제공
-                st.session_state.edited_test_data = pd.DataFrame({"natural_language": [""], "sql": [""]})
-        
-        # Data editor with Excel-like functionality
-        st.session_state.edited_test_data = st.data_editor(
-            st.session_state.edited_test_data,
-            column_config={
-                "natural_language": st.column_config.TextColumn("Natural Language Query", width="large", required=True),
-                "sql": st.column_config.TextColumn("SQL Query", width="large", required=True)
-            },
-            num_rows="dynamic",
-            use_container_width=True,
-            hide_index=True,
-            key="test_data_editor"
-        )
-        
-        # 디버깅 정보 표시 (선택사항)
-        st.write(f"Current editor data: {len(st.session_state.edited_test_data)} rows")
+        # 한 페이지만 프론트엔드로 전송하고, 편집 내용은 patch로 보관
+        render_paged_editor("test_pairs", st.session_state.temp_test_data)
         
         # Save and cancel buttons
         col1, col2 = st.columns(2)
         with col1:
             st.button("Save Test Data", on_click=save_test_data, type="primary")
         with col2:
-            if st.button("Cancel", key="cancel_test_edit", on_click=toggle_test_editor):
-                if 'edited_test_data' in st.session_state:
-                    del st.session_state.edited_test_data
+            st.button("Cancel", key="cancel_test_edit", on_click=cancel_edit, args=("test_pairs", toggle_test_editor))
     
     # Knowledge data input section
     st.subheader("Knowledge Data")
@@ -221,65 +197,74 @@ with st.expander("Create New Material", expanded=True):
     
     knowledge_data = st.text_area(
         "Knowledge Data", 
+        editing_material.get('knowledge_data', "") if editing_material else "",
         placeholder="Enter domain knowledge data that helps understand the database structure, relationships, and business rules.",
         height=150
     )
     
+    remove_duplicates = st.checkbox(
+        "Remove near-duplicates on save", value=False, key="dedup_on_save",
+        help="Drop near-duplicate pairs within each set and training pairs that overlap the test set."
+    )
+    
     # Validate and save material
     if st.button("Validate and Save Material"):
+        # Clean, validate and convert each set in a single pass
+        _, training_set, invalid_train = prepare_pairs(st.session_state.temp_train_data)
+        _, test_set, invalid_test = prepare_pairs(st.session_state.temp_test_data)
+        
         if not material_name:
             st.warning("Please enter a material name.")
         elif not train_set_name:
             st.warning("Please enter a train set name.")
         elif not test_set_name:
             st.warning("Please enter a test set name.")
-        elif st.session_state.temp_train_data.empty or not any(pd.notna(row.get('natural_language')) and pd.notna(row.get('sql')) for _, row in st.session_state.temp_train_data.iterrows() if row.get('natural_language', '').strip() != ''):
+        elif not training_set:
             st.warning("Please add at least one valid training example.")
-        elif st.session_state.temp_test_data.empty or not any(pd.notna(row.get('natural_language')) and pd.notna(row.get('sql')) for _, row in st.session_state.temp_test_data.iterrows() if row.get('natural_language', '').strip() != ''):
+        elif not test_set:
             st.warning("Please add at least one valid test example.")
         else:
-            # Validate SQL queries (mock validation)
-            invalid_sql = []
-            
-            # Validate training SQL
-            for idx, row in st.session_state.temp_train_data.iterrows():
-                sql = row.get('sql', '')  # None일 경우 빈 문자열 반환
-                if sql is None or not validate_sql(sql):
-                    invalid_sql.append(f"Training query #{idx+1}: {str(sql)[:50] if sql else 'Empty SQL'}...")
-            
-            # Validate test SQL
-            for idx, row in st.session_state.temp_test_data.iterrows():
-                sql = row.get('sql', '')  # None일 경우 빈 문자열 반환
-                if sql is None or not validate_sql(sql):
-                    invalid_sql.append(f"Test query #{idx+1}: {str(sql)[:50] if sql else 'Empty SQL'}...")
+            invalid_sql = [f"Training query #{idx}: {sql[:50]}..." for idx, sql in invalid_train]
+            invalid_sql += [f"Test query #{idx}: {sql[:50]}..." for idx, sql in invalid_test]
             
             if invalid_sql:
                 st.error("Invalid SQL queries detected:")
                 for err in invalid_sql:
                     st.write(f"- {err}")
             else:
-                # Convert dataframes to the format we need
-                training_set = []
-                for _, row in st.session_state.temp_train_data.iterrows():
-                    if pd.notna(row.get('natural_language')) and pd.notna(row.get('sql')):  # None이 아닌 경우만 추가
-                        training_set.append({
-                            "nl": str(row.get('natural_language', '')),
-                            "sql": str(row.get('sql', ''))
-                        })
-                
-                test_set = []
-                for _, row in st.session_state.temp_test_data.iterrows():
-                    if pd.notna(row.get('natural_language')) and pd.notna(row.get('sql')):  # None이 아닌 경우만 추가
-                        test_set.append({
-                            "nl": str(row.get('natural_language', '')),
-                            "sql": str(row.get('sql', ''))
-                        })
+                if remove_duplicates:
+                    # One pass over both sets; duplicates never reach the stored material
+                    training_set, test_set, dedup_report = dedup_material_sets(training_set, test_set)
+                    st.info(describe_dedup(dedup_report))
                 
-                # 검증 후, 유효한 데이터가 있는지 다시 확인
                 if not training_set:
-                    st.error("No valid training examples found. Please check your input.")
-                elif not test_set:
-                    st.error("No valid test examples found. Please check your input.")
+                    st.warning("Every training example overlaps the test set. Please add distinct training examples.")
+                elif editing_material:
+                    # Store only the delta against the edited version
+                    updated_material = new_version(
+                        editing_material,
+                        name=material_name,
+                        training_set=training_set,
+                        test_set=test_set,
+                        train_set_name=train_set_name,
+                        test_set_name=test_set_name,
+                        knowledge_data=knowledge_data
+                    )
+                    if updated_material is None:
+                        st.info("No changes to save.")
+                    else:
+                        st.session_state.materials = [
+                            updated_material if m['id'] == updated_material['id'] else m
+                            for m in st.session_state.materials
+                        ]
+                        st.session_state.selected_material = updated_material
+                        st.session_state.editing_material_id = None
+                        st.session_state.temp_train_data = empty_pairs_frame()
+                        st.session_state.temp_test_data = empty_pairs_frame()
+                        reset_editor("train_pairs")
+                        reset_editor("test_pairs")
+                        st.success(f"Material '{material_name}' saved as version {updated_material['version'][:12]}.")
+                        st.rerun()
                 else:
                     # Create new material
                     new_material = {
@@ -295,16 +280,100 @@ with st.expander("Create New Material", expanded=True):
                     }
                     
                     # Add to session state
+                    create_version(new_material)
                     st.session_state.materials.append(new_material)
+                    workspace_counters.record_created("materials", new_material)
                     st.session_state.selected_material = new_material
                     
                     # Reset temp data
-                    st.session_state.temp_train_data = pd.DataFrame({"natural_language": [""], "sql": [""]})
-                    st.session_state.temp_test_data = pd.DataFrame({"natural_language": [""], "sql": [""]})
+                    st.session_state.temp_train_data = empty_pairs_frame()
+                    st.session_state.temp_test_data = empty_pairs_frame()
+                    reset_editor("train_pairs")
+                    reset_editor("test_pairs")
                     
                     st.success(f"Material '{material_name}' created successfully!")
                     st.rerun()
 
+# Bulk import from files
+with st.expander("Import Material from Files"):
+    st.info("Upload large training and test sets as CSV, TSV, JSONL, Excel (.xlsx) or Parquet. "
+            "Files need a natural language column (natural_language, nl or question) and a sql column.")
+    
+    import_name = st.text_input("Material Name", key="import_material_name")
+    col1, col2 = st.columns(2)
+    with col1:
+        import_train_set_name = st.text_input("Train Set Name", "Imported Training Set", key="import_train_set_name")
+        train_file = st.file_uploader("Training Set File", type=SUPPORTED_TYPES, key="import_train_file")
+    with col2:
+        import_test_set_name = st.text_input("Test Set Name", "Imported Test Set", key="import_test_set_name")
+        test_file = st.file_uploader("Test Set File", type=SUPPORTED_TYPES, key="import_test_file")
+    import_knowledge = st.text_area("Knowledge Data", height=100, key="import_knowledge_data")
+    import_dedup = st.checkbox("Remove near-duplicates on import", value=False, key="import_dedup")
+    
+    if st.button("Import Material"):
+        if not import_name:
+            st.warning("Please enter a material name.")
+        elif not train_file or not test_file:
+            st.warning("Please upload both a training set file and a test set file.")
+        else:
+            # Records are appended chunk by chunk; nothing goes through widget state
+            new_material = {
+                "id": str(uuid.uuid4()),
+                "name": import_name,
+                "workspace_id": st.session_state.current_workspace['id'],
+                "training_set": [],
+                "test_set": [],
+                "train_set_name": import_train_set_name,
+                "test_set_name": import_test_set_name,
+                "knowledge_data": import_knowledge,
+                "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            
+            import_failed = False
+            for label, uploaded, target in [
+                ("Training set", train_file, new_material['training_set']),
+                ("Test set", test_file, new_material['test_set'])
+            ]:
+                progress = st.progress(0.0, text=f"{label}: reading {uploaded.name}...")
+                
+                def report_progress(stats, uploaded=uploaded, progress=progress, label=label):
+                    fraction = min(uploaded.tell() / uploaded.size, 1.0) if uploaded.size else 1.0
+                    progress.progress(fraction, text=f"{label}: {stats['rows_read']:,} rows read, {stats['imported']:,} imported")
+                
+                try:
+                    stats = import_pairs(uploaded, detect_format(uploaded.name), target, on_progress=report_progress)
+                except ValueError as e:
+                    st.error(f"{label}: {e}")
+                    import_failed = True
+                    break
+                
+                progress.progress(1.0, text=f"{label}: {stats['imported']:,} of {stats['rows_read']:,} rows imported")
+                if stats['skipped_empty']:
+                    st.write(f"{label}: skipped {stats['skipped_empty']:,} empty rows")
+                if stats['invalid']:
+                    st.warning(f"{label}: skipped {stats['invalid']:,} rows with invalid SQL")
+                    for row, sql in stats['errors']:
+                        st.write(f"- Row {row}: {sql[:50]}...")
+            
+            if not import_failed and import_dedup:
+                new_material['training_set'], new_material['test_set'], dedup_report = dedup_material_sets(
+                    new_material['training_set'], new_material['test_set']
+                )
+                st.info(describe_dedup(dedup_report))
+            
+            if not import_failed:
+                if not new_material['training_set'] or not new_material['test_set']:
+                    st.error("No valid pairs found in one of the files. Please check your input.")
+                else:
+                    create_version(new_material)
+                    st.session_state.materials.append(new_material)
+                    workspace_counters.record_created("materials", new_material)
+                    st.session_state.selected_material = new_material
+                    st.success(
+                        f"Material '{import_name}' imported: {len(new_material['training_set']):,} training "
+                        f"and {len(new_material['test_set']):,} test examples."
+                    )
+
 # Display existing materials
 st.subheader("Existing Materials")
 workspace_materials = [m for m in st.session_state.materials 
@@ -318,13 +387,22 @@ if workspace_materials:
 
         with st.expander(f"{material['name']} - Train: {train_set_name}, Test: {test_set_name} ({len(material['training_set'])} train, {len(material['test_set'])} test)"):
             st.write(f"Created: {material['created_at']}")
+            if material.get('version'):
+                history = get_history(material['version'])
+                st.write(f"Version: `{material['version'][:12]}` ({len(history)} version{'s' if len(history) != 1 else ''})")
+                if len(history) > 1:
+                    for version in history[:-1]:
+                        train_stats = version['stats']['training_set']
+                        test_stats = version['stats']['test_set']
+                        st.caption(
+                            f"`{version['hash'][:12]}` {version['created_at']}: "
+                            f"train +{train_stats['added']} -{train_stats['removed']} ~{train_stats['modified']}, "
+                            f"test +{test_stats['added']} -{test_stats['removed']} ~{test_stats['modified']}"
+                        )
             
-            # Sample of the material
-            st.markdown("**Sample Training Data:**")
-            train_sample = material['training_set'][:2]
-            for item in train_sample:
-                st.markdown(f"**NL:** {item['nl']}")
-                st.markdown(f"**SQL:** `{item['sql']}`")
+            # One searchable page of the material at a time
+            st.markdown("**Training Data:**")
+            render_paged_view(f"material_train_{material['id']}", material['training_set'])
             
             col1, col2, col3 = st.columns(3)
             
@@ -334,30 +412,19 @@ if workspace_materials:
                     st.success(f"Selected material: {material['name']}")
             
             with col2:
-                if st.button("Edit", key=f"edit_material_{material['id']}"):
-                    # Load material data into temp data for editing
-                    train_data = []
-                    for item in material['training_set']:
-                        train_data.append({
-                            "natural_language": item['nl'],
-                            "sql": item['sql']
-                        })
-                    
-                    test_data = []
-                    for item in material['test_set']:
-                        test_data.append({
-                            "natural_language": item['nl'],
-                            "sql": item['sql']
-                        })
-                    
-                    st.session_state.temp_train_data = pd.DataFrame(train_data)
-                    st.session_state.temp_test_data = pd.DataFrame(test_data)
-                    st.success(f"Loaded material '{material['name']}' for editing. Scroll up to the Create New Material section.")
+                st.button("Edit", key=f"edit_material_{material['id']}", on_click=load_material_for_edit, args=(material,))
             
             with col3:
                 if st.button("Delete", key=f"delete_material_{material['id']}"):
                     # Remove material from session state
                     st.session_state.materials = [m for m in st.session_state.materials if m['id'] != material['id']]
+                    workspace_counters.record_deleted("materials", material)
+                    
+                    # Versions stay available while experiments still reference them
+                    if not any(e.get('material_id') == material['id'] for e in st.session_state.experiments):
+                        delete_versions(material['id'])
+                    if st.session_state.editing_material_id == material['id']:
+                        st.session_state.editing_material_id = None
                     
                     # If this was the selected material, reset selection
                     if st.session_state.get('selected_material') and st.session_state.selected_material['id'] == material['id']:
@@ -374,4 +441,6 @@ if st.session_state.get('selected_material'):
     if st.button("Create Experiment with Selected Material", use_container_width=True):
         # 실험 페이지로 이동할 때 탭을 "create"로 설정
         st.session_state.experiment_tab = "create"
-        st.switch_page("pages/02_experiment.py")
\ No newline at end of file
+        st.switch_page("pages/02_experiment.py")
+
+profiler.end_rerun()
\ No newline at end of file
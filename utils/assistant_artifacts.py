@@ -0,0 +1,263 @@
+import datetime
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+from utils.hashing import stable_hash, stable_int
+from utils.schema_catalog import get_columns, get_partition_field
+
+# Where compiled artifacts are written, shared by every session of the server
+ARTIFACT_DIR = os.environ.get(
+    "BDA_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "bdastudio", "artifacts")
+)
+
+# Bumped when the artifact layout changes, so old artifacts are recompiled
+ARTIFACT_FORMAT = 2
+
+# Width of the hashed bag-of-words vectors of the few-shot index
+EMBEDDING_DIM = 512
+
+_MANIFEST_FILE = "manifest.json"
+_EXAMPLES_FILE = "examples.json"
+_VECTORS_FILE = "vectors.npy"
+
+_WORD = re.compile(r"[a-z0-9_]+")
+
+_compile_lock = threading.Lock()
+_current_ids = set()  # artifact ids found on disk in the current format
+
+def embed_text(text):
+    """
+    Return the L2-normalized hashed bag-of-words vector of a text
+
+    Words and word bigrams are hashed into EMBEDDING_DIM signed buckets.
+    """
+    words = _WORD.findall((text or "").lower())
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        bucket = stable_int(feature, digest_size=4)
+        vector[bucket % EMBEDDING_DIM] += 1.0 if bucket & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def build_schema_context(dataset):
+    """Serialize a dataset's tables into the schema text used in prompts"""
+    prefix = f"{dataset['project']}.{dataset['dataset']}"
+    lines = [f"Dataset {prefix}"]
+    for table in dataset.get('tables', []):
+        details = ", ".join(
+            f"{field}: {table[field]}" for field in ("rows", "last_updated") if table.get(field)
+        )
+        line = f"- {prefix}.{table['name']}: {table.get('description', '')}"
+        lines.append(f"{line} ({details})" if details else line)
+    return "\n".join(lines)
+
+def build_schema_tables(dataset):
+    """
+    Return the column-level schema of a dataset's tables as stored in artifacts
+
+    Returns:
+        list: One dict per table with qualified_name, name, description,
+            partition_field and columns (name, type)
+    """
+    prefix = f"{dataset['project']}.{dataset['dataset']}"
+    return [
+        {
+            "qualified_name": f"{prefix}.{table['name']}",
+            "name": table['name'],
+            "description": table.get('description', ""),
+            "partition_field": get_partition_field(table),
+            "columns": [{"name": c['name'], "type": c.get('type', "STRING")} for c in get_columns(table)]
+        }
+        for table in dataset.get('tables', [])
+    ]
+
+def build_table_lookup(dataset):
+    """
+    Map every way of writing a table name to its fully qualified name
+
+    Keys are lower case: "table", "dataset.table" and "project.dataset.table".
+    """
+    project, dataset_name = dataset['project'], dataset['dataset']
+    lookup = {}
+    for table in dataset.get('tables', []):
+        qualified = f"{project}.{dataset_name}.{table['name']}"
+        for key in (table['name'], f"{dataset_name}.{table['name']}", qualified):
+            lookup[key.lower()] = qualified
+    return lookup
+
+def _dataset_fingerprint(dataset):
+    """
+    Return the parts of a dataset record an artifact is compiled from
+
+    Bookkeeping such as schema fetch times is left out, so refreshing a
+    schema that did not change keeps the artifact id.
+    """
+    return [
+        dataset['project'],
+        dataset['dataset'],
+        [
+            [
+                table['name'],
+                table.get('description', ""),
+                table.get('rows'),
+                table.get('last_updated'),
+                [[c['name'], c.get('type'), c.get('mode')] for c in get_columns(table)],
+                get_partition_field(table)
+            ]
+            for table in dataset.get('tables', [])
+        ]
+    ]
+
+def compute_artifact_id(assistant):
+    """
+    Return the content id of an assistant's artifact
+
+    Covers everything the artifact is compiled from, so redeploying the same
+    experiment reuses the artifact on disk.
+    """
+    material = assistant['material']
+    return stable_hash(
+        ARTIFACT_FORMAT,
+        _dataset_fingerprint(assistant['dataset']),
+        material.get('version') or material.get('id'),
+        material.get('knowledge_data', ""),
+        [[pair['nl'], pair['sql']] for pair in material.get('training_set', [])]
+    )
+
+def _artifact_path(artifact_id):
+    return os.path.join(ARTIFACT_DIR, artifact_id)
+
+def compile_artifact(assistant):
+    """
+    Compile and save the immutable artifact of an assistant version
+
+    Writes the schema context, column-level schema, knowledge text, table
+    lookup, few-shot examples and their vectors to ARTIFACT_DIR/<artifact
+    id>. The directory is written under a temporary name and renamed, so
+    readers never see a partial artifact.
+
+    Args:
+        assistant (dict): Assistant with dataset and material
+
+    Returns:
+        str: The artifact id, also stored in assistant['artifact_id']
+    """
+    compiled_id = compute_artifact_id(assistant)
+    path = _artifact_path(compiled_id)
+
+    with _compile_lock:
+        if not os.path.exists(os.path.join(path, _MANIFEST_FILE)):
+            material = assistant['material']
+            examples = [{"nl": p['nl'], "sql": p['sql']} for p in material.get('training_set', [])]
+            vectors = np.zeros((len(examples), EMBEDDING_DIM), dtype=np.float32)
+            for idx, example in enumerate(examples):
+                vectors[idx] = embed_text(example['nl'])
+
+            manifest = {
+                "artifact_id": compiled_id,
+                "format": ARTIFACT_FORMAT,
+                "material_version": material.get('version'),
+                "schema_context": build_schema_context(assistant['dataset']),
+                "schema_tables": build_schema_tables(assistant['dataset']),
+                "knowledge": material.get('knowledge_data', ""),
+                "table_lookup": build_table_lookup(assistant['dataset']),
+                "example_count": len(examples),
+                "compiled_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+
+            os.makedirs(ARTIFACT_DIR, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix=f".{compiled_id}-", dir=ARTIFACT_DIR)
+            try:
+                with open(os.path.join(staging, _MANIFEST_FILE), "w", encoding="utf-8") as f:
+                    json.dump(manifest, f)
+                with open(os.path.join(staging, _EXAMPLES_FILE), "w", encoding="utf-8") as f:
+                    json.dump(examples, f)
+                np.save(os.path.join(staging, _VECTORS_FILE), vectors)
+                shutil.rmtree(path, ignore_errors=True)
+                os.replace(staging, path)
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)
+                # Another process may have published the same artifact first
+                if not os.path.exists(os.path.join(path, _MANIFEST_FILE)):
+                    raise
+
+    _current_ids.add(compiled_id)
+    assistant['artifact_id'] = compiled_id
+    return compiled_id
+
+def load_artifact(artifact_id):
+    """
+    Load a compiled artifact
+
+    The example vectors are memory-mapped, so loading costs the same for
+    10 or 100k examples and pages are shared between processes. Loaded
+    artifacts are kept warm by utils.assistant_pool.
+
+    Returns:
+        dict: manifest fields plus examples and vectors
+
+    Raises:
+        FileNotFoundError: If the artifact has not been compiled here
+    """
+    path = _artifact_path(artifact_id)
+    with open(os.path.join(path, _MANIFEST_FILE), encoding="utf-8") as f:
+        artifact = json.load(f)
+    with open(os.path.join(path, _EXAMPLES_FILE), encoding="utf-8") as f:
+        artifact['examples'] = json.load(f)
+    artifact['vectors'] = np.load(os.path.join(path, _VECTORS_FILE), mmap_mode="r")
+    return artifact
+
+def current_artifact_id(assistant):
+    """
+    Return the id of an assistant's compiled artifact, or None if it still
+    has to be compiled (older assistants or artifact layouts, or an artifact
+    directory that was cleaned up)
+    """
+    compiled_id = assistant.get('artifact_id')
+    if compiled_id in _current_ids:
+        return compiled_id
+    if compiled_id:
+        try:
+            with open(os.path.join(_artifact_path(compiled_id), _MANIFEST_FILE), encoding="utf-8") as f:
+                if json.load(f).get('format') == ARTIFACT_FORMAT:
+                    _current_ids.add(compiled_id)
+                    return compiled_id
+        except FileNotFoundError:
+            pass
+    return None
+
+def resolve_artifact_id(assistant):
+    """
+    Return the id of an assistant's compiled artifact, compiling it if needed
+
+    Call it on the thread that owns the assistant dict: it may set
+    assistant['artifact_id'].
+    """
+    return current_artifact_id(assistant) or compile_artifact(assistant)
+
+def get_artifact(assistant):
+    """Return the loaded artifact of an assistant, compiling it if missing"""
+    return load_artifact(resolve_artifact_id(assistant))
+
+def retrieve_examples(artifact, question, k=3):
+    """
+    Return the k training examples closest to a question
+
+    Returns:
+        list: (similarity, example) tuples, most similar first
+    """
+    vectors = artifact['vectors']
+    if not len(vectors):
+        return []
+    scores = vectors @ embed_text(question)
+    top = np.argsort(-scores)[:k]
+    return [(float(scores[idx]), artifact['examples'][idx]) for idx in top]
+
+def resolve_table(artifact, name):
+    """Return the fully qualified name of a table reference, or None"""
+    return artifact['table_lookup'].get(name.strip("`").lower())
@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from utils.assistant_artifacts import (
+    compile_artifact, compute_artifact_id, current_artifact_id, load_artifact, resolve_artifact_id, retrieve_examples
+)
+from utils.session_memory import deep_sizeof
+
+logger = logging.getLogger(__name__)
+
+# Memory cap of the warm pool, shared by every session of the server
+POOL_MEMORY_MB = float(os.environ.get("BDA_ASSISTANT_POOL_MB", "256"))
+
+# Background threads loading artifacts
+PRELOAD_WORKERS = 2
+
+# Recently opened assistants remembered per session
+RECENT_ASSISTANTS = 5
+
+_pool = OrderedDict()  # artifact id -> {"artifact", "bytes"}
+_pending = {}  # artifact id -> Future
+_pool_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=PRELOAD_WORKERS, thread_name_prefix="assistant-preload")
+_stats = {"hits": 0, "waits": 0, "misses": 0, "preloads": 0, "evictions": 0}
+
+def _warm(artifact_id):
+    """Load an artifact and touch everything the first chat turn needs"""
+    artifact = load_artifact(artifact_id)
+    # Page in the memory-mapped vectors and run one retrieval
+    retrieve_examples(artifact, "warm up", k=1)
+    return artifact, deep_sizeof(artifact)
+
+def _insert(artifact_id, artifact, size):
+    """Add a loaded artifact and evict least recently used ones over the cap"""
+    cap = POOL_MEMORY_MB * 1024 * 1024
+    with _pool_lock:
+        _pool[artifact_id] = {"artifact": artifact, "bytes": size}
+        _pool.move_to_end(artifact_id)
+        total = sum(entry["bytes"] for entry in _pool.values())
+        # The newest artifact always stays, even if it alone exceeds the cap
+        while total > cap and len(_pool) > 1:
+            evicted_id, evicted = _pool.popitem(last=False)
+            total -= evicted["bytes"]
+            _stats["evictions"] += 1
+            logger.info("Evicted assistant artifact %s from the warm pool", evicted_id[:12])
+
+def _preload_task(artifact_id, source=None):
+    try:
+        if source is not None:
+            compile_artifact(source)
+        artifact, size = _warm(artifact_id)
+        _insert(artifact_id, artifact, size)
+        return artifact
+    finally:
+        with _pool_lock:
+            _pending.pop(artifact_id, None)
+
+def _pool_key(assistant):
+    """
+    Return the artifact id the pool keys an assistant by, without compiling
+
+    Only reads the assistant, so the id of an artifact that still has to be
+    compiled is its content id.
+    """
+    return current_artifact_id(assistant) or compute_artifact_id(assistant)
+
+def preload(assistants):
+    """
+    Start loading artifacts in the background
+
+    Assistants already warm or being loaded are skipped. Artifacts that
+    still have to be compiled are compiled by the preload workers too, from
+    a copy of the assistant's sources. Returns at once.
+
+    Args:
+        assistants (list): Assistant dicts, most likely to be opened first
+    """
+    for assistant in assistants:
+        key = _pool_key(assistant)
+        source = None
+        if key != assistant.get('artifact_id'):
+            source = {"dataset": assistant['dataset'], "material": assistant['material']}
+        with _pool_lock:
+            if key in _pool or key in _pending:
+                continue
+            _pending[key] = _executor.submit(_preload_task, key, source)
+            _stats["preloads"] += 1
+
+def acquire(assistant):
+    """
+    Return the loaded artifact of an assistant
+
+    Uses the warm pool when possible, waits for a running preload, and only
+    compiles and loads synchronously on a cold miss or when the preload
+    failed. Records the artifact id on the assistant.
+    """
+    key = _pool_key(assistant)
+    with _pool_lock:
+        entry = _pool.get(key)
+        if entry is not None:
+            _pool.move_to_end(key)
+            _stats["hits"] += 1
+        future = _pending.get(key)
+
+    if entry is not None:
+        assistant['artifact_id'] = key
+        return entry["artifact"]
+
+    if future is not None:
+        with _pool_lock:
+            _stats["waits"] += 1
+        try:
+            artifact = future.result()
+            assistant['artifact_id'] = key
+            return artifact
+        except Exception:
+            # Load it here instead; a second failure reaches the caller
+            logger.warning("Preloading assistant artifact %s failed, loading it again", key[:12], exc_info=True)
+
+    with _pool_lock:
+        _stats["misses"] += 1
+    key = resolve_artifact_id(assistant)
+    artifact, size = _warm(key)
+    _insert(key, artifact, size)
+    return artifact
+
+def remember(assistant):
+    """Record an assistant as recently used in this session"""
+    recent = [a for a in st.session_state.get('recent_assistants', []) if a['id'] != assistant['id']]
+    st.session_state.recent_assistants = ([assistant] + recent)[:RECENT_ASSISTANTS]
+
+def get_recent():
+    """Return the assistants this session opened most recently"""
+    return st.session_state.get('recent_assistants', [])
+
+def get_stats():
+    """Return pool size, memory use and hit/miss counters"""
+    with _pool_lock:
+        return dict(
+            _stats,
+            warm=len(_pool),
+            loading=len(_pending),
+            bytes=sum(entry["bytes"] for entry in _pool.values()),
+            cap_bytes=int(POOL_MEMORY_MB * 1024 * 1024)
+        )
@@ -0,0 +1,119 @@
+import datetime
+from itertools import islice
+
+import streamlit as st
+from utils.hashing import stable_hash
+
+# Assistant cards rendered per page on the Assistants page
+CARDS_PER_PAGE = 10
+
+def lineage_key(workspace_id, name):
+    """Return the id of the lineage an assistant name belongs to"""
+    return stable_hash(workspace_id, name, digest_size=8)
+
+def _registry():
+    """
+    Return the registry, building it from st.session_state.assistants once
+
+    Layout:
+        lineages: lineage id -> {lineage_id, name, workspace_id, versions
+            (version number -> assistant), latest, active, updated_at}
+        by_workspace: workspace id -> {lineage id: None}, least recently
+            updated first
+    """
+    if 'assistant_registry' not in st.session_state:
+        st.session_state.assistant_registry = {"lineages": {}, "by_workspace": {}}
+        for assistant in st.session_state.get('assistants', []):
+            if 'version' in assistant:
+                _index(assistant)
+            else:
+                register(assistant)
+    return st.session_state.assistant_registry
+
+def _touch(lineage):
+    """Move a lineage to the most recently updated end of its workspace"""
+    order = _registry()["by_workspace"].setdefault(lineage["workspace_id"], {})
+    order.pop(lineage["lineage_id"], None)
+    order[lineage["lineage_id"]] = None
+    lineage["updated_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def _index(assistant):
+    """Add an assistant that already has a version number to the index"""
+    registry = st.session_state.assistant_registry
+    key = assistant.get('lineage_id') or lineage_key(assistant['workspace_id'], assistant['name'])
+    assistant['lineage_id'] = key
+    lineage = registry["lineages"].setdefault(key, {
+        "lineage_id": key,
+        "name": assistant['name'],
+        "workspace_id": assistant['workspace_id'],
+        "versions": {},
+        "latest": 0,
+        "active": None
+    })
+    version = assistant['version']
+    lineage["versions"][version] = assistant
+    lineage["latest"] = max(lineage["latest"], version)
+    _touch(lineage)
+    return lineage
+
+def register(assistant):
+    """
+    Register a newly deployed assistant as the next version of its lineage
+
+    Assistants with the same name in the same workspace form a lineage.
+    Version numbers only ever increase.
+
+    Returns:
+        int: The assigned version, also stored in assistant['version']
+    """
+    registry = _registry()
+    key = lineage_key(assistant['workspace_id'], assistant['name'])
+    lineage = registry["lineages"].get(key)
+    assistant['version'] = (lineage["latest"] if lineage else 0) + 1
+    assistant['lineage_id'] = key
+    _index(assistant)
+    return assistant['version']
+
+def get_lineage(lineage_id):
+    """Return a lineage or None"""
+    return _registry()["lineages"].get(lineage_id)
+
+def get_version(lineage_id, version):
+    """Return one version of a lineage or None"""
+    lineage = get_lineage(lineage_id)
+    return lineage["versions"].get(version) if lineage else None
+
+def get_latest(lineage_id):
+    """Return the newest version of a lineage"""
+    lineage = get_lineage(lineage_id)
+    return lineage["versions"][lineage["latest"]] if lineage else None
+
+def get_active(lineage_id):
+    """Return the pinned version of a lineage, or the newest if none is pinned"""
+    lineage = get_lineage(lineage_id)
+    if not lineage:
+        return None
+    return lineage["versions"].get(lineage["active"] or lineage["latest"])
+
+def pin_version(lineage_id, version):
+    """Pin a version as the active one; None unpins"""
+    lineage = get_lineage(lineage_id)
+    if lineage is None or (version is not None and version not in lineage["versions"]):
+        raise ValueError(f"Unknown version {version} of lineage {lineage_id}")
+    lineage["active"] = version
+
+def count_lineages(workspace_id):
+    """Return the number of lineages in a workspace"""
+    return len(_registry()["by_workspace"].get(workspace_id, {}))
+
+def list_lineages(workspace_id, offset=0, limit=CARDS_PER_PAGE):
+    """
+    Return one page of a workspace's lineages, most recently updated first
+
+    Returns:
+        tuple: (list of lineages, total number of lineages)
+    """
+    registry = _registry()
+    order = registry["by_workspace"].get(workspace_id, {})
+    keys = islice(reversed(order), offset, offset + limit)
+    return [registry["lineages"][key] for key in keys], len(order)
@@ -0,0 +1,213 @@
+import datetime
+from collections import deque
+
+import numpy as np
+import streamlit as st
+import utils.assistant_registry as assistant_registry
+from utils.hashing import stable_int
+
+# Latency samples kept per version for the percentiles
+LATENCY_WINDOW = 500
+
+# Default promotion and rollback thresholds of a canary
+DEFAULT_POLICY = {
+    "min_samples": 20,        # requests to canary and baseline before deciding
+    "latency_tolerance": 0.2,  # canary p95 may be this much slower than the baseline
+    "validity_tolerance": 0.02  # canary SQL validity may be this much lower
+}
+
+# Route events kept per lineage
+MAX_EVENTS = 20
+
+def _routes():
+    """Return the routes, lineage id -> route"""
+    if 'assistant_routes' not in st.session_state:
+        st.session_state.assistant_routes = {}
+    return st.session_state.assistant_routes
+
+def _metrics():
+    """Return the metrics, (lineage id, version) -> metrics"""
+    if 'assistant_metrics' not in st.session_state:
+        st.session_state.assistant_metrics = {}
+    return st.session_state.assistant_metrics
+
+def _reset_metrics(lineage_id, *versions):
+    """Drop the collected metrics of versions so their next comparison starts fresh"""
+    for version in versions:
+        _metrics().pop((lineage_id, version), None)
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def get_route(lineage_id):
+    """Return the route of a lineage or None if traffic is not split"""
+    return _routes().get(lineage_id)
+
+def set_route(lineage_id, baseline, canary, canary_weight, auto=True, policy=None):
+    """
+    Split a lineage's traffic between a baseline and a canary version
+
+    Replaces any current route of the lineage. Both versions start with
+    empty metrics, so traffic from an earlier split is never compared.
+
+    Args:
+        lineage_id (str): Lineage from the assistant registry
+        baseline (int): Version receiving the rest of the traffic
+        canary (int): Version under evaluation
+        canary_weight (int): Percentage of prompts routed to the canary
+        auto (bool): Promote or roll back automatically using policy
+        policy (dict): Overrides of DEFAULT_POLICY
+
+    Raises:
+        ValueError: If a version does not exist or the weight is out of range
+    """
+    for version in (baseline, canary):
+        if assistant_registry.get_version(lineage_id, version) is None:
+            raise ValueError(f"Unknown version {version} of lineage {lineage_id}")
+    if baseline == canary:
+        raise ValueError("The canary must differ from the baseline")
+    if not 0 <= canary_weight <= 100:
+        raise ValueError("canary_weight must be between 0 and 100")
+
+    new_route = {
+        "baseline": baseline,
+        "canary": canary,
+        "weights": {baseline: 100 - canary_weight, canary: canary_weight},
+        "auto": auto,
+        "policy": dict(DEFAULT_POLICY, **(policy or {})),
+        "status": "running",
+        "events": []
+    }
+    _log(new_route, f"Routing {canary_weight}% of prompts to v{canary}, {100 - canary_weight}% to v{baseline}")
+    _reset_metrics(lineage_id, baseline, canary)
+    _routes()[lineage_id] = new_route
+    return new_route
+
+def clear_route(lineage_id):
+    """Stop splitting a lineage's traffic"""
+    _routes().pop(lineage_id, None)
+
+def _log(current, message):
+    current["events"] = (current["events"] + [f"{_now()} {message}"])[-MAX_EVENTS:]
+
+def route(assistant, routing_key):
+    """
+    Pick the assistant version that answers a prompt
+
+    The choice is a stable hash of routing_key, so the same key always
+    lands on the same version for a given split.
+
+    Args:
+        assistant (dict): Assistant the user opened
+        routing_key (str): Prompt plus anything that identifies the turn
+
+    Returns:
+        dict: The assistant version to use
+    """
+    lineage_id = assistant.get('lineage_id')
+    current = get_route(lineage_id) if lineage_id else None
+    # Promoted or rolled back routes keep sending everything to the winner
+    if current is None:
+        return assistant
+
+    # Weights of 0 and 100 need no hashing
+    settled = [version for version, weight in current["weights"].items() if weight >= 100]
+    if settled:
+        return assistant_registry.get_version(lineage_id, settled[0]) or assistant
+
+    point = stable_int(lineage_id, routing_key) % 100
+    for version, weight in sorted(current["weights"].items()):
+        if point < weight:
+            return assistant_registry.get_version(lineage_id, version) or assistant
+        point -= weight
+    return assistant
+
+def record(assistant, latency_ms, cache_hit, sql_valid):
+    """
+    Record one answered prompt for an assistant version
+
+    Returns:
+        str: Promotion or rollback message if the route changed, else None
+    """
+    lineage_id = assistant.get('lineage_id')
+    key = (lineage_id, assistant.get('version'))
+    metrics = _metrics().setdefault(key, {
+        "requests": 0,
+        "cache_hits": 0,
+        "valid_sql": 0,
+        "latencies_ms": deque(maxlen=LATENCY_WINDOW)
+    })
+    metrics["requests"] += 1
+    metrics["cache_hits"] += int(bool(cache_hit))
+    metrics["valid_sql"] += int(bool(sql_valid))
+    metrics["latencies_ms"].append(float(latency_ms))
+
+    current = get_route(lineage_id) if lineage_id else None
+    if current is not None and current["auto"] and current["status"] == "running":
+        return evaluate(lineage_id)
+    return None
+
+def get_summary(lineage_id, version):
+    """
+    Return the metrics of a version
+
+    Returns:
+        dict: requests, p50_ms, p95_ms, cache_hit_rate and validity_rate,
+            or None without traffic
+    """
+    metrics = _metrics().get((lineage_id, version))
+    if not metrics or not metrics["requests"]:
+        return None
+    latencies = np.fromiter(metrics["latencies_ms"], dtype=float)
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {
+        "requests": metrics["requests"],
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "cache_hit_rate": metrics["cache_hits"] / metrics["requests"],
+        "validity_rate": metrics["valid_sql"] / metrics["requests"]
+    }
+
+def evaluate(lineage_id):
+    """
+    Promote or roll back a canary once it has enough traffic
+
+    Both versions need min_samples requests before they are compared. The
+    canary is promoted when its p95 latency and SQL validity stay within
+    the policy tolerances of the baseline, and rolled back otherwise.
+    Either way the metrics of both versions are reset, so the next route
+    of the lineage collects its own samples.
+
+    Returns:
+        str: Decision message, or None while still collecting samples
+    """
+    current = get_route(lineage_id)
+    if current is None or current["status"] != "running":
+        return None
+    policy = current["policy"]
+    canary = get_summary(lineage_id, current["canary"])
+    baseline = get_summary(lineage_id, current["baseline"])
+    if canary is None or canary["requests"] < policy["min_samples"]:
+        return None
+    # Never promote without a baseline to compare against
+    if baseline is None or baseline["requests"] < policy["min_samples"]:
+        return None
+
+    reasons = []
+    if canary["p95_ms"] > baseline["p95_ms"] * (1 + policy["latency_tolerance"]):
+        reasons.append(f"p95 {canary['p95_ms']:.0f} ms vs {baseline['p95_ms']:.0f} ms")
+    if canary["validity_rate"] < baseline["validity_rate"] - policy["validity_tolerance"]:
+        reasons.append(f"validity {canary['validity_rate']:.0%} vs {baseline['validity_rate']:.0%}")
+
+    if reasons:
+        current["weights"] = {current["baseline"]: 100, current["canary"]: 0}
+        current["status"] = "rolled_back"
+        message = f"Rolled back v{current['canary']}: " + ", ".join(reasons)
+    else:
+        assistant_registry.pin_version(lineage_id, current["canary"])
+        current["weights"] = {current["baseline"]: 0, current["canary"]: 100}
+        current["status"] = "promoted"
+        message = f"Promoted v{current['canary']} to active after {canary['requests']} requests"
+    _log(current, message)
+    _reset_metrics(lineage_id, current["baseline"], current["canary"])
+    return message
@@ -0,0 +1,368 @@
+import os
+import re
+
+import streamlit as st
+from utils.sql_lexer import tokenize, IDENTIFIER, QUOTED_IDENTIFIER, KEYWORD
+from utils.sql_structure import parse_clauses
+from utils.schema_catalog import get_partition_field
+
+# Bytes scanned a workspace may spend per session, configurable for the shared server
+WORKSPACE_SCAN_BUDGET_GB = float(os.environ.get("BDA_WORKSPACE_SCAN_BUDGET_GB", "10"))
+
+# A single query above this share of the budget is flagged even when it fits
+WARN_QUERY_FRACTION = 0.1
+
+# Average stored width of one value, used by the stand-in estimator
+BYTES_PER_VALUE = 16
+
+# Columns assumed for tables whose columns are not known
+DEFAULT_COLUMN_COUNT = 10
+
+# Share of a partitioned table read when the partition column is filtered
+PARTITION_SCAN_FRACTION = 0.1
+
+# Partition window added to exploratory queries that do not filter partitions
+PARTITION_FILTER_DAYS = 30
+
+# Columns kept when SELECT * is narrowed and the question names none
+PREVIEW_COLUMNS = 5
+
+_ROW_SUFFIXES = {"K": 10 ** 3, "M": 10 ** 6, "B": 10 ** 9}
+
+# "Transactions have fields: id, customer_id." / "Visits contain visitor_id, date and time."
+_FIELDS_PATTERN = re.compile(r"(\w+) (?:have fields:|has fields:|contain|contains) ([\w ,]+?)\.", re.IGNORECASE)
+_PARTITION_PATTERN = re.compile(r"(\w+) (?:are|is) partitioned by (\w+)", re.IGNORECASE)
+
+_AGGREGATES = {"COUNT", "SUM", "AVG", "MIN", "MAX"}
+
+def parse_row_count(rows):
+    """Parse a row count such as "1.2M", "350" or 5300 into an int"""
+    text = str(rows or "0").strip().upper().replace(",", "")
+    multiplier = _ROW_SUFFIXES.get(text[-1:], 1)
+    if text[-1:] in _ROW_SUFFIXES:
+        text = text[:-1]
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        return 0
+
+def format_bytes(size):
+    """Format a byte count for display"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def _match_table(word, names):
+    """Return the table a knowledge sentence subject refers to ("Transactions" -> "transactions")"""
+    word = word.lower()
+    for candidate in (word, word.rstrip("s"), word + "s"):
+        if candidate in names:
+            return candidate
+    return None
+
+def table_profiles(dataset, knowledge=""):
+    """
+    Collect what the estimator knows about each table of a dataset
+
+    Row counts come from the dataset record and columns and partitioning
+    from the table schema (utils.schema_catalog). Tables without a schema
+    fall back to sentences of the knowledge data such as
+    "Transactions have fields: id, date." and "Transactions are partitioned by date."
+
+    Returns:
+        dict: Fully qualified table name -> {rows, columns, partition_column,
+            partition_type}
+    """
+    names = {table['name'].lower(): table for table in dataset.get('tables', [])}
+    columns = {}
+    partitions = {}
+    for subject, fields in _FIELDS_PATTERN.findall(knowledge or ""):
+        name = _match_table(subject, names)
+        if name:
+            columns[name] = [f.strip() for f in re.split(r",|\band\b", fields) if f.strip()]
+    for subject, column in _PARTITION_PATTERN.findall(knowledge or ""):
+        name = _match_table(subject, names)
+        if name:
+            partitions[name] = column
+
+    prefix = f"{dataset['project']}.{dataset['dataset']}"
+    profiles = {}
+    for name, table in names.items():
+        schema = table.get('schema')
+        partition = get_partition_field(table) if schema else partitions.get(name)
+        types = {c['name'].lower(): c.get('type') for c in schema['columns']} if schema else {}
+        profiles[f"{prefix}.{table['name']}"] = {
+            "rows": parse_row_count(table.get('rows')),
+            "columns": [c['name'] for c in schema['columns']] if schema else columns.get(name, []),
+            "partition_column": partition,
+            "partition_type": types.get(partition.lower()) if partition else None
+        }
+    return profiles
+
+def _referenced_columns(tokens, clauses):
+    """
+    Return the column names a query reads, or None for SELECT *
+
+    Identifiers that are table names, aliases or function names are skipped.
+    """
+    table_words = set()
+    for reference in clauses["from"] + clauses["joins"]:
+        table_words.update(w.strip("`").lower() for w in re.split(r"[\s.]+", reference))
+
+    columns = set()
+    for i, token in enumerate(tokens):
+        following = tokens[i + 1].value if i + 1 < len(tokens) else None
+        if token.value == "*" and (i == 0 or tokens[i - 1].value in ("SELECT", ",", "DISTINCT", ".")):
+            return None
+        if token.kind not in (IDENTIFIER, QUOTED_IDENTIFIER) or following == "(":
+            continue
+        # Qualified references such as t.price count as price; AS names are outputs
+        if following == "." and i + 2 < len(tokens):
+            continue
+        if i and tokens[i - 1].kind == KEYWORD and tokens[i - 1].value == "AS":
+            continue
+        name = token.value.strip("`").lower()
+        if name not in table_words:
+            columns.add(name)
+    return columns
+
+def estimate_bytes(sql, profiles, lookup):
+    """
+    Estimate the bytes a query scans, the way BigQuery bills it
+
+    Every referenced table is read in full for the columns the query uses;
+    LIMIT does not reduce the scan, a filter on the partition column does.
+    COUNT(*) alone reads no column.
+
+    Args:
+        sql (str): SQL query
+        profiles (dict): Output of table_profiles
+        lookup (dict): Table reference -> fully qualified name, as in
+            utils.assistant_artifacts.build_table_lookup
+
+    Returns:
+        dict: total_bytes and per-table {table, bytes, columns, partition_filtered}
+    """
+    tokens = tokenize(sql)
+    clauses = parse_clauses(sql)
+    referenced = _referenced_columns(tokens, clauses)
+    filtered = " ".join(clauses["where"]).lower()
+
+    tables = []
+    for reference in dict.fromkeys(clauses["tables"]):
+        qualified = lookup.get(reference, reference)
+        profile = profiles.get(qualified, {"rows": 0, "columns": [], "partition_column": None})
+        known = [c.lower() for c in profile["columns"]]
+        if referenced is None:
+            columns = known or [None] * DEFAULT_COLUMN_COUNT
+        elif known:
+            columns = [c for c in known if c in referenced]
+        else:
+            columns = sorted(referenced)
+
+        scanned = profile["rows"] * len(columns) * BYTES_PER_VALUE
+        partition = profile["partition_column"]
+        partition_filtered = bool(partition and re.search(rf"\b{re.escape(partition.lower())}\b", filtered))
+        if partition_filtered:
+            scanned = int(scanned * PARTITION_SCAN_FRACTION)
+        tables.append({
+            "table": qualified,
+            "bytes": scanned,
+            "columns": [c for c in columns if c],
+            "partition_filtered": partition_filtered
+        })
+    return {"total_bytes": sum(t["bytes"] for t in tables), "tables": tables}
+
+def _is_exploratory(tokens, clauses):
+    """True for single-table row previews: LIMIT, no joins, grouping or aggregates"""
+    if not clauses["limit"] or clauses["joins"] or clauses["group_by"] or len(clauses["tables"]) != 1:
+        return False
+    return not any(
+        token.value.upper() in _AGGREGATES and i + 1 < len(tokens) and tokens[i + 1].value == "("
+        for i, token in enumerate(tokens)
+    )
+
+# Top-level clause boundaries, skipping strings and quoted names
+_CLAUSE_SCAN = re.compile(
+    r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|(?P<open>\()|(?P<close>\))"
+    r"|\b(?P<clause>WHERE|GROUP\s+BY|HAVING|QUALIFY|WINDOW|ORDER\s+BY|LIMIT)\b",
+    re.IGNORECASE
+)
+
+def _where_span(sql):
+    """
+    Locate the top-level WHERE predicate of a query
+
+    Returns:
+        tuple: (predicate start, predicate end) when the query has a WHERE
+            clause, else (None, position a WHERE clause would be inserted at)
+    """
+    depth = 0
+    start = None
+    for match in _CLAUSE_SCAN.finditer(sql):
+        if match.group("open"):
+            depth += 1
+        elif match.group("close"):
+            depth -= 1
+        elif match.group("clause") and depth == 0:
+            clause = match.group("clause").upper()
+            if start is None and clause == "WHERE":
+                start = match.end()
+            elif start is not None or clause != "WHERE":
+                return (start, match.start()) if start is not None else (None, match.start())
+    return (start, len(sql.rstrip().rstrip(";"))) if start is not None else (None, len(sql.rstrip().rstrip(";")))
+
+def _partition_window(partition, kind):
+    """Return a predicate keeping the last PARTITION_FILTER_DAYS days of a partition column"""
+    kind = (kind or "DATE").upper()
+    if kind == "TIMESTAMP":
+        bound = f"TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {PARTITION_FILTER_DAYS} DAY)"
+    elif kind == "DATETIME":
+        bound = f"DATETIME_SUB(CURRENT_DATETIME(), INTERVAL {PARTITION_FILTER_DAYS} DAY)"
+    else:
+        bound = f"DATE_SUB(CURRENT_DATE(), INTERVAL {PARTITION_FILTER_DAYS} DAY)"
+    return f"{partition} >= {bound}"
+
+def rewrite_query(sql, question, profiles, lookup):
+    """
+    Narrow SELECT * in an exploratory query
+
+    Only row previews (SELECT ... LIMIT on one table) are rewritten.
+    SELECT * is projected to the columns the question mentions (or the first
+    PREVIEW_COLUMNS); the preview returns the same rows with fewer columns.
+
+    Returns:
+        tuple: (sql, list of applied rewrite descriptions)
+    """
+    tokens = tokenize(sql)
+    clauses = parse_clauses(sql)
+    if not _is_exploratory(tokens, clauses):
+        return sql, []
+
+    profile = profiles.get(lookup.get(clauses["tables"][0], clauses["tables"][0]))
+    if not profile:
+        return sql, []
+
+    notes = []
+    columns = profile["columns"]
+    if columns and clauses["select"] == ("*",):
+        words = set(re.findall(r"[a-z0-9_]+", (question or "").lower()))
+        selected = [c for c in columns if c.lower() in words] or columns[:PREVIEW_COLUMNS]
+        if len(selected) < len(columns):
+            sql = re.sub(r"^\s*SELECT\s+\*", "SELECT " + ", ".join(selected), sql, count=1, flags=re.IGNORECASE)
+            notes.append(f"Selected {len(selected)} of {len(columns)} columns instead of *")
+    return sql, notes
+
+def suggest_partition_filter(sql, profiles, lookup):
+    """
+    Suggest a recent partition window for an exploratory query
+
+    A window changes which rows a preview returns, so it is only offered to
+    the user, never applied. The existing predicate is kept whole inside
+    parentheses, so an OR in it cannot escape the window.
+
+    Returns:
+        dict: sql and note of the suggested query, or None
+    """
+    tokens = tokenize(sql)
+    clauses = parse_clauses(sql)
+    if not _is_exploratory(tokens, clauses):
+        return None
+    profile = profiles.get(lookup.get(clauses["tables"][0], clauses["tables"][0]))
+    partition = profile and profile["partition_column"]
+    where = " ".join(clauses["where"]).lower()
+    if not partition or re.search(rf"\b{re.escape(partition.lower())}\b", where):
+        return None
+
+    window = _partition_window(partition, profile.get("partition_type"))
+    start, end = _where_span(sql)
+    if start is not None:
+        suggested = f"{sql[:start]} {window} AND ({sql[start:end].strip()}) {sql[end:].lstrip()}"
+    else:
+        suggested = f"{sql[:end].rstrip()} WHERE {window} {sql[end:].lstrip()}"
+    return {
+        "sql": suggested.strip(),
+        "note": f"Filter to the last {PARTITION_FILTER_DAYS} days of {partition} partitions"
+    }
+
+def _budgets():
+    """Return the scan budgets, workspace id -> {limit_bytes, used_bytes, queries}"""
+    if 'scan_budgets' not in st.session_state:
+        st.session_state.scan_budgets = {}
+    return st.session_state.scan_budgets
+
+def get_budget(workspace_id):
+    """Return the scan budget of a workspace, creating it with the default limit"""
+    return _budgets().setdefault(workspace_id, {
+        "limit_bytes": int(WORKSPACE_SCAN_BUDGET_GB * 1024 ** 3),
+        "used_bytes": 0,
+        "queries": 0
+    })
+
+def set_budget_limit(workspace_id, limit_bytes):
+    """Change the scan budget of a workspace"""
+    if limit_bytes < 0:
+        raise ValueError("The scan budget cannot be negative")
+    get_budget(workspace_id)["limit_bytes"] = int(limit_bytes)
+
+def plan_query(sql, question, dataset, knowledge, lookup, workspace_id):
+    """
+    Check a generated query before it runs
+
+    Narrows SELECT * previews, estimates the bytes scanned, compares them
+    with the workspace budget and suggests a partition window when one
+    would cut the scan.
+
+    Args:
+        sql (str): Generated SQL
+        question (str): The user's question, used to pick preview columns
+        dataset (dict): Dataset the assistant queries
+        knowledge (str): Knowledge data of the assistant's material
+        lookup (dict): Table reference -> fully qualified name
+        workspace_id (str): Workspace that is billed
+
+    Returns:
+        dict: sql (possibly rewritten), original_sql, rewrites, estimate,
+            status ("ok", "warn" or "block"), message and suggestion
+            (sql, note and total_bytes of a cheaper query, or None)
+    """
+    profiles = table_profiles(dataset, knowledge)
+    rewritten, rewrites = rewrite_query(sql, question, profiles, lookup)
+    estimate = estimate_bytes(rewritten, profiles, lookup)
+    suggestion = suggest_partition_filter(rewritten, profiles, lookup)
+    if suggestion:
+        suggestion["total_bytes"] = estimate_bytes(suggestion["sql"], profiles, lookup)["total_bytes"]
+        if suggestion["total_bytes"] >= estimate["total_bytes"]:
+            suggestion = None
+    budget = get_budget(workspace_id)
+    remaining = budget["limit_bytes"] - budget["used_bytes"]
+    scanned = estimate["total_bytes"]
+
+    if scanned > remaining:
+        status = "block"
+        message = (f"Blocked: this query would scan about {format_bytes(scanned)}, "
+                   f"but only {format_bytes(max(remaining, 0))} of the workspace budget is left.")
+    elif scanned > budget["limit_bytes"] * WARN_QUERY_FRACTION:
+        status = "warn"
+        message = f"This query scans about {format_bytes(scanned)}, a large share of the workspace budget."
+    else:
+        status = "ok"
+        message = f"Estimated scan: {format_bytes(scanned)}"
+
+    return {
+        "sql": rewritten,
+        "original_sql": sql,
+        "rewrites": rewrites,
+        "estimate": estimate,
+        "status": status,
+        "message": message,
+        "suggestion": suggestion
+    }
+
+def charge(workspace_id, scanned_bytes):
+    """Add the bytes of an executed query to the workspace budget"""
+    budget = get_budget(workspace_id)
+    budget["used_bytes"] += int(scanned_bytes)
+    budget["queries"] += 1
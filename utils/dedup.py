@@ -0,0 +1,213 @@
+import re
+
+import numpy as np
+from utils.hashing import stable_int
+from utils.sql_lexer import tokenize, IDENTIFIER, QUOTED_IDENTIFIER, STRING, NUMBER
+
+# MinHash signature length and LSH banding (NUM_PERM = BANDS * ROWS)
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Jaccard similarity above which two pairs count as near-duplicates
+DEFAULT_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed so signatures are comparable across processes
+_rng = np.random.RandomState(20240101)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def _nl_features(text):
+    """Word unigrams and bigrams of the natural language side"""
+    words = _WORD.findall(text.lower())
+    features = [f"w:{w}" for w in words]
+    features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    return features
+
+def _sql_features(sql):
+    """
+    Token 3-grams of the SQL with literals masked, a structural fingerprint,
+    plus the literals themselves so queries from one template with different
+    values stay apart
+    """
+    values = []
+    literals = []
+    for token in tokenize(sql):
+        if token.kind in (STRING, NUMBER):
+            values.append("?")
+            literals.append(f"l:{token.value}")
+        elif token.kind in (IDENTIFIER, QUOTED_IDENTIFIER):
+            values.append(token.value.strip("`").lower())
+        else:
+            values.append(token.value)
+    return [f"s:{' '.join(values[i:i + 3])}" for i in range(max(len(values) - 2, 1))] + literals
+
+def _features(pair):
+    """Return the feature set of one {"nl", "sql"} pair"""
+    return set(_nl_features(pair.get("nl", "")) + _sql_features(pair.get("sql", ""))) or {""}
+
+def _feature_hashes(pair):
+    """Return the 32-bit hashes of the features of one {"nl", "sql"} pair"""
+    features = _features(pair)
+    return np.fromiter(
+        (stable_int(f, digest_size=4) for f in features),
+        dtype=np.uint64,
+        count=len(features)
+    )
+
+def minhash_signatures(pairs):
+    """
+    Compute MinHash signatures for a list of pairs
+
+    Args:
+        pairs (list): {"nl", "sql"} records
+
+    Returns:
+        np.ndarray: (len(pairs), NUM_PERM) uint64 matrix
+    """
+    signatures = np.empty((len(pairs), NUM_PERM), dtype=np.uint64)
+    for idx, pair in enumerate(pairs):
+        hashes = _feature_hashes(pair)
+        permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+        signatures[idx] = (permuted & _MAX_HASH).min(axis=1)
+    return signatures
+
+def _band_keys(signature):
+    """Return one hashable key per LSH band"""
+    return [(band, signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+def _jaccard(a, b):
+    """Exact Jaccard similarity of two feature sets"""
+    return len(a & b) / len(a | b)
+
+def _is_duplicate(pairs_a, idx_a, pairs_b, idx_b, features, threshold):
+    """
+    Check an LSH candidate on the exact Jaccard similarity of its feature
+    sets, so signature noise never merges distinct pairs
+
+    Feature sets are built on first use and kept in features.
+    """
+    for key, pairs, idx in (("a", pairs_a, idx_a), ("b", pairs_b, idx_b)):
+        if (key, idx) not in features:
+            features[(key, idx)] = _features(pairs[idx])
+    return _jaccard(features[("a", idx_a)], features[("b", idx_b)]) >= threshold
+
+def find_duplicate_groups(pairs, threshold=DEFAULT_THRESHOLD, signatures=None):
+    """
+    Group near-duplicate pairs within one set
+
+    Each pair is only compared with the first member of the LSH buckets it
+    falls into, so the cost stays close to linear even for large sets with
+    many exact copies. Candidates are confirmed on their exact Jaccard
+    similarity before they are grouped.
+
+    Args:
+        pairs (list): {"nl", "sql"} records
+        threshold (float): Minimum Jaccard similarity
+        signatures (np.ndarray): Precomputed signatures, optional
+
+    Returns:
+        list: Groups of indices (ascending, size > 1), the first is kept on dedup
+    """
+    if signatures is None:
+        signatures = minhash_signatures(pairs)
+
+    parent = list(range(len(pairs)))
+    features = {}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = {}
+    for idx in range(len(pairs)):
+        for key in _band_keys(signatures[idx]):
+            representative = buckets.setdefault(key, idx)
+            if representative == idx:
+                continue
+            root_a, root_b = find(representative), find(idx)
+            if root_a != root_b and _is_duplicate(pairs, representative, pairs, idx, features, threshold):
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    groups = {}
+    for idx in range(len(pairs)):
+        groups.setdefault(find(idx), []).append(idx)
+    return [members for members in groups.values() if len(members) > 1]
+
+def find_cross_duplicates(train_pairs, test_pairs, threshold=DEFAULT_THRESHOLD):
+    """
+    Find training pairs that are near-duplicates of test pairs
+
+    Args:
+        train_pairs (list): Training {"nl", "sql"} records
+        test_pairs (list): Test {"nl", "sql"} records
+        threshold (float): Minimum Jaccard similarity
+
+    Returns:
+        list: (train index, test index) tuples
+    """
+    test_signatures = minhash_signatures(test_pairs)
+    buckets = {}
+    for idx in range(len(test_pairs)):
+        for key in _band_keys(test_signatures[idx]):
+            buckets.setdefault(key, []).append(idx)
+
+    train_signatures = minhash_signatures(train_pairs)
+    features = {}
+    leaks = []
+    for train_idx in range(len(train_pairs)):
+        checked = set()
+        for key in _band_keys(train_signatures[train_idx]):
+            for test_idx in buckets.get(key, ()):
+                if test_idx in checked:
+                    continue
+                checked.add(test_idx)
+                if _is_duplicate(train_pairs, train_idx, test_pairs, test_idx, features, threshold):
+                    leaks.append((train_idx, test_idx))
+                    break
+            else:
+                continue
+            break
+    return leaks
+
+def dedup_pairs(pairs, threshold=DEFAULT_THRESHOLD):
+    """
+    Drop near-duplicates within one set, keeping the first of each group
+
+    Returns:
+        tuple: (kept pairs, number of removed pairs)
+    """
+    removed = set()
+    for group in find_duplicate_groups(pairs, threshold):
+        removed.update(group[1:])
+    return [pair for idx, pair in enumerate(pairs) if idx not in removed], len(removed)
+
+def dedup_material_sets(training_set, test_set, threshold=DEFAULT_THRESHOLD):
+    """
+    Deduplicate both sets of a material and remove test leakage from training
+
+    Test items are never removed because of the training set; leaking
+    training pairs are dropped instead.
+
+    Returns:
+        tuple: (training set, test set, report dict with removed counts)
+    """
+    training_set, train_duplicates = dedup_pairs(training_set, threshold)
+    test_set, test_duplicates = dedup_pairs(test_set, threshold)
+
+    leaking = {train_idx for train_idx, _ in find_cross_duplicates(training_set, test_set, threshold)}
+    training_set = [pair for idx, pair in enumerate(training_set) if idx not in leaking]
+
+    report = {
+        "train_duplicates": train_duplicates,
+        "test_duplicates": test_duplicates,
+        "test_leaks": len(leaking)
+    }
+    return training_set, test_set, report
@@ -0,0 +1,200 @@
+import datetime
+from collections import Counter
+from functools import lru_cache
+
+from utils.hashing import stable_hash
+from utils.sql_diff import compute_diff
+from utils.sql_lexer import tokenize, IDENTIFIER, QUOTED_IDENTIFIER, STRING, NUMBER
+from utils.sql_structure import parse_clauses, structural_diff
+from utils.sql_validator import validate_sql
+
+# Failure categories, highest priority first
+CATEGORY_LABELS = {
+    "invalid_sql": "Invalid SQL",
+    "wrong_table": "Wrong table",
+    "missing_join": "Missing join",
+    "extra_join": "Extra join",
+    "join_condition": "Join condition",
+    "wrong_aggregate": "Wrong aggregate",
+    "select_list": "Select list",
+    "distinct": "DISTINCT",
+    "missing_predicate": "Missing predicate",
+    "extra_predicate": "Extra predicate",
+    "predicate_change": "Predicate change",
+    "grouping": "Grouping",
+    "having": "HAVING",
+    "ordering": "Ordering",
+    "limit": "LIMIT/OFFSET",
+    "other": "Other"
+}
+
+AGGREGATE_FUNCTIONS = frozenset([
+    "COUNT", "SUM", "AVG", "MIN", "MAX", "COUNTIF", "ANY_VALUE",
+    "ARRAY_AGG", "STRING_AGG", "APPROX_COUNT_DISTINCT", "STDDEV", "VARIANCE"
+])
+
+# Number of example test result indices stored per cluster
+CLUSTER_EXAMPLES = 5
+
+def _aggregates(select_items):
+    """Return the aggregate functions used in a SELECT list"""
+    found = Counter()
+    for item in select_items:
+        for token in tokenize(item):
+            if token.kind == IDENTIFIER and token.value.upper() in AGGREGATE_FUNCTIONS:
+                found[token.value.upper()] += 1
+    return found
+
+@lru_cache(maxsize=4096)
+def classify_failure(expected_sql, generated_sql):
+    """
+    Classify a failed test result by its structural differences
+
+    Args:
+        expected_sql (str): The expected/correct SQL query
+        generated_sql (str): The generated SQL query
+
+    Returns:
+        tuple: Category names ordered by priority, never empty
+    """
+    if not validate_sql(generated_sql):
+        return ("invalid_sql",)
+
+    expected = parse_clauses(expected_sql)
+    generated = parse_clauses(generated_sql)
+    categories = set()
+
+    if set(expected["tables"]) != set(generated["tables"]):
+        categories.add("wrong_table")
+
+    for difference in structural_diff(expected_sql, generated_sql):
+        clause = difference["clause"]
+        removed, added = difference["removed"], difference["added"]
+        if difference["label"] == "SELECT DISTINCT":
+            categories.add("distinct")
+        elif clause == "select":
+            if _aggregates(expected["select"]) != _aggregates(generated["select"]):
+                categories.add("wrong_aggregate")
+            else:
+                categories.add("select_list")
+        elif clause == "joins":
+            if len(generated["joins"]) < len(expected["joins"]):
+                categories.add("missing_join")
+            elif len(generated["joins"]) > len(expected["joins"]):
+                categories.add("extra_join")
+            elif "wrong_table" not in categories:
+                categories.add("join_condition")
+        elif clause == "where":
+            if len(removed) > len(added):
+                categories.add("missing_predicate")
+            elif len(added) > len(removed):
+                categories.add("extra_predicate")
+            else:
+                categories.add("predicate_change")
+        elif clause == "group_by":
+            categories.add("grouping")
+        elif clause in ("having", "qualify"):
+            categories.add("having")
+        elif clause == "order_by":
+            categories.add("ordering")
+        elif clause in ("limit", "offset"):
+            categories.add("limit")
+
+    if not categories:
+        categories.add("other")
+    return tuple(name for name in CATEGORY_LABELS if name in categories)
+
+def _mask(token, next_token):
+    """Replace literals and plain identifiers by placeholders"""
+    if token.kind in (STRING, NUMBER):
+        return "?"
+    if token.kind == QUOTED_IDENTIFIER:
+        return "<id>"
+    if token.kind == IDENTIFIER:
+        # Function names are kept, they are usually the point of the edit
+        if next_token is not None and next_token.value == "(":
+            return token.value.upper()
+        return "<id>"
+    return token.value
+
+@lru_cache(maxsize=4096)
+def failure_signature(expected_sql, generated_sql):
+    """
+    Return a signature shared by failures with the same kind of edit
+
+    The signature combines the categories with the token-level edit, where
+    literals and column names are masked. "date = x" -> "LOWER(date) = x"
+    and "name = y" -> "LOWER(name) = y" get the same signature.
+
+    Returns:
+        str: Short hex signature
+    """
+    diff = compute_diff(expected_sql, generated_sql)
+    expected_tokens = tokenize(expected_sql)
+    generated_tokens = tokenize(generated_sql)
+
+    edits = []
+    for tag, i1, i2, j1, j2 in diff["token_opcodes"]:
+        if tag == "equal":
+            continue
+        for i in range(i1, i2):
+            following = expected_tokens[i + 1] if i + 1 < len(expected_tokens) else None
+            edits.append("-" + _mask(expected_tokens[i], following))
+        for j in range(j1, j2):
+            following = generated_tokens[j + 1] if j + 1 < len(generated_tokens) else None
+            edits.append("+" + _mask(generated_tokens[j], following))
+
+    categories = "|".join(classify_failure(expected_sql, generated_sql))
+    return stable_hash(categories, " ".join(sorted(edits)), digest_size=6)
+
+def analyze_experiment(experiment):
+    """
+    Classify and cluster every failed test result of an experiment
+
+    Runs once when an experiment finishes. Each failed result gets its
+    error_categories and cluster_id, and the histogram and clusters are
+    stored in experiment['results']['analysis'].
+
+    Args:
+        experiment (dict): Experiment with results.test_results
+
+    Returns:
+        dict: The stored analysis
+    """
+    category_counts = Counter()
+    clusters = {}
+
+    for idx, result in enumerate(experiment['results']['test_results']):
+        if result['is_correct']:
+            continue
+        categories = classify_failure(result['expected_sql'], result['generated_sql'])
+        signature = failure_signature(result['expected_sql'], result['generated_sql'])
+        result['error_categories'] = list(categories)
+        result['cluster_id'] = signature
+
+        category_counts.update(categories)
+        cluster = clusters.setdefault(signature, {
+            "cluster_id": signature,
+            "categories": list(categories),
+            "count": 0,
+            "example_indices": []
+        })
+        cluster["count"] += 1
+        if len(cluster["example_indices"]) < CLUSTER_EXAMPLES:
+            cluster["example_indices"].append(idx)
+
+    analysis = {
+        "failed_count": sum(c["count"] for c in clusters.values()),
+        "category_counts": {name: category_counts[name] for name in CATEGORY_LABELS if category_counts[name]},
+        "clusters": sorted(clusters.values(), key=lambda c: c["count"], reverse=True),
+        "analyzed_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    experiment['results']['analysis'] = analysis
+    return analysis
+
+def get_analysis(experiment):
+    """Return the stored analysis, running it once for older experiments"""
+    analysis = experiment['results'].get('analysis')
+    if analysis is None:
+        analysis = analyze_experiment(experiment)
+    return analysis
@@ -0,0 +1,181 @@
+import datetime
+
+import numpy as np
+import streamlit as st
+from utils.prompt_context import estimate_tokens
+
+# Columns of the summary table, one value per experiment
+COLUMNS = [
+    "id", "workspace_id", "name", "dataset", "material", "train_set", "test_set", "status",
+    "created_at", "created_ts", "total", "correct", "failed", "generation_errors",
+    "accuracy", "error_rate", "duration_s", "mean_latency_ms", "tokens"
+]
+
+_NUMERIC = {
+    "created_ts", "total", "correct", "failed", "generation_errors",
+    "accuracy", "error_rate", "duration_s", "mean_latency_ms", "tokens"
+}
+
+def _compute(experiment, duration_s=None):
+    """Compute the summary metrics of an experiment from its test results"""
+    results = experiment['results']['test_results']
+    total = len(results)
+    correct = sum(1 for r in results if r['is_correct'])
+    latencies = [r['latency_ms'] for r in results if r.get('latency_ms') is not None]
+    return {
+        "total": total,
+        "correct": correct,
+        "failed": total - correct,
+        "generation_errors": sum(1 for r in results if r.get('error')),
+        "accuracy": correct / total if total else 0.0,
+        "error_rate": (total - correct) / total if total else 0.0,
+        "duration_s": float(duration_s) if duration_s is not None else sum(latencies) / 1000,
+        "mean_latency_ms": float(np.mean(latencies)) if latencies else 0.0,
+        # Prompt and completion size of the run, the basis of its model cost
+        "tokens": sum(estimate_tokens(r['nl']) + estimate_tokens(r['generated_sql']) for r in results)
+    }
+
+def _row(experiment, summary):
+    """Return the summary table row of an experiment"""
+    material = experiment.get('material', {})
+    dataset = experiment['dataset']
+    # Parsed once here so the trend chart sorts on plain numbers
+    created = datetime.datetime.strptime(experiment['created_at'], "%Y-%m-%d %H:%M:%S")
+    return dict(
+        summary,
+        id=experiment['id'],
+        workspace_id=experiment['workspace_id'],
+        name=experiment['name'],
+        dataset=f"{dataset['project']}.{dataset['dataset']}",
+        material=material.get('name', ""),
+        train_set=material.get('train_set_name', 'Unknown'),
+        test_set=material.get('test_set_name', ""),
+        status=experiment['status'],
+        created_at=experiment['created_at'],
+        created_ts=created.timestamp()
+    )
+
+def summarize_experiment(experiment, duration_s=None):
+    """
+    Compute the summary metrics of a finished experiment and add them to the table
+
+    Runs once when an experiment finishes. The metrics are stored in
+    experiment['results']['summary'], results.accuracy is set from them, and
+    the experiment's row in the summary table is added or replaced.
+
+    Args:
+        experiment (dict): Experiment with results.test_results
+        duration_s (float): Wall time the test set took, if measured
+
+    Returns:
+        dict: The stored summary
+    """
+    summary = _compute(experiment, duration_s)
+    experiment['results']['summary'] = summary
+    experiment['results']['accuracy'] = summary['accuracy']
+    _append_row(_table(backfill=False), _row(experiment, summary))
+    return summary
+
+def get_summary(experiment):
+    """Return the stored summary, computing it once for older experiments"""
+    summary = experiment['results'].get('summary')
+    if summary is None:
+        summary = summarize_experiment(experiment)
+    return summary
+
+def _table(backfill=True):
+    """
+    Return the summary table of this session
+
+    The table holds a list per column, a row index by experiment id and
+    cached numpy arrays that are rebuilt after rows change. On read it is
+    reconciled with the experiments by id: experiments missing from it, such
+    as ones created before it existed, are added and rows of deleted
+    experiments are dropped.
+    """
+    if 'experiment_summaries' not in st.session_state:
+        st.session_state.experiment_summaries = {
+            "columns": {name: [] for name in COLUMNS},
+            "rows": {},
+            "arrays": None
+        }
+    table = st.session_state.experiment_summaries
+    if backfill:
+        experiments = st.session_state.get('experiments', [])
+        ids = {experiment['id'] for experiment in experiments}
+        if ids != table["rows"].keys():
+            _drop_rows(table, table["rows"].keys() - ids)
+            for experiment in experiments:
+                if experiment['id'] in table["rows"]:
+                    continue
+                if 'summary' in experiment['results']:
+                    _append_row(table, _row(experiment, experiment['results']['summary']))
+                else:
+                    summarize_experiment(experiment)
+    return table
+
+def _append_row(table, row):
+    """Add a row to the summary table, or replace the row with the same id"""
+    position = table["rows"].get(row["id"])
+    if position is None:
+        table["rows"][row["id"]] = len(table["columns"]["id"])
+        for name in COLUMNS:
+            table["columns"][name].append(row[name])
+    else:
+        for name in COLUMNS:
+            table["columns"][name][position] = row[name]
+    table["arrays"] = None
+
+def _drop_rows(table, ids):
+    """Remove the rows of the given experiment ids and renumber the rest"""
+    if not ids:
+        return
+    keep = [position for position, row_id in enumerate(table["columns"]["id"]) if row_id not in ids]
+    for name in COLUMNS:
+        values = table["columns"][name]
+        table["columns"][name] = [values[position] for position in keep]
+    table["rows"] = {row_id: position for position, row_id in enumerate(table["columns"]["id"])}
+    table["arrays"] = None
+
+def get_arrays():
+    """
+    Return the summary table as numpy arrays, one per column
+
+    The arrays are cached until an experiment is summarized again, so list
+    filters, sorting and charts are vectorized reads.
+    """
+    table = _table()
+    if table["arrays"] is None:
+        table["arrays"] = {
+            name: np.asarray(values, dtype=float if name in _NUMERIC else object)
+            for name, values in table["columns"].items()
+        }
+    return table["arrays"]
+
+def workspace_summaries(workspace_id, test_set=None):
+    """
+    Return the summary rows of a workspace as a DataFrame
+
+    Args:
+        workspace_id (str): Workspace to list
+        test_set (str): Only experiments on this test set, all if omitted
+
+    Returns:
+        DataFrame: One row per experiment, in creation order, with the
+            columns of COLUMNS
+    """
+    import pandas as pd
+
+    arrays = get_arrays()
+    mask = arrays["workspace_id"] == workspace_id
+    if test_set is not None:
+        mask &= arrays["test_set"] == test_set
+    return pd.DataFrame({name: values[mask] for name, values in arrays.items()})
+
+def test_set_names(workspace_id):
+    """Return the named test sets used by a workspace's experiments, in first-use order"""
+    import pandas as pd
+
+    arrays = get_arrays()
+    names = arrays["test_set"][arrays["workspace_id"] == workspace_id]
+    return [name for name in pd.unique(names) if name]
@@ -0,0 +1,305 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import utils.sql_generator as sql_generator
+from utils.hashing import stable_hash
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, dispatched in this order
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+# Batching, concurrency and rate limits used for backends without their own
+DEFAULT_LIMITS = {
+    "max_batch_size": 16,            # requests per backend call
+    "max_wait_ms": 10,               # how long the first batch request waits for company
+    "interactive_max_wait_ms": 2,    # the same for interactive requests
+    "max_concurrency": 4,            # backend calls in flight at once
+    "reserved_interactive_slots": 1,  # call slots batch-only calls may not use
+    "max_queued_batch": 256,         # batch requests queued before submitters wait
+    "rate_limit_rps": None           # requests per second, None for unlimited
+}
+
+# Per-backend overrides of DEFAULT_LIMITS
+BACKEND_LIMITS = {}
+
+# Threads running backend calls, shared by every backend
+DISPATCH_WORKERS = 8
+
+# Seconds a blocking generate call waits for its result
+RESULT_TIMEOUT_SECONDS = 120
+
+# Queue waits kept per priority class for the percentiles
+WAIT_WINDOW = 1000
+
+_lock = threading.Condition()
+# (backend, options hash) -> priority -> workspace id -> deque of (request, future, enqueued_at)
+_pending = {}
+_group_options = {}  # (backend, options hash) -> backend options of the group
+_in_flight = {}  # backend -> running calls
+_buckets = {}  # backend -> {"tokens", "updated"}
+_stats = {"submitted": 0, "batches": 0, "batched_requests": 0, "rate_limited": 0, "throttled": 0}
+_waits = {priority: deque(maxlen=WAIT_WINDOW) for priority in PRIORITIES}  # queue waits in ms
+_executor = ThreadPoolExecutor(max_workers=DISPATCH_WORKERS, thread_name_prefix="generation")
+_dispatcher = None
+
+def get_limits(backend):
+    """Return the effective limits of a backend"""
+    return dict(DEFAULT_LIMITS, **BACKEND_LIMITS.get(backend, {}))
+
+def configure_backend(backend, **limits):
+    """Override batching, concurrency or rate limits of a backend"""
+    unknown = set(limits) - set(DEFAULT_LIMITS)
+    if unknown:
+        raise ValueError(f"Unknown scheduler limits: {', '.join(sorted(unknown))}")
+    with _lock:
+        BACKEND_LIMITS.setdefault(backend, {}).update(limits)
+        _lock.notify_all()
+
+def _take_tokens(backend, count, limits, now):
+    """
+    Take count tokens from a backend's rate limit bucket
+
+    Returns:
+        float: 0 if taken, else seconds until enough tokens are available
+    """
+    rate = limits["rate_limit_rps"]
+    if not rate:
+        return 0.0
+    capacity = max(rate, limits["max_batch_size"])
+    bucket = _buckets.setdefault(backend, {"tokens": capacity, "updated": now})
+    bucket["tokens"] = min(capacity, bucket["tokens"] + (now - bucket["updated"]) * rate)
+    bucket["updated"] = now
+    if bucket["tokens"] >= count:
+        bucket["tokens"] -= count
+        return 0.0
+    return (count - bucket["tokens"]) / rate
+
+def _run_batch(backend, options, batch):
+    """Call the backend for one micro-batch and resolve its futures"""
+    try:
+        results = sql_generator.generate_batch([request for request, _, _ in batch], backend, **options)
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+        if len(results) != len(batch):
+            raise RuntimeError(f"Backend {backend} returned {len(results)} results for {len(batch)} requests")
+    except Exception as e:
+        logger.exception("Generation batch of %d requests failed", len(batch))
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(e)
+    finally:
+        with _lock:
+            _in_flight[backend] -= 1
+            _lock.notify_all()
+
+def _sooner(current, candidate):
+    return candidate if current is None else min(current, candidate)
+
+def _count(queues):
+    return sum(len(queue) for queue in queues.values())
+
+def _oldest(queues):
+    return min((queue[0][2] for queue in queues.values() if queue), default=None)
+
+def _take_fair(queues, count):
+    """
+    Take up to count requests, one workspace at a time in turn
+
+    Each workspace that gives a request moves to the back of the rotation,
+    so a workspace with a huge experiment gets the same share as one with a
+    small experiment.
+    """
+    taken = []
+    while len(taken) < count and queues:
+        workspace_id, queue = next(iter(queues.items()))
+        taken.append(queue.popleft())
+        del queues[workspace_id]
+        if queue:
+            queues[workspace_id] = queue
+    return taken
+
+def _queued(backend, priority):
+    return sum(_count(classes[priority]) for key, classes in _pending.items() if key[0] == backend)
+
+def _next_batch(now):
+    """
+    Pop the next micro-batch that may be dispatched
+
+    A group is ready when it holds max_batch_size requests or its oldest
+    request has waited its class's max wait. Interactive requests fill a
+    batch first and batch requests fill the rest. Batches without
+    interactive requests leave reserved_interactive_slots call slots free,
+    so chat never waits behind a backend saturated by experiments.
+
+    Returns:
+        tuple: ((backend, options, batch) or None, seconds until something may be ready)
+    """
+    sleep = None
+    # Groups holding interactive requests are looked at first
+    ordered = sorted(_pending.items(), key=lambda item: not _count(item[1][INTERACTIVE]))
+    for key, classes in ordered:
+        backend = key[0]
+        limits = get_limits(backend)
+        interactive = _count(classes[INTERACTIVE])
+        total = interactive + _count(classes[BATCH])
+        if not total:
+            continue
+        size = min(total, limits["max_batch_size"])
+
+        if size < limits["max_batch_size"]:
+            deadlines = []
+            if interactive:
+                deadlines.append(_oldest(classes[INTERACTIVE]) + limits["interactive_max_wait_ms"] / 1000)
+            if total > interactive:
+                deadlines.append(_oldest(classes[BATCH]) + limits["max_wait_ms"] / 1000)
+            if min(deadlines) > now:
+                sleep = _sooner(sleep, min(deadlines) - now)
+                continue
+
+        slots = limits["max_concurrency"]
+        if not interactive:
+            slots = max(slots - limits["reserved_interactive_slots"], 1)
+        if _in_flight.get(backend, 0) >= slots:
+            continue
+        delay = _take_tokens(backend, size, limits, now)
+        if delay:
+            _stats["rate_limited"] += 1
+            sleep = _sooner(sleep, delay)
+            continue
+
+        batch = []
+        for priority in PRIORITIES:
+            taken = _take_fair(classes[priority], size - len(batch))
+            _waits[priority].extend((now - enqueued) * 1000 for _, _, enqueued in taken)
+            batch += taken
+        options = _group_options[key]
+        if not _count(classes[INTERACTIVE]) and not _count(classes[BATCH]):
+            del _pending[key]
+            del _group_options[key]
+        return (backend, options, batch), 0.0
+    return None, sleep
+
+def _dispatch_loop():
+    with _lock:
+        while True:
+            now = time.monotonic()
+            ready, sleep = _next_batch(now)
+            if ready is None:
+                _lock.wait(timeout=sleep)
+                continue
+            backend, options, batch = ready
+            _in_flight[backend] = _in_flight.get(backend, 0) + 1
+            _stats["batches"] += 1
+            _stats["batched_requests"] += len(batch)
+            _executor.submit(_run_batch, backend, options, batch)
+            # Wake batch submitters waiting for queue space
+            _lock.notify_all()
+
+def _ensure_dispatcher():
+    global _dispatcher
+    if _dispatcher is None or not _dispatcher.is_alive():
+        _dispatcher = threading.Thread(target=_dispatch_loop, name="generation-dispatcher", daemon=True)
+        _dispatcher.start()
+
+def submit_many(requests, backend=None, priority=BATCH, workspace_id=None, **options):
+    """
+    Queue generation requests for micro-batching
+
+    Requests from every session and experiment that share a backend and
+    options are batched together. Batch requests wait here while the
+    backend already has max_queued_batch of them queued; interactive
+    requests are always accepted.
+
+    Args:
+        requests (list): Request dicts, see utils.sql_generator.generate_batch
+        backend (str): Registered backend name, the default one if omitted
+        priority (str): INTERACTIVE for chat, BATCH for experiments
+        workspace_id (str): Workspace the requests are shared fairly within
+        **options: Backend options
+
+    Returns:
+        list: One Future per request, resolving to its result dict
+
+    Raises:
+        ValueError: If the backend or priority is unknown
+        TimeoutError: If batch requests could not be queued in time
+    """
+    name = backend or sql_generator.DEFAULT_BACKEND
+    if name not in sql_generator.get_backend_names():
+        raise ValueError(f"Unknown SQL generator backend: {name}")
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority class: {priority}")
+    # Options may hold lists such as stop sequences, so groups are keyed by their hash
+    key = (name, stable_hash(options))
+    futures = []
+    with _lock:
+        _ensure_dispatcher()
+        if priority == BATCH:
+            limit = get_limits(name)["max_queued_batch"]
+            if _queued(name, BATCH) >= limit:
+                _stats["throttled"] += 1
+                if not _lock.wait_for(lambda: _queued(name, BATCH) < limit, timeout=RESULT_TIMEOUT_SECONDS):
+                    raise TimeoutError("The generation queue stayed full")
+        classes = _pending.setdefault(key, {p: OrderedDict() for p in PRIORITIES})
+        _group_options.setdefault(key, dict(options))
+        queue = classes[priority].setdefault(workspace_id, deque())
+        now = time.monotonic()
+        for request in requests:
+            future = Future()
+            queue.append((request, future, now))
+            futures.append(future)
+        _stats["submitted"] += len(requests)
+        _lock.notify_all()
+    return futures
+
+def generate_many(requests, backend=None, priority=BATCH, workspace_id=None, **options):
+    """
+    Generate SQL for requests through the scheduler and wait for every result
+
+    At most enough requests to fill every call slot of the backend are
+    queued at a time, so a large experiment never puts thousands of
+    requests ahead of others.
+    """
+    limits = get_limits(backend or sql_generator.DEFAULT_BACKEND)
+    window = limits["max_batch_size"] * limits["max_concurrency"]
+    futures = deque()
+    results = []
+    position = 0
+    while position < len(requests) or futures:
+        # Keep the window full, then wait for the oldest outstanding request
+        while position < len(requests) and len(futures) < window:
+            chunk = requests[position:position + window - len(futures)]
+            futures.extend(submit_many(chunk, backend, priority, workspace_id, **options))
+            position += len(chunk)
+        results.append(futures.popleft().result(timeout=RESULT_TIMEOUT_SECONDS))
+    return results
+
+def generate(request, backend=None, priority=INTERACTIVE, workspace_id=None, **options):
+    """Generate SQL for one request through the scheduler and wait for it"""
+    return generate_many([request], backend, priority, workspace_id, **options)[0]
+
+def get_stats():
+    """Return queue depths, calls in flight, batching counters and queue wait percentiles"""
+    with _lock:
+        batches = _stats["batches"]
+        stats = dict(
+            _stats,
+            in_flight=sum(_in_flight.values()),
+            mean_batch_size=_stats["batched_requests"] / batches if batches else 0.0
+        )
+        for priority in PRIORITIES:
+            waits = np.fromiter(_waits[priority], dtype=float)
+            p50, p95 = np.percentile(waits, [50, 95]) if len(waits) else (0.0, 0.0)
+            stats[priority] = {
+                "queued": sum(_count(classes[priority]) for classes in _pending.values()),
+                "p50_wait_ms": float(p50),
+                "p95_wait_ms": float(p95)
+            }
+        return stats
@@ -0,0 +1,53 @@
+import hashlib
+import json
+
+# Default digest size in bytes (32 hex characters)
+DIGEST_SIZE = 16
+
+# Keeps these digests apart from other blake2b users of the same content
+_PERSON = b"bdastudio"
+
+def _encode(part):
+    """Encode one hash input as bytes"""
+    if part is None:
+        return b""
+    if isinstance(part, bytes):
+        return part
+    if isinstance(part, str):
+        return part.encode("utf-8")
+    # Dicts and lists are hashed by their canonical JSON form
+    return json.dumps(part, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+def stable_digest(*parts, digest_size=DIGEST_SIZE):
+    """
+    Return a blake2b digest of parts that is the same in every process
+
+    Unlike hash(), the result does not depend on PYTHONHASHSEED, so it can
+    be used for cache keys, fingerprints and persisted ids. Each part is
+    length-prefixed, so ("ab", "c") and ("a", "bc") differ.
+
+    Args:
+        *parts: str, bytes, None or JSON-serializable values
+        digest_size (int): Digest size in bytes, 1 to 64
+
+    Returns:
+        bytes: The digest
+    """
+    digest = hashlib.blake2b(digest_size=digest_size, person=_PERSON)
+    for part in parts:
+        data = _encode(part)
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.digest()
+
+def stable_hash(*parts, digest_size=DIGEST_SIZE):
+    """Return stable_digest as a hex string"""
+    return stable_digest(*parts, digest_size=digest_size).hex()
+
+def stable_int(*parts, digest_size=8):
+    """Return stable_digest as an unsigned integer"""
+    return int.from_bytes(stable_digest(*parts, digest_size=digest_size), "little")
+
+def stable_bucket(value, buckets):
+    """Map a value to one of buckets buckets, the same way in every process"""
+    return stable_int(value) % buckets
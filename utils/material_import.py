@@ -0,0 +1,172 @@
+import os
+
+import pandas as pd
+from utils.material_pipeline import EDITOR_COLUMNS, clean_pairs, find_invalid_sql, to_records
+
+# Rows read and validated per chunk
+IMPORT_CHUNK_ROWS = 10000
+
+# Invalid rows reported back to the user, the rest are only counted
+MAX_REPORTED_ERRORS = 50
+
+SUPPORTED_EXTENSIONS = {
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".xlsx": "excel",
+    ".parquet": "parquet"
+}
+
+# Accepted column names for each side of a pair, compared case-insensitively
+COLUMN_ALIASES = {
+    "natural_language": ["natural_language", "nl", "question", "natural language query", "prompt"],
+    "sql": ["sql", "sql_query", "query", "sql query", "answer"]
+}
+
+def detect_format(file_name):
+    """
+    Return the import format of a file from its extension
+
+    Raises:
+        ValueError: If the extension is not supported
+    """
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        supported = ", ".join(sorted(SUPPORTED_EXTENSIONS))
+        raise ValueError(f"Unsupported file type '{extension}'. Supported types: {supported}")
+    return SUPPORTED_EXTENSIONS[extension]
+
+def _rename_columns(chunk):
+    """Map known column aliases to natural_language and sql"""
+    lookup = {str(column).strip().lower(): column for column in chunk.columns}
+    renames = {}
+    for target, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lookup:
+                renames[lookup[alias]] = target
+                break
+    chunk = chunk.rename(columns=renames)
+    missing = [c for c in EDITOR_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise ValueError(
+            f"Missing column(s) {', '.join(missing)}. Expected a natural language column "
+            f"({', '.join(COLUMN_ALIASES['natural_language'])}) and a SQL column "
+            f"({', '.join(COLUMN_ALIASES['sql'])})."
+        )
+    return chunk
+
+def _iter_excel(file, chunk_rows):
+    """Stream rows of the first sheet of an .xlsx file"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Excel import requires the openpyxl package")
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+def _iter_parquet(file, chunk_rows):
+    """Stream record batches of a Parquet file"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet import requires the pyarrow package")
+
+    for batch in pq.ParquetFile(file).iter_batches(batch_size=chunk_rows):
+        yield batch.to_pandas()
+
+def iter_chunks(file, file_format, chunk_rows=IMPORT_CHUNK_ROWS):
+    """
+    Read a file in chunks of at most chunk_rows rows
+
+    Args:
+        file: Path or binary file-like object
+        file_format (str): One of the values of SUPPORTED_EXTENSIONS
+        chunk_rows (int): Rows per chunk
+
+    Yields:
+        pd.DataFrame: Raw chunk with the file's own column names
+    """
+    if file_format in ("csv", "tsv"):
+        yield from pd.read_csv(
+            file,
+            sep="\t" if file_format == "tsv" else ",",
+            dtype=str,
+            keep_default_na=False,
+            chunksize=chunk_rows
+        )
+    elif file_format == "jsonl":
+        yield from pd.read_json(file, lines=True, dtype=False, chunksize=chunk_rows)
+    elif file_format == "excel":
+        yield from _iter_excel(file, chunk_rows)
+    elif file_format == "parquet":
+        yield from _iter_parquet(file, chunk_rows)
+    else:
+        raise ValueError(f"Unsupported import format '{file_format}'")
+
+def import_pairs(file, file_format, records, skip_invalid=True, on_progress=None,
+                 chunk_rows=IMPORT_CHUNK_ROWS):
+    """
+    Stream pairs from a file into a list of stored records
+
+    Each chunk is cleaned, validated with the SQL validator and appended to
+    records before the next chunk is read, so the whole file is never held
+    as one DataFrame.
+
+    Args:
+        file: Path or binary file-like object
+        file_format (str): One of the values of SUPPORTED_EXTENSIONS
+        records (list): Target list, extended with {"nl", "sql"} records
+        skip_invalid (bool): Drop invalid SQL rows instead of importing them
+        on_progress (callable): Called with the stats dict after each chunk
+        chunk_rows (int): Rows per chunk
+
+    Returns:
+        dict: rows_read, imported, skipped_empty, invalid and errors
+            (up to MAX_REPORTED_ERRORS (row number, sql) tuples)
+
+    Raises:
+        ValueError: If the file cannot be read or lacks the needed columns
+    """
+    stats = {"rows_read": 0, "imported": 0, "skipped_empty": 0, "invalid": 0, "errors": []}
+
+    for chunk in iter_chunks(file, file_format, chunk_rows):
+        # Label rows by their position in the file so errors point at the source row
+        offset = stats["rows_read"]
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        stats["rows_read"] += len(chunk)
+
+        clean = clean_pairs(_rename_columns(chunk), keep_index=True)
+        stats["skipped_empty"] += len(chunk) - len(clean)
+
+        invalid = find_invalid_sql(clean)
+        if invalid:
+            stats["invalid"] += len(invalid)
+            room = MAX_REPORTED_ERRORS - len(stats["errors"])
+            stats["errors"].extend(invalid[:max(room, 0)])
+            if skip_invalid:
+                clean = clean.drop(index=[row - 1 for row, _ in invalid])
+
+        chunk_records = to_records(clean)
+        records.extend(chunk_records)
+        stats["imported"] += len(chunk_records)
+
+        if on_progress is not None:
+            on_progress(stats)
+
+    return stats
@@ -0,0 +1,76 @@
+import pandas as pd
+from utils.sql_validator import validate_sql
+
+# Editor column names and the names used in stored materials
+EDITOR_COLUMNS = ["natural_language", "sql"]
+RECORD_COLUMNS = {"natural_language": "nl", "sql": "sql"}
+
+def empty_pairs_frame():
+    """Return the one blank row shown in an empty editor"""
+    return pd.DataFrame({"natural_language": [""], "sql": [""]})
+
+def clean_pairs(df, keep_index=False):
+    """
+    Clean an editor DataFrame in a single vectorized pass
+
+    Strips both columns, treats nulls as empty and drops rows where either
+    side is empty.
+
+    Args:
+        df (pd.DataFrame): Frame with natural_language and sql columns
+        keep_index (bool): Keep the original row labels instead of renumbering
+
+    Returns:
+        pd.DataFrame: Clean frame, possibly empty
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=EDITOR_COLUMNS)
+
+    frame = df.reindex(columns=EDITOR_COLUMNS)
+    nl = frame["natural_language"].fillna("").astype(str).str.strip()
+    sql = frame["sql"].fillna("").astype(str).str.strip()
+    keep = (nl != "") & (sql != "")
+    clean = pd.DataFrame({"natural_language": nl[keep], "sql": sql[keep]})
+    return clean if keep_index else clean.reset_index(drop=True)
+
+def find_invalid_sql(clean_df):
+    """
+    Validate the SQL column of a clean frame
+
+    Args:
+        clean_df (pd.DataFrame): Output of clean_pairs
+
+    Returns:
+        list: (row number starting at 1, sql) tuples of invalid queries,
+            numbered from the frame's row labels
+    """
+    if clean_df.empty:
+        return []
+    valid = clean_df["sql"].map(validate_sql).astype(bool)
+    invalid = clean_df.loc[~valid, "sql"]
+    return [(idx + 1, sql) for idx, sql in invalid.items()]
+
+def to_records(clean_df):
+    """Convert a clean frame into stored {"nl", "sql"} records"""
+    return clean_df.rename(columns=RECORD_COLUMNS)[["nl", "sql"]].to_dict("records")
+
+def from_records(records):
+    """Convert stored {"nl", "sql"} records back into an editor frame"""
+    if not records:
+        return empty_pairs_frame()
+    return pd.DataFrame.from_records(records, columns=["nl", "sql"]).rename(
+        columns={v: k for k, v in RECORD_COLUMNS.items()}
+    )
+
+def prepare_pairs(df):
+    """
+    Clean, validate and convert an editor frame in one go
+
+    Args:
+        df (pd.DataFrame): Frame with natural_language and sql columns
+
+    Returns:
+        tuple: (clean frame for preview, stored records, invalid sql list)
+    """
+    clean = clean_pairs(df)
+    return clean, to_records(clean), find_invalid_sql(clean)
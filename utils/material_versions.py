@@ -0,0 +1,187 @@
+import datetime
+from difflib import SequenceMatcher
+
+import streamlit as st
+from utils.hashing import stable_digest, stable_hash
+
+# Material fields that are part of a version besides the pairs
+VERSIONED_FIELDS = ["name", "train_set_name", "test_set_name", "knowledge_data"]
+
+# Pair sets stored as patches in every version
+PAIR_SETS = ["training_set", "test_set"]
+
+def pair_hash(pair):
+    """Return the content digest of one {"nl", "sql"} pair"""
+    return stable_digest(pair.get("nl", ""), pair.get("sql", ""))
+
+def content_hash(material):
+    """
+    Return the version hash of a material's content
+
+    Covers the material id, the versioned fields and the ordered pairs of
+    both sets, so saving unchanged content yields the same hash.
+    """
+    parts = [material.get("id")]
+    parts += [str(material.get(field) or "") for field in VERSIONED_FIELDS]
+    for set_name in PAIR_SETS:
+        parts.append(set_name)
+        parts.extend(pair_hash(pair) for pair in material.get(set_name, []))
+    return stable_hash(*parts)
+
+def diff_pairs(parent_pairs, pairs):
+    """
+    Compute a positional patch from parent_pairs to pairs
+
+    The common prefix and suffix are skipped before matching, so a small
+    edit to a large set only matches the edited region.
+
+    Returns:
+        list: (start, end, new pairs) splices against parent_pairs
+    """
+    old = [pair_hash(p) for p in parent_pairs]
+    new = [pair_hash(p) for p in pairs]
+
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = new[prefix:len(new) - suffix]
+    matcher = SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+
+    patch = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            patch.append((prefix + i1, prefix + i2, list(pairs[prefix + j1:prefix + j2])))
+    return patch
+
+def apply_patch(pairs, patch):
+    """Apply a patch from diff_pairs, returning a new list"""
+    result = []
+    position = 0
+    for start, end, new_pairs in patch:
+        result.extend(pairs[position:start])
+        result.extend(new_pairs)
+        position = end
+    result.extend(pairs[position:])
+    return result
+
+def patch_stats(patch):
+    """Count added, removed and modified pairs in a patch"""
+    added = removed = modified = 0
+    for start, end, new_pairs in patch:
+        replaced = min(end - start, len(new_pairs))
+        modified += replaced
+        removed += end - start - replaced
+        added += len(new_pairs) - replaced
+    return {"added": added, "removed": removed, "modified": modified}
+
+def _store():
+    """Return the version store, version hash -> version record"""
+    if 'material_versions' not in st.session_state:
+        st.session_state.material_versions = {}
+    return st.session_state.material_versions
+
+def _record_version(material, parent_hash, patches):
+    """Store a version record and stamp the material with its hash"""
+    version_hash = content_hash(material)
+    store = _store()
+    if version_hash not in store:
+        store[version_hash] = {
+            "hash": version_hash,
+            "material_id": material["id"],
+            "parent": parent_hash,
+            "fields": {field: material.get(field) for field in VERSIONED_FIELDS},
+            "patches": patches,
+            "stats": {set_name: patch_stats(patch) for set_name, patch in patches.items()},
+            "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+    material["version"] = version_hash
+    material["parent_version"] = parent_hash
+    return version_hash
+
+def create_version(material):
+    """
+    Record the root version of a new material
+
+    The root patch inserts every pair into an empty set, so the root is the
+    only version holding a full copy.
+
+    Returns:
+        str: The version hash, also stored in material['version']
+    """
+    patches = {set_name: [(0, 0, list(material.get(set_name, [])))] for set_name in PAIR_SETS}
+    return _record_version(material, None, patches)
+
+def ensure_version(material):
+    """Return the material's version hash, creating the root version if missing"""
+    if material.get("version") not in _store():
+        return create_version(material)
+    return material["version"]
+
+def new_version(parent, **changes):
+    """
+    Create a new version of a material
+
+    Only the delta against the parent is stored. The parent dict is left
+    untouched, so experiments that reference it keep the content they ran on.
+
+    Args:
+        parent (dict): Current material
+        **changes: New training_set, test_set and versioned fields
+
+    Returns:
+        dict: The new material, or None if the content did not change
+    """
+    parent_hash = ensure_version(parent)
+    material = dict(parent, **changes)
+    if content_hash(material) == parent_hash:
+        return None
+
+    patches = {}
+    for set_name in PAIR_SETS:
+        parent_pairs = parent.get(set_name, [])
+        patches[set_name] = diff_pairs(parent_pairs, material.get(set_name, []))
+        # Rebuild from the parent so unchanged pairs are shared, not copied
+        material[set_name] = apply_patch(parent_pairs, patches[set_name])
+    material["updated_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _record_version(material, parent_hash, patches)
+    return material
+
+def get_version(version_hash):
+    """Return a version record or None"""
+    return _store().get(version_hash)
+
+def get_history(version_hash):
+    """Return a version and its ancestors, newest first"""
+    store = _store()
+    chain = []
+    while version_hash is not None and version_hash in store:
+        chain.append(store[version_hash])
+        version_hash = store[version_hash]["parent"]
+    return chain
+
+def materialize(version_hash):
+    """
+    Rebuild the full content of a version by replaying patches from the root
+
+    Returns:
+        dict: Versioned fields plus training_set and test_set
+    """
+    chain = get_history(version_hash)
+    content = {set_name: [] for set_name in PAIR_SETS}
+    for version in reversed(chain):
+        for set_name in PAIR_SETS:
+            content[set_name] = apply_patch(content[set_name], version["patches"][set_name])
+    content.update(chain[0]["fields"])
+    return content
+
+def delete_versions(material_id):
+    """Drop every version of a material"""
+    store = _store()
+    for version_hash in [h for h, v in store.items() if v["material_id"] == material_id]:
+        del store[version_hash]
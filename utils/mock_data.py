@@ -1,7 +1,6 @@
 import uuid
 import random
 import datetime
-import pandas as pd
 
 def generate_mock_datasets():
     """Generate mock datasets for demo purposes"""
@@ -127,6 +126,8 @@ def generate_mock_materials():
 
 def generate_mock_query_results(query_type="table"):
     """Generate mock query results based on query type"""
+    import pandas as pd
+
     if query_type == "count":
         # Return a count result
         count = random.randint(100, 10000)
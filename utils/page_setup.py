@@ -0,0 +1,44 @@
+import streamlit as st
+import utils.session_state as ss
+import utils.profiler as profiler
+import utils.session_memory as session_memory
+
+# 네비게이션 메뉴 숨기기
+HIDE_STREAMLIT_STYLE = """
+<style>
+#MainMenu {visibility: hidden;}
+div[data-testid="stSidebarNav"] {display: none;}
+</style>
+"""
+
+def setup_page(page_title, page_icon, page_name):
+    """
+    Shared bootstrap for every page
+
+    Page config and CSS have to be emitted on every script run, but session
+    initialization and demo data only run once per session.
+
+    Args:
+        page_title (str): Browser tab title
+        page_icon (str): Browser tab icon
+        page_name (str): Short page name used by the profiler
+    """
+    st.set_page_config(
+        page_title=page_title,
+        page_icon=page_icon,
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(HIDE_STREAMLIT_STYLE, unsafe_allow_html=True)
+
+    # Start collecting section timings for this run
+    profiler.begin_rerun(page_name)
+
+    if not st.session_state.get('session_bootstrapped', False):
+        with profiler.span("session_bootstrap"):
+            ss.initialize_session_state()
+            ss.add_demo_data()
+        st.session_state.session_bootstrapped = True
+
+    # Keep this session within its memory budget
+    session_memory.enforce_budget()
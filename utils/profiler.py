@@ -0,0 +1,198 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Number of finished reruns kept for the debug panel and JSON lines export
+MAX_RERUN_HISTORY = 20
+
+# Number of functions shown in the cProfile report
+PROFILE_REPORT_LIMIT = 30
+
+def is_enabled():
+    """Return True if span timing is turned on for this session"""
+    return st.session_state.get('profiling_enabled', False)
+
+@contextmanager
+def span(name):
+    """
+    Time a section of a page or component for the current rerun
+
+    When profiling is turned off this is a single session state lookup.
+
+    Args:
+        name (str): Label shown in the debug panel
+    """
+    if not st.session_state.get('profiling_enabled', False):
+        yield
+        return
+
+    stack = st.session_state.setdefault('profiler_stack', [])
+    spans = st.session_state.setdefault('profiler_spans', [])
+    rerun_start = st.session_state.get('profiler_rerun_start') or time.perf_counter()
+
+    start = time.perf_counter()
+    stack.append(name)
+    try:
+        yield
+    finally:
+        stack.pop()
+        spans.append({
+            "name": name,
+            "depth": len(stack),
+            "start_ms": round((start - rerun_start) * 1000, 3),
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3)
+        })
+
+def timed(name=None):
+    """
+    Decorator version of span()
+
+    Args:
+        name (str): Label for the span, defaults to the function name
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not st.session_state.get('profiling_enabled', False):
+                return func(*args, **kwargs)
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def begin_rerun(page):
+    """
+    Start collecting timings for a new script run
+
+    A previous run that never reached end_rerun (cut short by st.rerun,
+    st.switch_page or an exception) is closed here: its spans are moved
+    into the history with the time up to its last span, and a pending
+    cProfile capture is started or a finished one is collected.
+
+    Args:
+        page (str): Name of the page being rendered
+    """
+    _finish_profile()
+
+    if st.session_state.get('profiler_spans') is not None:
+        _archive_rerun(cut_short=True)
+
+    if not st.session_state.get('profiling_enabled', False):
+        st.session_state.profiler_spans = None
+        return
+
+    st.session_state.profiler_rerun_id = st.session_state.get('profiler_rerun_id', 0) + 1
+    st.session_state.profiler_page = page
+    st.session_state.profiler_rerun_start = time.perf_counter()
+    st.session_state.profiler_stack = []
+    st.session_state.profiler_spans = []
+
+    if st.session_state.get('profile_next_rerun', False):
+        st.session_state.profile_next_rerun = False
+        profile = cProfile.Profile()
+        st.session_state.profiler_active = {
+            "profile": profile,
+            "thread_id": threading.get_ident(),
+            "page": page
+        }
+        profile.enable()
+
+def end_rerun():
+    """Finish the current run: stop a running cProfile capture and archive spans"""
+    _finish_profile()
+    if st.session_state.get('profiler_spans') is not None:
+        _archive_rerun()
+        st.session_state.profiler_spans = None
+
+def stop():
+    """Finish the current run and stop the script; use it in place of st.stop()"""
+    end_rerun()
+    st.stop()
+
+def request_profile():
+    """Capture a cProfile report of the next rerun"""
+    st.session_state.profile_next_rerun = True
+
+def get_rerun_history():
+    """Return the finished reruns, oldest first"""
+    return st.session_state.get('profiler_history', [])
+
+def get_profile_report():
+    """Return the text report of the last cProfile capture, or None"""
+    return st.session_state.get('profiler_report')
+
+def export_jsonl():
+    """
+    Export the collected rerun history as JSON lines
+
+    Returns:
+        str: One JSON object per span
+    """
+    lines = []
+    for rerun in get_rerun_history():
+        for item in rerun['spans']:
+            lines.append(json.dumps({
+                "rerun_id": rerun['rerun_id'],
+                "page": rerun['page'],
+                "finished_at": rerun['finished_at'],
+                **item
+            }))
+    return "\n".join(lines)
+
+def _archive_rerun(cut_short=False):
+    """
+    Move the spans of the current run into the history
+
+    Args:
+        cut_short (bool): The run ended without end_rerun; its total is the
+            end of its last span, not the time since it started
+    """
+    rerun_start = st.session_state.get('profiler_rerun_start')
+    spans = st.session_state.profiler_spans
+    if cut_short:
+        total_ms = max((s['start_ms'] + s['duration_ms'] for s in spans), default=0.0)
+    else:
+        total_ms = round((time.perf_counter() - rerun_start) * 1000, 3) if rerun_start else 0.0
+
+    history = st.session_state.setdefault('profiler_history', [])
+    history.append({
+        "rerun_id": st.session_state.get('profiler_rerun_id', 0),
+        "page": st.session_state.get('profiler_page', ''),
+        "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "total_ms": total_ms,
+        "cut_short": cut_short,
+        "spans": sorted(spans, key=lambda s: s['start_ms'])
+    })
+    del history[:-MAX_RERUN_HISTORY]
+    st.session_state.profiler_rerun_start = None
+
+def _finish_profile():
+    """Stop the running cProfile capture and store its text report"""
+    active = st.session_state.get('profiler_active')
+    if not active:
+        return
+    st.session_state.profiler_active = None
+
+    # A profiler hook belongs to the thread that enabled it. If the run was
+    # cut short (st.rerun, switch_page) the next run may be on another thread.
+    if active['thread_id'] != threading.get_ident():
+        st.session_state.profiler_report = (
+            f"Profile of '{active['page']}' was lost: the run ended before it could be collected."
+        )
+        return
+
+    profile = active['profile']
+    profile.disable()
+    buffer = io.StringIO()
+    stats = pstats.Stats(profile, stream=buffer)
+    stats.sort_stats("cumulative").print_stats(PROFILE_REPORT_LIMIT)
+    st.session_state.profiler_report = f"Page: {active['page']}\n{buffer.getvalue()}"
@@ -0,0 +1,232 @@
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from utils.assistant_artifacts import EMBEDDING_DIM, embed_text, retrieve_examples
+from utils.sql_lexer import tokenize, IDENTIFIER, QUOTED_IDENTIFIER
+from utils.sql_structure import parse_clauses
+
+# Tables and columns kept in a pruned context
+MAX_TABLES = 3
+MAX_COLUMNS_PER_TABLE = 8
+
+# Knowledge sentences and few-shot examples kept in a pruned context
+MAX_KNOWLEDGE_SENTENCES = 4
+FEW_SHOT_EXAMPLES = 3
+
+# Examples less similar than this to the question are left out
+MIN_EXAMPLE_SIMILARITY = 0.2
+
+# Questions at least this similar to a training example cluster around it
+CLUSTER_SIMILARITY = 0.5
+
+# Bits of the SimHash that clusters questions far from every example
+CLUSTER_BITS = 12
+
+# Rendered contexts and schema indexes kept, shared by every session of the server
+MAX_CACHED_CONTEXTS = 1024
+MAX_CACHED_INDEXES = 64
+
+_WORD = re.compile(r"[a-z0-9_]+")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+_planes = np.random.default_rng(0).standard_normal((CLUSTER_BITS, EMBEDDING_DIM)).astype(np.float32)
+
+_indexes = OrderedDict()  # artifact id -> schema index
+_contexts = OrderedDict()  # (artifact id, cluster) -> context
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+def estimate_tokens(text):
+    """Rough token count of a prompt text, about four characters per token"""
+    return (len(text) + 3) // 4
+
+def _words(text):
+    words = set(_WORD.findall((text or "").lower()))
+    # Plural and singular forms match each other: transactions ~ transaction
+    return words | {w[:-1] for w in words if w.endswith("s")} | {w + "s" for w in words}
+
+def _render_table(table, columns):
+    partition = table["partition_field"]
+    header = f"- {table['qualified_name']}" + (f" (partitioned by {partition})" if partition else "")
+    return header + ": " + ", ".join(f"{c['name']} {c['type']}" for c in columns)
+
+def _schema_index(artifact):
+    """
+    Return the search index over an artifact's tables and columns
+
+    Built once per artifact from the schema compiled into it, and shared:
+    table and column words, knowledge sentences, and the token count of the
+    unpruned schema and knowledge.
+    """
+    key = artifact['artifact_id']
+    with _cache_lock:
+        if key in _indexes:
+            _indexes.move_to_end(key)
+            return _indexes[key]
+
+    tables = []
+    for table in artifact['schema_tables']:
+        tables.append(dict(
+            table,
+            name_words=_words(table['name'].replace("_", " ")) | {table['name'].lower()},
+            description_words=_words(table['description']),
+            column_names={c['name'].lower() for c in table['columns']}
+        ))
+
+    knowledge = artifact.get('knowledge') or ""
+    sentences = [s.strip() for s in _SENTENCE.split(knowledge) if s.strip()]
+    full = "\n".join(
+        ["Tables:"] + [_render_table(t, t["columns"]) for t in tables]
+        + ["Knowledge:", knowledge]
+    )
+    sentence_words = [(sentence, _words(sentence)) for sentence in sentences]
+    index = {
+        "tables": tables,
+        "sentences": sentence_words,
+        # Every word _select scores on, so a cluster never mixes different selections
+        "vocabulary": set().union(
+            *[t["name_words"] | t["column_names"] | t["description_words"] for t in tables],
+            *[words for _, words in sentence_words]
+        ),
+        "full_tokens": estimate_tokens(full)
+    }
+    with _cache_lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+def question_cluster(question, vocabulary, artifact):
+    """
+    Return the cluster key of a question
+
+    Questions share a cluster when they mention the same schema and
+    knowledge terms (the words table, column and knowledge selection use) and
+    either have the same nearest training example or, far from every
+    example, fall on the same side of CLUSTER_BITS random hyperplanes.
+    Paraphrases of one question therefore reuse one rendered context.
+    """
+    terms = frozenset(_words(question) & vocabulary)
+    nearest = retrieve_examples(artifact, question, k=1)
+    if nearest and nearest[0][0] >= CLUSTER_SIMILARITY:
+        return "example", nearest[0][1]['nl'], terms
+    bits = (_planes @ embed_text(question)) > 0
+    return "simhash", int(bits.astype(np.int64) @ (1 << np.arange(CLUSTER_BITS))), terms
+
+def _sql_identifiers(sql):
+    return {
+        token.value.strip("`").lower() for token in tokenize(sql)
+        if token.kind in (IDENTIFIER, QUOTED_IDENTIFIER)
+    }
+
+def _select(index, artifact, question):
+    """Pick the tables, columns, knowledge and examples relevant to a question"""
+    words = _words(question)
+    examples = [
+        (similarity, example) for similarity, example in retrieve_examples(artifact, question, k=FEW_SHOT_EXAMPLES)
+        if similarity >= MIN_EXAMPLE_SIMILARITY
+    ]
+
+    # Tables the nearest training queries use count as evidence too
+    example_tables = {}
+    example_columns = set()
+    for similarity, example in examples:
+        for reference in parse_clauses(example['sql'])["tables"]:
+            qualified = artifact['table_lookup'].get(reference, reference)
+            qualified = qualified.lower()
+            example_tables[qualified] = max(example_tables.get(qualified, 0.0), similarity)
+        example_columns |= _sql_identifiers(example['sql'])
+
+    scored = []
+    for position, table in enumerate(index["tables"]):
+        score = 3 * len(words & table["name_words"])
+        score += 2 * len(words & table["column_names"])
+        score += len(words & table["description_words"])
+        score += 2 * example_tables.get(table["qualified_name"].lower(), 0.0)
+        scored.append((score, -position, table))
+    scored.sort(key=lambda item: item[:2], reverse=True)
+    selected = [table for score, _, table in scored if score > 0][:MAX_TABLES]
+    if not selected and scored:
+        selected = [scored[0][2]]
+
+    chosen = []
+    for table in selected:
+        partition = (table["partition_field"] or "").lower()
+        keep = [
+            c for c in table["columns"]
+            if c['name'].lower() in words or c['name'].lower() in example_columns or c['name'].lower() == partition
+            or (len(selected) > 1 and (c['name'].lower() == "id" or c['name'].lower().endswith("_id")))
+        ]
+        chosen.append((table, (keep or table["columns"])[:MAX_COLUMNS_PER_TABLE]))
+
+    # Knowledge about the chosen tables, most relevant to the question first
+    tables_words = set().union(*[t["name_words"] for t, _ in chosen]) if chosen else set()
+    ranked = sorted(
+        (
+            (len(sentence_words & words), position, sentence)
+            for position, (sentence, sentence_words) in enumerate(index["sentences"])
+            if sentence_words & tables_words
+        ),
+        key=lambda item: (-item[0], item[1])
+    )
+    knowledge = [sentence for _, _, sentence in sorted(ranked[:MAX_KNOWLEDGE_SENTENCES], key=lambda item: item[1])]
+    return chosen, knowledge, examples
+
+def build_context(artifact, question):
+    """
+    Build the pruned prompt context of a question
+
+    Only the tables and columns relevant to the question are included,
+    chosen by word overlap with the schema and by the tables and columns of
+    the nearest training examples. The rendered context is cached per
+    (artifact, question cluster); an artifact identifies one assistant
+    version and its compiled schema, so later schema changes reach chat
+    through a new deployment, not through this cache.
+
+    Args:
+        artifact (dict): Loaded artifact of the assistant version
+        question (str): Natural language question
+
+    Returns:
+        dict: text, tables (qualified names), tokens, full_tokens (unpruned
+            size), cluster, cached
+    """
+    index = _schema_index(artifact)
+    cluster = question_cluster(question, index["vocabulary"], artifact)
+    key = (artifact['artifact_id'], cluster)
+    with _cache_lock:
+        if key in _contexts:
+            _contexts.move_to_end(key)
+            _stats["hits"] += 1
+            return dict(_contexts[key], cached=True)
+
+    chosen, knowledge, examples = _select(index, artifact, question)
+    lines = ["Tables:"] + [_render_table(t, cols) for t, cols in chosen]
+    if knowledge:
+        lines += ["Knowledge:"] + knowledge
+    shots = [line for _, example in examples for line in (f"Q: {example['nl']}", f"SQL: {example['sql']}")]
+    if shots:
+        lines += ["Examples:"] + shots
+    text = "\n".join(lines)
+
+    context = {
+        "text": text,
+        "tables": [t["qualified_name"] for t, _ in chosen],
+        "tokens": estimate_tokens(text),
+        # The same examples with the whole schema and knowledge, for comparison
+        "full_tokens": index["full_tokens"] + estimate_tokens("\n".join(["Examples:"] + shots) if shots else ""),
+        "cluster": cluster
+    }
+    with _cache_lock:
+        _stats["misses"] += 1
+        _contexts[key] = context
+        while len(_contexts) > MAX_CACHED_CONTEXTS:
+            _contexts.popitem(last=False)
+    return dict(context, cached=False)
+
+def get_stats():
+    """Return the number of cached contexts and hit/miss counters"""
+    with _cache_lock:
+        return dict(_stats, contexts=len(_contexts))
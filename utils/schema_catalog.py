@@ -0,0 +1,155 @@
+import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns used for tables the catalog does not know
+DEFAULT_COLUMNS = [
+    {"name": "id", "type": "INTEGER", "mode": "REQUIRED", "description": "Primary key"},
+    {"name": "name", "type": "STRING", "mode": "REQUIRED", "description": "Item name"},
+    {"name": "value", "type": "FLOAT", "mode": "NULLABLE", "description": "Item value"},
+    {"name": "created_at", "type": "TIMESTAMP", "mode": "REQUIRED", "description": "Creation timestamp"}
+]
+
+def _column(name, kind, mode="NULLABLE", description=""):
+    return {"name": name, "type": kind, "mode": mode, "description": description}
+
+# Stand-in for the warehouse's table metadata, by table name
+_CATALOG = {
+    "transactions": {
+        "columns": [
+            _column("id", "INTEGER", "REQUIRED", "Transaction id"),
+            _column("customer_id", "INTEGER", "REQUIRED", "Buying customer"),
+            _column("product_id", "INTEGER", "REQUIRED", "Product sold"),
+            _column("quantity", "INTEGER", "REQUIRED", "Units sold"),
+            _column("price", "FLOAT", "REQUIRED", "Unit price"),
+            _column("date", "DATE", "REQUIRED", "Transaction date")
+        ],
+        "partitioning": {"type": "DAY", "field": "date"},
+        "clustering": ["customer_id", "product_id"]
+    },
+    "products": {
+        "columns": [
+            _column("id", "INTEGER", "REQUIRED", "Product id"),
+            _column("name", "STRING", "REQUIRED", "Product name"),
+            _column("category", "STRING", description="Product category"),
+            _column("cost", "FLOAT", description="Unit cost"),
+            _column("price", "FLOAT", description="List price")
+        ],
+        "partitioning": None,
+        "clustering": ["category"]
+    },
+    "customers": {
+        "columns": [
+            _column("id", "INTEGER", "REQUIRED", "Customer id"),
+            _column("name", "STRING", description="Full name"),
+            _column("email", "STRING", description="Contact email"),
+            _column("registration_date", "DATE", description="Sign-up date")
+        ],
+        "partitioning": None,
+        "clustering": []
+    },
+    "campaigns": {
+        "columns": [
+            _column("campaign_id", "INTEGER", "REQUIRED", "Campaign id"),
+            _column("name", "STRING", description="Campaign name"),
+            _column("channel_type", "STRING", description="Marketing channel"),
+            _column("start_date", "DATE", description="First day"),
+            _column("end_date", "DATE", description="Last day"),
+            _column("budget", "FLOAT", description="Planned spend")
+        ],
+        "partitioning": None,
+        "clustering": []
+    },
+    "ad_performance": {
+        "columns": [
+            _column("campaign_id", "INTEGER", "REQUIRED", "Campaign id"),
+            _column("date", "DATE", "REQUIRED", "Reporting date"),
+            _column("impressions", "INTEGER", description="Ad impressions"),
+            _column("clicks", "INTEGER", description="Ad clicks"),
+            _column("spend", "FLOAT", description="Spend of the day")
+        ],
+        "partitioning": {"type": "DAY", "field": "date"},
+        "clustering": ["campaign_id"]
+    },
+    "interactions": {
+        "columns": [
+            _column("interaction_id", "INTEGER", "REQUIRED", "Interaction id"),
+            _column("customer_id", "INTEGER", "REQUIRED", "Customer id"),
+            _column("interaction_type", "STRING", description="Touchpoint type"),
+            _column("channel_type", "STRING", description="Channel"),
+            _column("created_at", "TIMESTAMP", "REQUIRED", "Event time")
+        ],
+        "partitioning": {"type": "DAY", "field": "created_at"},
+        "clustering": ["customer_id"]
+    }
+}
+
+def table_watermark(table):
+    """Return the last update marker of a table record"""
+    return table.get('last_updated') or table.get('last_modified')
+
+def _fetch_table_schema(project, dataset, table_name):
+    """Stand-in for fetching one table's metadata from the warehouse"""
+    entry = _CATALOG.get(table_name.lower())
+    if entry is None:
+        return {"columns": [dict(c) for c in DEFAULT_COLUMNS], "partitioning": None, "clustering": []}
+    return {
+        "columns": [dict(c) for c in entry["columns"]],
+        "partitioning": dict(entry["partitioning"]) if entry["partitioning"] else None,
+        "clustering": list(entry["clustering"])
+    }
+
+def refresh_dataset_schema(dataset, force=False):
+    """
+    Attach a column-level schema to every table of a dataset
+
+    Each table record gets a "schema" dict with columns (name, type, mode,
+    description), partitioning, clustering and the watermark it was fetched
+    at. Only tables whose last_updated differs from that watermark, or that
+    have no schema yet, are fetched again.
+
+    Args:
+        dataset (dict): Dataset record, updated in place
+        force (bool): Fetch every table regardless of watermarks
+
+    Returns:
+        list: Names of the tables that were fetched
+    """
+    fetched = []
+    for table in dataset.get('tables', []):
+        watermark = table_watermark(table)
+        schema = table.get('schema')
+        if not force and schema and schema.get('watermark') == watermark:
+            continue
+        schema = _fetch_table_schema(dataset['project'], dataset['dataset'], table['name'])
+        schema["watermark"] = watermark
+        schema["fetched_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        table['schema'] = schema
+        fetched.append(table['name'])
+    if fetched:
+        logger.info("Fetched schema of %s.%s tables: %s", dataset['project'], dataset['dataset'], ", ".join(fetched))
+    return fetched
+
+def carry_over_schemas(tables, previous_tables):
+    """
+    Copy schemas from a previous version of the same tables
+
+    Used when a dataset record is rebuilt from edited table metadata, so the
+    next refresh only fetches tables whose watermark moved.
+    """
+    previous = {t['name']: t.get('schema') for t in previous_tables or []}
+    for table in tables:
+        if 'schema' not in table and previous.get(table['name']):
+            table['schema'] = previous[table['name']]
+    return tables
+
+def get_columns(table):
+    """Return the column dicts of a table record, or DEFAULT_COLUMNS without a schema"""
+    schema = table.get('schema')
+    return schema["columns"] if schema else DEFAULT_COLUMNS
+
+def get_partition_field(table):
+    """Return the partition column of a table record, or None"""
+    schema = table.get('schema') or {}
+    return (schema.get('partitioning') or {}).get('field')
@@ -0,0 +1,185 @@
+import logging
+import os
+import sys
+import time
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Per-session memory budget, configurable for the shared server
+SESSION_MEMORY_BUDGET_MB = float(os.environ.get("BDA_SESSION_MEMORY_BUDGET_MB", "256"))
+
+# Minimum number of seconds between two budget checks of the same session
+BUDGET_CHECK_INTERVAL_SECONDS = float(os.environ.get("BDA_SESSION_MEMORY_CHECK_INTERVAL", "30"))
+
+# Number of most recent chat answers that keep their result tables on eviction
+KEEP_CHAT_RESULTS = 5
+
+# Entity stores, measured first so shared objects are attributed to their owner
+ENTITY_KEYS = ["workspaces", "datasets", "materials", "material_versions", "experiments", "assistants", "chat_history"]
+
+# Keys used by this module, never measured or evicted
+_INTERNAL_KEYS = {"memory_last_check", "memory_report"}
+
+# name -> function(session_state) returning a short description of what was freed
+_evictors = {}
+
+def deep_sizeof(obj, seen=None):
+    """
+    Estimate the memory held by an object and everything it references
+
+    DataFrames and numpy arrays report their own buffer sizes. Objects that
+    were already counted (tracked in seen) contribute nothing.
+
+    Args:
+        obj: Object to measure
+        seen (set): ids of objects already counted
+
+    Returns:
+        int: Size in bytes
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    module = type(obj).__module__
+    if module.startswith("pandas") and hasattr(obj, "memory_usage"):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if module.startswith("numpy") and hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    return size
+
+def measure_session():
+    """
+    Measure the deep size of every session state key
+
+    Returns:
+        dict: total_bytes, per-key sizes and per-entity counts and sizes
+    """
+    keys = [k for k in ENTITY_KEYS if k in st.session_state]
+    keys += sorted(str(k) for k in st.session_state.keys()
+                   if k not in ENTITY_KEYS and k not in _INTERNAL_KEYS)
+
+    seen = set()
+    by_key = {}
+    for key in keys:
+        by_key[key] = deep_sizeof(st.session_state[key], seen)
+
+    by_entity = {}
+    for key in ENTITY_KEYS:
+        if key in st.session_state:
+            value = st.session_state[key]
+            by_entity[key] = {
+                "count": len(value) if hasattr(value, "__len__") else 0,
+                "bytes": by_key[key]
+            }
+
+    return {
+        "total_bytes": sum(by_key.values()),
+        "budget_bytes": int(SESSION_MEMORY_BUDGET_MB * 1024 * 1024),
+        "by_key": dict(sorted(by_key.items(), key=lambda item: item[1], reverse=True)),
+        "by_entity": by_entity,
+        "measured_at": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+def register_evictor(name, evict_fn):
+    """
+    Register a function that frees cached or derivable session data
+
+    Args:
+        name (str): Name shown in logs
+        evict_fn (callable): Called with st.session_state, returns a short
+            description of what was freed (or None if nothing was)
+    """
+    _evictors[name] = evict_fn
+
+def evict_derivable_data():
+    """
+    Run every registered evictor
+
+    Returns:
+        list: Descriptions of what was freed
+    """
+    freed = []
+    for name, evict_fn in _evictors.items():
+        try:
+            result = evict_fn(st.session_state)
+        except Exception:
+            logger.exception("Session memory evictor '%s' failed", name)
+            continue
+        if result:
+            freed.append(f"{name}: {result}")
+    return freed
+
+def enforce_budget(force=False):
+    """
+    Measure the session and evict derivable data if it is over budget
+
+    Checks are throttled to one per BUDGET_CHECK_INTERVAL_SECONDS unless
+    force is set.
+
+    Args:
+        force (bool): Check even if the last check was recent
+
+    Returns:
+        dict: The latest memory report, or None if no check has run yet
+    """
+    now = time.monotonic()
+    last_check = st.session_state.get('memory_last_check')
+    if not force and last_check is not None and now - last_check < BUDGET_CHECK_INTERVAL_SECONDS:
+        return st.session_state.get('memory_report')
+    st.session_state.memory_last_check = now
+
+    report = measure_session()
+    if report['total_bytes'] > report['budget_bytes']:
+        logger.warning(
+            "Session for %s uses %.1f MB, over the %.1f MB budget",
+            st.session_state.get('user', {}).get('email', 'unknown user'),
+            report['total_bytes'] / 1024 / 1024,
+            SESSION_MEMORY_BUDGET_MB
+        )
+        freed = evict_derivable_data()
+        if freed:
+            logger.info("Evicted derivable session data: %s", "; ".join(freed))
+            report = measure_session()
+        report['evicted'] = freed
+
+    st.session_state.memory_report = report
+    return report
+
+def get_memory_report():
+    """Return the latest memory report, or None"""
+    return st.session_state.get('memory_report')
+
+def _evict_chat_results(session_state):
+    """Drop the result tables of all but the most recent chat answers"""
+    answers = [m for m in session_state.get('chat_history', []) if "results" in m]
+    stale = answers[:-KEEP_CHAT_RESULTS] if KEEP_CHAT_RESULTS else answers
+    for message in stale:
+        del message["results"]
+        message["results_evicted"] = True
+    return f"{len(stale)} chat result tables" if stale else None
+
+def _evict_profiler_history(session_state):
+    """Drop collected rerun timings"""
+    history = session_state.get('profiler_history')
+    if not history:
+        return None
+    count = len(history)
+    session_state.profiler_history = []
+    return f"{count} profiled reruns"
+
+register_evictor("chat_results", _evict_chat_results)
+register_evictor("profiler_history", _evict_profiler_history)
@@ -1,6 +1,16 @@
 import streamlit as st
 import uuid
+import time
 import datetime
+from utils.error_taxonomy import analyze_experiment
+from utils.experiment_summary import summarize_experiment
+from utils.sql_generator import generate_test_results
+from utils.assistant_artifacts import compile_artifact
+from utils.assistant_registry import register
+from utils.material_versions import create_version, ensure_version
+from utils.schema_catalog import refresh_dataset_schema
+import utils.workspace_counters as workspace_counters
+import utils.assistant_pool as assistant_pool
 
 def initialize_session_state():
     """Initialize the session state with default values if not already set"""
@@ -33,6 +43,9 @@ def initialize_session_state():
         
     if 'selected_material' not in st.session_state:
         st.session_state.selected_material = None
+        
+    if 'material_versions' not in st.session_state:
+        st.session_state.material_versions = {}
     
     # Experiments
     if 'experiments' not in st.session_state:
@@ -54,6 +67,10 @@ def initialize_session_state():
     # Chat
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
+    
+    # Per-workspace counters, kept up to date by every create and delete
+    if 'workspace_counters' not in st.session_state:
+        workspace_counters.rebuild_counters()
 
 def reset_session():
     """Reset the session state to defaults"""
@@ -73,6 +90,7 @@ def add_demo_data():
             "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         st.session_state.workspaces.append(workspace)
+        workspace_counters.record_workspace(workspace)
         st.session_state.current_workspace = workspace
     
     # Demo dataset
@@ -88,7 +106,9 @@ def add_demo_data():
                 {"name": "customers", "description": "Customer information", "rows": "2.1M", "last_updated": "2023-11-25"}
             ]
         }
+        refresh_dataset_schema(dataset)
         st.session_state.datasets.append(dataset)
+        workspace_counters.record_created("datasets", dataset)
         st.session_state.selected_dataset = dataset
     
     # Demo material
@@ -107,10 +127,12 @@ def add_demo_data():
                 {"nl": "How many customers made a purchase last week?", "sql": "SELECT COUNT(DISTINCT customer_id) FROM demo-project.sales_data.transactions WHERE date BETWEEN DATE_SUB(CURRENT_DATE(), INTERVAL 7 DAY) AND CURRENT_DATE()"},
                 {"nl": "What's the average purchase value?", "sql": "SELECT AVG(quantity * price) as avg_purchase FROM demo-project.sales_data.transactions"}
             ],
-            "knowledge_data": "The sales_data dataset contains transaction records, product information, and customer data. Transactions have fields: id, customer_id, product_id, quantity, price, date. Products have fields: id, name, category, cost, price. Customers have fields: id, name, email, registration_date.",
+            "knowledge_data": "The sales_data dataset contains transaction records, product information, and customer data. Transactions have fields: id, customer_id, product_id, quantity, price, date. Products have fields: id, name, category, cost, price. Customers have fields: id, name, email, registration_date. Transactions are partitioned by date.",
             "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
+        create_version(material)
         st.session_state.materials.append(material)
+        workspace_counters.record_created("materials", material)
         st.session_state.selected_material = material
     
     # Demo experiment
@@ -124,35 +146,27 @@ def add_demo_data():
             "dataset": st.session_state.selected_dataset,
             "material_id": st.session_state.selected_material["id"],
             "material": st.session_state.selected_material,
+            "material_version": ensure_version(st.session_state.selected_material),
             "status": "completed",
             "results": {
-                "accuracy": 0.85,
+                "accuracy": 0.0,
                 "test_results": []
             },
             "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
         # Generate test results
-        for test_item in st.session_state.selected_material["test_set"]:
-            is_correct = hash(test_item["nl"]) % 4 != 0  # 75% correct rate
-            
-            generated_sql = test_item["sql"]
-            if not is_correct:
-                # Slightly modify the SQL to simulate an error
-                if "WHERE" in generated_sql:
-                    generated_sql = generated_sql.replace("WHERE", "WHERE LOWER(")
-                    if "=" in generated_sql:
-                        parts = generated_sql.split("=", 1)
-                        generated_sql = f"{parts[0]}) ={parts[1]}"
-            
-            experiment["results"]["test_results"].append({
-                "nl": test_item["nl"],
-                "expected_sql": test_item["sql"],
-                "generated_sql": generated_sql,
-                "is_correct": is_correct
-            })
+        started = time.perf_counter()
+        experiment["results"]["test_results"] = generate_test_results(
+            st.session_state.selected_material["test_set"],
+            workspace_id=st.session_state.current_workspace["id"],
+            artifact=assistant_pool.acquire({"dataset": experiment["dataset"], "material": experiment["material"]})
+        )
         
+        analyze_experiment(experiment)
+        summarize_experiment(experiment, time.perf_counter() - started)
         st.session_state.experiments.append(experiment)
+        workspace_counters.record_created("experiments", experiment)
         st.session_state.current_experiment = experiment
     
     # Demo assistant
@@ -165,11 +179,13 @@ def add_demo_data():
             "experiment_id": st.session_state.current_experiment["id"],
             "dataset": st.session_state.selected_dataset,
             "material": st.session_state.selected_material,
-            "version": 1,
             "status": "active",
             "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
+        register(assistant)
+        compile_artifact(assistant)
         st.session_state.assistants.append(assistant)
+        workspace_counters.record_created("assistants", assistant)
         st.session_state.current_assistant = assistant
-        st.session_state.current_assistant_version = 1
\ No newline at end of file
+        st.session_state.current_assistant_version = assistant["version"]
\ No newline at end of file
@@ -0,0 +1,132 @@
+import difflib
+import html
+import threading
+from collections import OrderedDict
+
+from utils.hashing import stable_hash
+from utils.session_memory import register_evictor
+from utils.sql_lexer import token_values, tokenize
+
+# Number of rendered (expected, generated) pairs kept in memory
+RENDER_CACHE_SIZE = 1024
+
+_ADDED_STYLE = "color:green; background-color:#e6ffe6"
+_REMOVED_STYLE = "color:red; background-color:#ffe6e6"
+
+_render_cache = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+def pair_key(expected_sql, generated_sql):
+    """Return the cache key of an (expected, generated) SQL pair"""
+    return stable_hash(expected_sql or "", generated_sql or "")
+
+def compute_diff(expected_sql, generated_sql):
+    """
+    Compute line-level and token-level opcodes for two SQL queries
+
+    Each query is tokenized once with the shared SQL lexer.
+
+    Args:
+        expected_sql (str): The expected/correct SQL query
+        generated_sql (str): The generated SQL query to compare
+
+    Returns:
+        dict: lines and tokens of both queries with their difflib opcodes
+    """
+    expected_lines = tuple((expected_sql or "").splitlines())
+    generated_lines = tuple((generated_sql or "").splitlines())
+    expected_tokens = token_values(expected_sql)
+    generated_tokens = token_values(generated_sql)
+
+    line_matcher = difflib.SequenceMatcher(None, expected_lines, generated_lines, autojunk=False)
+    token_matcher = difflib.SequenceMatcher(None, expected_tokens, generated_tokens, autojunk=False)
+
+    return {
+        "expected_lines": expected_lines,
+        "generated_lines": generated_lines,
+        "line_opcodes": tuple(line_matcher.get_opcodes()),
+        "expected_tokens": expected_tokens,
+        "generated_tokens": generated_tokens,
+        "token_opcodes": tuple(token_matcher.get_opcodes())
+    }
+
+def render_line_diff(diff):
+    """Render the line-level diff as HTML lines prefixed like ndiff"""
+    output = []
+    for tag, i1, i2, j1, j2 in diff['line_opcodes']:
+        if tag == 'equal':
+            output.extend(html.escape(f"  {line}") for line in diff['expected_lines'][i1:i2])
+            continue
+        for line in diff['expected_lines'][i1:i2]:
+            output.append(f"<span style='{_REMOVED_STYLE}'>{html.escape(f'- {line}')}</span>")
+        for line in diff['generated_lines'][j1:j2]:
+            output.append(f"<span style='{_ADDED_STYLE}'>{html.escape(f'+ {line}')}</span>")
+    return (
+        f"<pre style='white-space: pre-wrap;'>{'<br>'.join(output)}</pre>"
+    )
+
+def render_token_diff(diff):
+    """Render the token-level diff as HTML blocks"""
+    expected = diff['expected_tokens']
+    generated = diff['generated_tokens']
+    blocks = []
+    for tag, i1, i2, j1, j2 in diff['token_opcodes']:
+        if tag == 'equal':
+            blocks.append(html.escape(' '.join(expected[i1:i2])))
+            continue
+        if tag in ('replace', 'delete'):
+            blocks.append(f"<span style='{_REMOVED_STYLE}'>-{html.escape(' '.join(expected[i1:i2]))}</span>")
+        if tag in ('replace', 'insert'):
+            blocks.append(f"<span style='{_ADDED_STYLE}'>+{html.escape(' '.join(generated[j1:j2]))}</span>")
+    return (
+        "<div style='white-space: pre-wrap; line-height: 1.5; font-family: monospace;'>"
+        f"{'<br>'.join(blocks)}</div>"
+    )
+
+def get_rendered_diff(expected_sql, generated_sql):
+    """
+    Return the rendered line and token diffs of an SQL pair
+
+    The HTML is memoized by the hash of the pair, so identical failures are
+    only diffed and rendered once.
+
+    Args:
+        expected_sql (str): The expected/correct SQL query
+        generated_sql (str): The generated SQL query to compare
+
+    Returns:
+        dict: line_html and token_html
+    """
+    key = pair_key(expected_sql, generated_sql)
+    with _render_cache_lock:
+        rendered = _render_cache.get(key)
+        if rendered is not None:
+            _render_cache.move_to_end(key)
+            return rendered
+
+    diff = compute_diff(expected_sql, generated_sql)
+    rendered = {
+        "line_html": render_line_diff(diff),
+        "token_html": render_token_diff(diff)
+    }
+
+    with _render_cache_lock:
+        _render_cache[key] = rendered
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    return rendered
+
+def clear_cache():
+    """Drop all memoized diffs and tokenized queries, returning how many diffs were dropped"""
+    with _render_cache_lock:
+        count = len(_render_cache)
+        _render_cache.clear()
+    tokenize.cache_clear()
+    return count
+
+def _evict_rendered_diffs(session_state):
+    """Session memory evictor for the rendered diff and tokenizer caches"""
+    count = clear_cache()
+    return f"{count} rendered diffs" if count else None
+
+register_evictor("rendered_diffs", _evict_rendered_diffs)
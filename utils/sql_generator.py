@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+
+from utils.hashing import stable_int
+
+# Backend used when none is named, configurable for the shared server
+DEFAULT_BACKEND = os.environ.get("BDA_SQL_GENERATOR", "local")
+
+# Requests sent to a backend in one call
+DEFAULT_BATCH_SIZE = 16
+
+# Behaviour of the local stand-in backend
+LOCAL_SETTINGS = {
+    "batch_latency_ms": float(os.environ.get("BDA_GENERATOR_BATCH_LATENCY_MS", "0")),  # fixed cost of a call
+    "item_latency_ms": float(os.environ.get("BDA_GENERATOR_ITEM_LATENCY_MS", "0")),  # cost of each request
+    "error_rate": float(os.environ.get("BDA_GENERATOR_ERROR_RATE", "0")),  # share of requests that fail
+    "accuracy": 0.75  # share of reference queries reproduced exactly
+}
+
+_backends = {}  # name -> {"generate_batch", "max_batch_size"}
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "requests": 0, "errors": 0, "busy_ms": 0.0}
+
+def register_backend(name, generate_batch, max_batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Register a generator backend
+
+    Args:
+        name (str): Backend name used by generate and generate_batch
+        generate_batch (callable): (requests, options) -> list of results,
+            one per request, in order
+        max_batch_size (int): Largest batch the backend accepts
+    """
+    _backends[name] = {"generate_batch": generate_batch, "max_batch_size": max_batch_size}
+
+def get_backend_names():
+    """Return the registered backend names"""
+    return sorted(_backends)
+
+def _decide(question, salt, rate):
+    """Deterministic yes/no with probability rate for a question"""
+    return stable_int(salt, question) % 1000 < rate * 1000
+
+def _perturb(sql):
+    """Return a slightly wrong version of a query, as a model mistake would be"""
+    if "WHERE" in sql:
+        sql = sql.replace("WHERE", "WHERE LOWER(", 1)
+        if "=" in sql:
+            parts = sql.split("=", 1)
+            sql = f"{parts[0]}) ={parts[1]}"
+        return sql
+    if " DESC" in sql:
+        return sql.replace(" DESC", " ASC", 1)
+    if "COUNT(DISTINCT " in sql:
+        return sql.replace("COUNT(DISTINCT ", "COUNT(", 1)
+    return f"{sql} LIMIT 1"
+
+def _heuristic_sql(question, table_name):
+    """Write a simple query for a question from its keywords"""
+    lowered = question.lower()
+    if "count" in lowered or "how many" in lowered:
+        sql = f"SELECT COUNT(*) FROM `{table_name}`"
+        if "where" in lowered or "filter" in lowered:
+            sql += " WHERE created_date > '2023-01-01'"
+    elif "average" in lowered or "mean" in lowered:
+        sql = f"SELECT AVG(value) FROM `{table_name}`"
+    elif "group" in lowered:
+        sql = f"SELECT category, COUNT(*) FROM `{table_name}` GROUP BY category"
+    elif "top" in lowered:
+        sql = f"SELECT category, COUNT(*) as count FROM `{table_name}` GROUP BY category ORDER BY count DESC LIMIT 5"
+    else:
+        sql = f"SELECT * FROM `{table_name}` LIMIT 10"
+    return sql
+
+def _local_generate_batch(requests, options):
+    """
+    Deterministic offline stand-in for a model backend
+
+    Requests with a reference_sql (experiments) get it back, perturbed for
+    a stable 1 - accuracy share of questions; others get a keyword query on
+    the first context table. Each call sleeps batch_latency_ms plus
+    item_latency_ms per request, and a stable error_rate share of questions
+    fails, so throughput and error handling can be measured offline.
+    """
+    settings = dict(LOCAL_SETTINGS, **{k: v for k, v in options.items() if k in LOCAL_SETTINGS})
+    delay_ms = settings["batch_latency_ms"] + settings["item_latency_ms"] * len(requests)
+    if delay_ms > 0:
+        time.sleep(delay_ms / 1000)
+
+    results = []
+    for request in requests:
+        question = request['question']
+        if _decide(question, "error", settings["error_rate"]):
+            results.append({"sql": None, "error": "Generator backend error (injected)"})
+        elif request.get('reference_sql') is not None:
+            correct = _decide(question, "correct", settings["accuracy"])
+            results.append({"sql": request['reference_sql'] if correct else _perturb(request['reference_sql']), "error": None})
+        else:
+            tables = request.get('tables') or ["example_table"]
+            results.append({"sql": _heuristic_sql(question, tables[0]), "error": None})
+    return results
+
+register_backend("local", _local_generate_batch)
+
+def generate_batch(requests, backend=None, **options):
+    """
+    Generate SQL for a list of requests
+
+    Requests are split into batches of the backend's max_batch_size.
+
+    Args:
+        requests (list): Dicts with question and optionally context (prompt
+            text), tables (qualified names, most relevant first) and
+            reference_sql (expected query of a test item)
+        backend (str): Registered backend name, DEFAULT_BACKEND if omitted
+        **options: Backend options such as temperature or max_tokens
+
+    Returns:
+        list: One dict per request with sql (None on failure), error,
+            backend and latency_ms (its share of the batch call)
+    """
+    name = backend or DEFAULT_BACKEND
+    if name not in _backends:
+        raise ValueError(f"Unknown SQL generator backend: {name}")
+    entry = _backends[name]
+    size = max(int(entry["max_batch_size"]), 1)
+
+    results = []
+    for start in range(0, len(requests), size):
+        batch = requests[start:start + size]
+        started = time.perf_counter()
+        batch_results = entry["generate_batch"](batch, options)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        errors = 0
+        for result in batch_results:
+            result["backend"] = name
+            result["latency_ms"] = elapsed_ms / len(batch)
+            errors += result.setdefault("error", None) is not None
+        with _stats_lock:
+            _stats["calls"] += 1
+            _stats["requests"] += len(batch)
+            _stats["errors"] += errors
+            _stats["busy_ms"] += elapsed_ms
+        results.extend(batch_results)
+    return results
+
+def generate(request, backend=None, **options):
+    """Generate SQL for one request; see generate_batch"""
+    return generate_batch([request], backend, **options)[0]
+
+def generate_test_results(test_set, backend=None, workspace_id=None, artifact=None, **options):
+    """
+    Run an experiment's test set through the generator
+
+    Items are queued on utils.generation_scheduler at batch priority, so
+    they are sent in micro-batches alongside other sessions' requests and
+    share capacity fairly with other workspaces. With an artifact, each item
+    gets the same pruned prompt context chat would build for it.
+
+    Returns:
+        list: Test result dicts with nl, expected_sql, generated_sql,
+            is_correct, latency_ms and, on failure, error
+    """
+    from utils.generation_scheduler import BATCH, generate_many
+    from utils.prompt_context import build_context
+
+    requests = []
+    for item in test_set:
+        request = {"question": item['nl'], "reference_sql": item['sql']}
+        if artifact is not None:
+            context = build_context(artifact, item['nl'])
+            request.update(context=context["text"], tables=context["tables"])
+        requests.append(request)
+    results = generate_many(requests, backend, BATCH, workspace_id, **options)
+    test_results = []
+    for item, result in zip(test_set, results):
+        test_result = {
+            "nl": item['nl'],
+            "expected_sql": item['sql'],
+            "generated_sql": result["sql"] or "",
+            "is_correct": result["sql"] == item['sql'],
+            "latency_ms": result["latency_ms"]
+        }
+        if result["error"]:
+            test_result["error"] = result["error"]
+        test_results.append(test_result)
+    return test_results
+
+def get_stats():
+    """Return call, request and error counters and time spent in backends"""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,73 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+Token = namedtuple("Token", ["kind", "value"])
+
+# Token kinds
+KEYWORD = "keyword"
+IDENTIFIER = "identifier"
+QUOTED_IDENTIFIER = "quoted_identifier"
+STRING = "string"
+NUMBER = "number"
+OPERATOR = "operator"
+PUNCTUATION = "punctuation"
+
+SQL_KEYWORDS = frozenset([
+    "ALL", "AND", "AS", "ASC", "BETWEEN", "BY", "CASE", "CROSS",
+    "DESC", "DISTINCT", "ELSE", "END", "EXCEPT", "EXISTS", "FALSE", "FROM", "FULL",
+    "GROUP", "HAVING", "IN", "INNER", "INTERSECT", "INTERVAL", "IS", "JOIN", "LEFT",
+    "LIKE", "LIMIT", "NOT", "NULL", "OFFSET", "ON", "OR", "ORDER", "OUTER", "OVER",
+    "PARTITION", "QUALIFY", "RIGHT", "SELECT", "THEN", "TRUE", "UNION", "USING",
+    "WHEN", "WHERE", "WINDOW", "WITH"
+])
+
+# A bare "-" is always the minus operator; hyphenated project ids are only
+# one token when quoted (`my-project.dataset.table`)
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<quoted_identifier>`[^`]*`)
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<operator><=|>=|<>|!=|\|\||[=<>+\-*/%])
+  | (?P<punctuation>[(),.;\[\]])
+  | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+@lru_cache(maxsize=4096)
+def tokenize(sql):
+    """
+    Split a SQL query into tokens
+
+    Whitespace and comments are dropped. Results are cached, so each distinct
+    query is only tokenized once.
+
+    Args:
+        sql (str): SQL query
+
+    Returns:
+        tuple: Token(kind, value) tuples; keyword values are upper-cased
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(sql or ""):
+        kind = match.lastgroup
+        value = match.group()
+        if kind in ("space", "comment"):
+            continue
+        if kind == "word":
+            upper = value.upper()
+            if upper in SQL_KEYWORDS:
+                tokens.append(Token(KEYWORD, upper))
+            else:
+                tokens.append(Token(IDENTIFIER, value))
+        elif kind == "other":
+            tokens.append(Token(PUNCTUATION, value))
+        else:
+            tokens.append(Token(kind, value))
+    return tuple(tokens)
+
+def token_values(sql):
+    """Return the token values of a SQL query as a tuple of strings"""
+    return tuple(token.value for token in tokenize(sql))
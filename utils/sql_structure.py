@@ -0,0 +1,285 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+from utils.session_memory import register_evictor
+from utils.sql_lexer import tokenize, KEYWORD, SQL_KEYWORDS
+
+# Clauses in the order they are reported
+CLAUSE_ORDER = ["select", "from", "joins", "where", "group_by", "having", "qualify", "order_by", "limit", "offset"]
+
+CLAUSE_LABELS = {
+    "select": "SELECT list",
+    "from": "FROM",
+    "joins": "JOIN",
+    "where": "WHERE predicates",
+    "group_by": "GROUP BY",
+    "having": "HAVING predicates",
+    "qualify": "QUALIFY predicates",
+    "order_by": "ORDER BY",
+    "limit": "LIMIT",
+    "offset": "OFFSET"
+}
+
+# Clauses whose items are separated by AND instead of commas
+_PREDICATE_CLAUSES = {"where", "having", "qualify"}
+
+_JOIN_MODIFIERS = {"LEFT", "RIGHT", "FULL", "INNER", "CROSS", "OUTER"}
+
+def join_tokens(values):
+    """Render token values back into compact SQL text"""
+    text = []
+    previous = None
+    for value in values:
+        # Function calls keep their parenthesis attached: COUNT(*), DATE_SUB(...)
+        is_call = value == "(" and previous is not None and (
+            previous[:1].isalpha() or previous[:1] == "_") and previous not in SQL_KEYWORDS
+        if text and not is_call and value not in (",", ".", ")") and previous not in (".", "("):
+            text.append(" ")
+        text.append(value)
+        previous = value
+    return "".join(text)
+
+_PATH_HYPHEN = re.compile(r"(?<=\w) - (?=\w)")
+
+def _compact_path(reference):
+    """Rejoin the hyphens of an unquoted project id: demo - project.d.t -> demo-project.d.t"""
+    return reference if reference.startswith("(") else _PATH_HYPHEN.sub("-", reference)
+
+def _join_path(values):
+    """Render the token values of a table reference back into SQL text"""
+    return _compact_path(join_tokens(values))
+
+def _split_top_level(tokens, separator):
+    """Split tokens on a separator value at parenthesis depth 0"""
+    parts = [[]]
+    depth = 0
+    between = False
+    for token in tokens:
+        if token.value == "(":
+            depth += 1
+        elif token.value == ")":
+            depth -= 1
+        elif token.kind == KEYWORD and token.value == "BETWEEN":
+            between = True
+        if depth == 0 and token.value == separator:
+            # The AND of "x BETWEEN a AND b" belongs to the predicate
+            if separator == "AND" and between:
+                between = False
+            else:
+                parts.append([])
+                continue
+        parts[-1].append(token)
+    return [join_tokens(t.value for t in part) for part in parts if part]
+
+def _split_predicates(tokens):
+    """
+    Split a WHERE, HAVING or QUALIFY clause into its AND-ed predicates
+
+    AND binds tighter than OR, so a clause with a top-level OR is kept as
+    one item: "a = 1 OR b = 2 AND c = 3" is not "a = 1 OR b = 2" and "c = 3".
+    """
+    depth = 0
+    for token in tokens:
+        if token.value == "(":
+            depth += 1
+        elif token.value == ")":
+            depth -= 1
+        elif depth == 0 and token.kind == KEYWORD and token.value == "OR":
+            return [join_tokens(t.value for t in tokens)] if tokens else []
+    return _split_top_level(tokens, "AND")
+
+def _parse_joins(tokens):
+    """Split FROM clause tokens into the base tables and JOIN entries"""
+    base = []
+    joins = []
+    current = None
+    depth = 0
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.value == "(":
+            depth += 1
+        elif token.value == ")":
+            depth -= 1
+
+        if depth == 0 and token.kind == KEYWORD and (token.value == "JOIN" or token.value in _JOIN_MODIFIERS):
+            join_type = []
+            while i < len(tokens) and tokens[i].kind == KEYWORD and (
+                    tokens[i].value in _JOIN_MODIFIERS or tokens[i].value == "JOIN"):
+                join_type.append(tokens[i].value)
+                if tokens[i].value == "JOIN":
+                    i += 1
+                    break
+                i += 1
+            current = {"type": " ".join(join_type), "table": [], "condition": []}
+            joins.append(current)
+            continue
+
+        if current is None:
+            base.append(token)
+        elif depth == 0 and token.kind == KEYWORD and token.value in ("ON", "USING") and not current["condition"]:
+            current["condition"].append(token)
+        elif current["condition"]:
+            current["condition"].append(token)
+        else:
+            current["table"].append(token)
+        i += 1
+
+    join_items = [
+        join_tokens([j["type"], _join_path(t.value for t in j["table"])] + [t.value for t in j["condition"]])
+        for j in joins
+    ]
+    tables = [_compact_path(t) for t in _split_top_level(base, ",")]
+    join_tables = [_join_path(t.value for t in j["table"]) for j in joins]
+    return tables, join_items, join_tables
+
+def _table_name(reference):
+    """Return the normalized table name of a FROM or JOIN reference"""
+    name = reference.split(" AS ")[0].split(" ")[0]
+    return name.strip("`").lower()
+
+@lru_cache(maxsize=2048)
+def _parse_clauses(sql):
+    """Cached parse behind parse_clauses; callers get a copy of its dict"""
+    tokens = tokenize(sql)
+    sections = {}
+    current = None
+    depth = 0
+    distinct = False
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = token.value
+        if value == "(":
+            depth += 1
+        elif value == ")":
+            depth -= 1
+
+        clause = None
+        step = 1
+        if depth == 0 and token.kind == KEYWORD:
+            following = tokens[i + 1].value if i + 1 < len(tokens) else None
+            if value == "SELECT" and current is None:
+                clause = "select"
+                if following == "DISTINCT":
+                    distinct = True
+                    step = 2
+            elif value == "FROM" and current == "select":
+                clause = "from"
+            elif value in ("WHERE", "HAVING", "QUALIFY", "LIMIT", "OFFSET") and current is not None:
+                clause = value.lower()
+            elif value in ("GROUP", "ORDER") and following == "BY":
+                clause = "group_by" if value == "GROUP" else "order_by"
+                step = 2
+
+        if clause and clause not in sections:
+            current = clause
+            sections[current] = []
+            i += step
+            continue
+
+        if current is not None:
+            sections[current].append(token)
+        i += 1
+
+    clauses = {name: () for name in CLAUSE_ORDER}
+    for name, section_tokens in sections.items():
+        if name == "from":
+            tables, joins, join_tables = _parse_joins(section_tokens)
+            clauses["from"] = tuple(tables)
+            clauses["joins"] = tuple(joins)
+            clauses["tables"] = tuple(_table_name(t) for t in tables + join_tables if t)
+        elif name in _PREDICATE_CLAUSES:
+            clauses[name] = tuple(_split_predicates(section_tokens))
+        else:
+            clauses[name] = tuple(_split_top_level(section_tokens, ","))
+
+    clauses.setdefault("tables", ())
+    clauses["distinct"] = distinct
+    return clauses
+
+def parse_clauses(sql):
+    """
+    Parse a SQL query into a flat clause tree
+
+    The query is scanned once; only top-level clauses are split, subqueries
+    stay inside the item that contains them. Parses are cached, and each
+    call returns its own copy of the dict.
+
+    Args:
+        sql (str): SQL query
+
+    Returns:
+        dict: Clause name -> tuple of items, plus "distinct" and "tables"
+    """
+    return dict(_parse_clauses(sql))
+
+@lru_cache(maxsize=2048)
+def _structural_diff(expected_sql, generated_sql):
+    """Cached comparison behind structural_diff; callers get copies of its dicts"""
+    expected = parse_clauses(expected_sql)
+    generated = parse_clauses(generated_sql)
+
+    differences = []
+    if expected["distinct"] != generated["distinct"]:
+        differences.append({
+            "clause": "select",
+            "label": "SELECT DISTINCT",
+            "status": "changed",
+            "removed": ("DISTINCT",) if expected["distinct"] else (),
+            "added": ("DISTINCT",) if generated["distinct"] else ()
+        })
+
+    for clause in CLAUSE_ORDER:
+        expected_items = expected[clause]
+        generated_items = generated[clause]
+        if expected_items == generated_items:
+            continue
+
+        removed = tuple((Counter(expected_items) - Counter(generated_items)).elements())
+        added = tuple((Counter(generated_items) - Counter(expected_items)).elements())
+        if not generated_items:
+            status = "missing"
+        elif not expected_items:
+            status = "extra"
+        elif not removed and not added:
+            status = "reordered"
+        else:
+            status = "changed"
+
+        differences.append({
+            "clause": clause,
+            "label": CLAUSE_LABELS[clause],
+            "status": status,
+            "removed": removed,
+            "added": added
+        })
+    return tuple(differences)
+
+def structural_diff(expected_sql, generated_sql):
+    """
+    Compare two SQL queries clause by clause
+
+    Items are compared as multisets, so the cost is linear in the number of
+    tokens. Results are cached per pair, and each call returns its own
+    copies of the dicts.
+
+    Args:
+        expected_sql (str): The expected/correct SQL query
+        generated_sql (str): The generated SQL query to compare
+
+    Returns:
+        tuple: One dict per differing clause with clause, label, status
+            ("missing", "extra", "changed" or "reordered"), removed and added items
+    """
+    return tuple(dict(difference) for difference in _structural_diff(expected_sql, generated_sql))
+
+def _evict_parse_caches(session_state):
+    """Session memory evictor for the cached clause parses and structural diffs"""
+    count = _parse_clauses.cache_info().currsize + _structural_diff.cache_info().currsize
+    _parse_clauses.cache_clear()
+    _structural_diff.cache_clear()
+    return f"{count} cached SQL parses and structural diffs" if count else None
+
+register_evictor("sql_structure", _evict_parse_caches)
@@ -0,0 +1,137 @@
+"""
+Startup-time audit for BDA Studio
+
+Measures how long the app's modules take to import in a fresh interpreter
+and lists heavy libraries imported at module level by pages and components.
+
+Usage:
+    python -m utils.startup_audit [--top N]
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+
+# Libraries that are expensive to import and should be loaded lazily
+HEAVY_MODULES = ["pandas", "numpy", "plotly", "altair", "matplotlib", "seaborn", "pydeck", "pyarrow"]
+
+# Modules imported in a fresh interpreter to measure their cold import time
+AUDITED_MODULES = [
+    "streamlit",
+    "components.sidebar",
+    "components.experiment_results",
+    "components.sql_diff_viewer",
+    "utils.page_setup",
+    "utils.session_state",
+    "utils.sql_validator",
+    "utils.mock_data"
+]
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure_import(module):
+    """
+    Import a module in a fresh interpreter with -X importtime
+
+    Args:
+        module (str): Dotted module name
+
+    Returns:
+        dict: total_ms for the module and the slowest nested imports, or an
+            error message if the import failed
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        return {"module": module, "error": last_line}
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append({
+                "name": match.group(4),
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": len(match.group(3)) // 2
+            })
+
+    total = next((e['cumulative_ms'] for e in reversed(entries) if e['name'] == module), 0.0)
+    return {
+        "module": module,
+        "total_ms": total,
+        "slowest": sorted(entries, key=lambda e: e['cumulative_ms'], reverse=True)
+    }
+
+def find_eager_heavy_imports(paths):
+    """
+    Find heavy libraries imported at module level
+
+    Args:
+        paths (list): Python files to scan
+
+    Returns:
+        list: (path, line number, module) tuples
+    """
+    found = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                if name.split(".")[0] in HEAVY_MODULES:
+                    found.append((os.path.relpath(path, ROOT_DIR), node.lineno, name))
+    return found
+
+def _entry_point_files():
+    """Return main.py, pages, components and utils files"""
+    files = [os.path.join(ROOT_DIR, "main.py")]
+    for folder in ["pages", "components", "utils"]:
+        folder_path = os.path.join(ROOT_DIR, folder)
+        files += sorted(
+            os.path.join(folder_path, name)
+            for name in os.listdir(folder_path) if name.endswith(".py")
+        )
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit BDA Studio import and startup cost")
+    parser.add_argument("--top", type=int, default=5, help="Slowest nested imports to show per module")
+    args = parser.parse_args()
+
+    print("Cold import time")
+    print("================")
+    for module in AUDITED_MODULES:
+        result = measure_import(module)
+        if "error" in result:
+            print(f"{module:<36} FAILED: {result['error']}")
+            continue
+        print(f"{module:<36} {result['total_ms']:>9.1f} ms")
+        for entry in result['slowest'][1:args.top + 1]:
+            print(f"    {entry['name']:<32} {entry['cumulative_ms']:>9.1f} ms")
+
+    print()
+    print("Heavy libraries imported at module level")
+    print("========================================")
+    eager = find_eager_heavy_imports(_entry_point_files())
+    if not eager:
+        print("None")
+    for path, lineno, name in eager:
+        print(f"{path}:{lineno}: {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import datetime
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from utils.cost_guard import parse_row_count
+from utils.hashing import stable_int
+from utils.schema_catalog import get_columns, table_watermark
+
+logger = logging.getLogger(__name__)
+
+# Rows kept per table for previews and fixtures
+SAMPLE_ROWS = 20
+
+# Rows the stand-in warehouse scan reads to build a sample and its statistics
+SCAN_ROWS = 2000
+
+# Tables kept in the cache, shared by every session of the server
+MAX_CACHED_TABLES = 256
+
+# A string column with at most this many values is used to stratify the sample
+MAX_STRATA = 20
+
+# Share of NULLs the stand-in scan writes into NULLABLE columns
+_NULL_RATE = 0.05
+
+_cache = OrderedDict()  # qualified table name -> entry
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "fetches": 0, "evictions": 0}
+
+def _column_values(column, count, rng):
+    """Generate count values of one column for the stand-in scan"""
+    name = column['name'].lower()
+    kind = column.get('type', "STRING").upper()
+    if kind in ("INTEGER", "INT64"):
+        if name == "id" or name.endswith("_id"):
+            values = np.arange(1, count + 1) if name == "id" else rng.integers(1, max(count // 4, 2), count)
+        else:
+            values = rng.integers(0, 1000, count)
+        values = values.astype(object)
+    elif kind in ("FLOAT", "FLOAT64", "NUMERIC"):
+        values = np.round(rng.gamma(2.0, 50.0, count), 2).astype(object)
+    elif kind in ("TIMESTAMP", "DATETIME", "DATE"):
+        start = np.datetime64("2023-01-01")
+        days = rng.integers(0, 365, count)
+        values = (start + days.astype("timedelta64[D]")).astype(str).astype(object)
+    elif kind in ("BOOLEAN", "BOOL"):
+        values = (rng.random(count) < 0.5).astype(object)
+    else:
+        # Low-cardinality labels for category-like columns, unique-ish text otherwise
+        if any(word in name for word in ("category", "type", "status", "segment", "country", "device")):
+            values = np.array([f"{name}_{i}" for i in rng.integers(0, 8, count)], dtype=object)
+        else:
+            values = np.array([f"{name} {i}" for i in rng.integers(0, count, count)], dtype=object)
+
+    if column.get('mode', "NULLABLE").upper() == "NULLABLE":
+        values[rng.random(count) < _NULL_RATE] = None
+    return values
+
+def _scan_table(qualified_name, table, columns):
+    """
+    Stand-in for a warehouse scan of a table
+
+    Values are generated from a seed of the table name and its watermark, so
+    the same table version always yields the same rows.
+    """
+    import pandas as pd
+
+    count = max(min(parse_row_count(table.get('rows')), SCAN_ROWS), 1)
+    rng = np.random.default_rng(stable_int(qualified_name, table_watermark(table)))
+    return pd.DataFrame({column['name']: _column_values(column, count, rng) for column in columns})
+
+def _strata_column(df):
+    """Return the low-cardinality column to stratify on, or None"""
+    for name in df.columns:
+        if df[name].dtype == object and 1 < df[name].nunique(dropna=True) <= MAX_STRATA:
+            if isinstance(df[name].dropna().iloc[0], str):
+                return name
+    return None
+
+def stratified_sample(df, size=SAMPLE_ROWS, seed=0):
+    """
+    Return up to size rows with every stratum represented
+
+    Rows are drawn proportionally from each value of a low-cardinality
+    column, with at least one row per value; without such a column, rows
+    are taken at evenly spaced positions.
+    """
+    import pandas as pd
+
+    if len(df) <= size:
+        return df.reset_index(drop=True)
+    strata = _strata_column(df)
+    if strata is None:
+        positions = np.linspace(0, len(df) - 1, size).astype(int)
+        return df.iloc[positions].reset_index(drop=True)
+
+    groups = df.groupby(df[strata].fillna("NULL"), sort=True)
+    picks = []
+    for _, group in groups:
+        share = max(1, round(size * len(group) / len(df)))
+        picks.append(group.sample(n=min(share, len(group)), random_state=seed))
+    sample = pd.concat(picks).head(size)
+    # Rounding can leave the sample short; top it up from the remaining rows
+    if len(sample) < size:
+        rest = df.drop(sample.index)
+        sample = pd.concat([sample, rest.sample(n=size - len(sample), random_state=seed)])
+    return sample.sort_index().reset_index(drop=True)
+
+def column_stats(df, columns):
+    """
+    Compute null rate, distinct count and min/max of every column
+
+    Returns:
+        list: One dict per column with name, type, null_rate, distinct, min, max
+    """
+    stats = []
+    for column in columns:
+        values = df[column['name']]
+        present = values.dropna()
+        try:
+            low, high = (present.min(), present.max()) if len(present) else (None, None)
+        except TypeError:
+            low, high = None, None
+        stats.append({
+            "name": column['name'],
+            "type": column.get('type', "STRING"),
+            "null_rate": float(values.isna().mean()) if len(values) else 0.0,
+            "distinct": int(present.nunique()),
+            "min": None if low is None else str(low),
+            "max": None if high is None else str(high)
+        })
+    return stats
+
+def get_table_profile(project, dataset, table, columns=None):
+    """
+    Return the cached sample and column statistics of a table
+
+    The warehouse is only scanned when the table is not cached or its
+    last_updated watermark differs from the cached one.
+
+    Args:
+        project (str): Project of the dataset
+        dataset (str): Dataset name
+        table (dict): Table record with name, rows and last_updated
+        columns (list): Column dicts with name, type and mode; defaults
+            to the table's schema
+
+    Returns:
+        dict: table, watermark, sample (DataFrame), stats, fetched_at
+    """
+    qualified_name = f"{project}.{dataset}.{table['name']}"
+    columns = columns or get_columns(table)
+    watermark = table_watermark(table)
+    column_names = [c['name'] for c in columns]
+
+    with _cache_lock:
+        entry = _cache.get(qualified_name)
+        if entry is not None and entry["watermark"] == watermark and entry["columns"] == column_names:
+            _cache.move_to_end(qualified_name)
+            _stats["hits"] += 1
+            return entry
+
+    scanned = _scan_table(qualified_name, table, columns)
+    entry = {
+        "table": qualified_name,
+        "watermark": watermark,
+        "columns": column_names,
+        "sample": stratified_sample(scanned, seed=stable_int(qualified_name, digest_size=4)),
+        "stats": column_stats(scanned, columns),
+        "fetched_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    with _cache_lock:
+        _stats["fetches"] += 1
+        _cache[qualified_name] = entry
+        _cache.move_to_end(qualified_name)
+        while len(_cache) > MAX_CACHED_TABLES:
+            evicted, _ = _cache.popitem(last=False)
+            _stats["evictions"] += 1
+            logger.info("Evicted table sample %s", evicted)
+    return entry
+
+def get_stats():
+    """Return the number of cached tables and hit/fetch counters"""
+    with _cache_lock:
+        return dict(_stats, tables=len(_cache))
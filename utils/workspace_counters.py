@@ -0,0 +1,81 @@
+import datetime
+
+import streamlit as st
+
+# Entity stores counted per workspace
+COUNTED_KINDS = ("experiments", "assistants", "materials", "datasets")
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def _new_entry(last_activity=None):
+    entry = {kind: set() for kind in COUNTED_KINDS}
+    entry["last_activity"] = last_activity
+    return entry
+
+def rebuild_counters():
+    """
+    Rebuild every workspace's counters from the entity stores
+
+    Runs once per session, when the stores are set up; from then on every
+    create and delete updates the counters directly.
+    """
+    counters = {}
+    for workspace in st.session_state.get('workspaces', []):
+        counters[workspace['id']] = _new_entry(workspace.get('created_at'))
+    for kind in COUNTED_KINDS:
+        for entity in st.session_state.get(kind, []):
+            entry = counters.setdefault(entity['workspace_id'], _new_entry())
+            entry[kind].add(entity['id'])
+            created = entity.get('created_at')
+            if created and (entry["last_activity"] is None or created > entry["last_activity"]):
+                entry["last_activity"] = created
+    st.session_state.workspace_counters = counters
+    return counters
+
+def _counters():
+    if 'workspace_counters' not in st.session_state:
+        return rebuild_counters()
+    return st.session_state.workspace_counters
+
+def record_created(kind, entity):
+    """
+    Count a new workspace entity
+
+    Entities are tracked by id, so recording one twice counts it once.
+
+    Args:
+        kind (str): One of COUNTED_KINDS
+        entity (dict): The created entity with id and workspace_id
+    """
+    entry = _counters().setdefault(entity['workspace_id'], _new_entry())
+    entry[kind].add(entity['id'])
+    entry["last_activity"] = entity.get('created_at') or _now()
+
+def record_deleted(kind, entity):
+    """Stop counting a deleted workspace entity"""
+    entry = _counters().get(entity['workspace_id'])
+    if entry is not None:
+        entry[kind].discard(entity['id'])
+        entry["last_activity"] = _now()
+
+def record_workspace(workspace):
+    """Start counters for a new workspace"""
+    _counters().setdefault(workspace['id'], _new_entry(workspace.get('created_at') or _now()))
+
+def forget_workspace(workspace_id):
+    """Drop the counters of a deleted workspace"""
+    _counters().pop(workspace_id, None)
+
+def get_counts(workspace_id):
+    """
+    Return the counters of a workspace
+
+    Returns:
+        dict: experiments, assistants, materials and datasets counts and
+            last_activity (timestamp string or None)
+    """
+    entry = _counters().get(workspace_id)
+    if entry is None:
+        return dict({kind: 0 for kind in COUNTED_KINDS}, last_activity=None)
+    return dict({kind: len(entry[kind]) for kind in COUNTED_KINDS}, last_activity=entry["last_activity"])